@@ -86,5 +86,14 @@ def create_app(config_name='default'):
     from app.routes import register_error_handlers
     register_error_handlers(app)
     
+    # 按需启用请求采样剖析
+    from app.services.profiler import init_profiler
+    init_profiler(app)
+    
+    # 后台预加载并预热图片识别模型
+    if app.config.get('IMAGE_PRELOAD'):
+        from app.routes.api import start_image_model_preload
+        start_image_model_preload(app)
+    
     return app
 
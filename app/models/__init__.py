@@ -4,7 +4,37 @@
 """
 
 from .data_manager import GarbageDataManager
+from .sqlite_manager import SQLiteDataManager
 from .classifier import GarbageClassifier
+from .normalizer import QueryNormalizer
 
-__all__ = ['GarbageDataManager', 'GarbageClassifier']
+
+def create_data_manager(storage_mode: str = 'csv', **options):
+    """
+    按存储模式创建数据管理器
+    
+    Args:
+        storage_mode: 'csv' / 'journal' 使用 GarbageDataManager，'sqlite' 使用 SQLiteDataManager
+        **options: 传给对应数据管理器的参数
+        
+    Returns:
+        数据管理器实例
+    """
+    if storage_mode == 'sqlite':
+        return SQLiteDataManager(
+            db_file=options.get('db_file'),
+            csv_file=options.get('csv_file'),
+            normalizer=options.get('normalizer')
+        )
+    return GarbageDataManager(
+        csv_file=options.get('csv_file'),
+        storage_mode=storage_mode,
+        compact_interval=options.get('compact_interval', 30),
+        compact_threshold=options.get('compact_threshold', 1000),
+        reload_interval=options.get('reload_interval', 0),
+        normalizer=options.get('normalizer')
+    )
+
+
+__all__ = ['GarbageDataManager', 'SQLiteDataManager', 'GarbageClassifier', 'QueryNormalizer', 'create_data_manager']
 
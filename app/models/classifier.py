@@ -3,21 +3,149 @@
 实现智能垃圾分类算法
 """
 
-from typing import Tuple, Optional, List
+import atexit
+import csv
+import multiprocessing
+import os
+import threading
+from itertools import islice
+from typing import Iterable, Iterator, Tuple, Optional, List
 from .data_manager import GarbageDataManager
+from .text_index import KeywordMatcher
+from .cache import LRUCache
+from .metrics import MATCH_TOTAL, WindowedCounter, timed
+
+
+# Keyword tables for fallback analysis, in priority order:
+# (garbage_type, description, keywords)
+DEFAULT_KEYWORD_TABLES = [
+    ('有害垃圾', '可能含有有害物质', [
+        '电池', '灯管', '灯泡', '温度计', '血压计', '药', '油漆', '农药',
+        '化学', '汞', '铅', '镉', '荧光', '节能灯', '水银'
+    ]),
+    ('厨余垃圾', '属于有机废料', [
+        '菜', '果', '肉', '鱼', '虾', '蛋', '米', '面', '豆', '奶',
+        '剩', '皮', '核', '渣', '骨', '壳', '叶', '根', '茎'
+    ]),
+    ('可回收垃圾', '材料可回收利用', [
+        '纸', '塑料', '玻璃', '金属', '铁', '铝', '铜', '钢', '瓶', '罐',
+        '盒', '箱', '袋', '报纸', '杂志', '书', '本', '卡片'
+    ]),
+    ('其他垃圾', '难以回收处理', [
+        '烟', '灰', '尿布', '卫生', '陶瓷', '砖', '瓦', '灰土', '毛发',
+        '织物', '皮革', '橡胶', '木材'
+    ]),
+]
+
+# Cached result for unrecognized items; the message naming the item is built per request
+MISS_RESULT = (False, "未知", "", "")
+
+# State of a forked batch worker: (classifier, lock-free rule matcher), set by the pool initializer
+_worker_state = None
+
+
+def _init_worker(state) -> None:
+    """Pool initializer: keep the state handed over through fork (never pickled)"""
+    global _worker_state
+    _worker_state = state
+
+
+def _classify_names(item_names: List[str]) -> List[Tuple[str, Tuple[bool, str, str, str]]]:
+    """
+    Pool task: classify normalized names that missed the exact-match pass
+    
+    A worker forked from a multithreaded server inherits every lock some
+    other thread held at fork time, with no thread left to release it. So
+    this path only reads immutable indexes: no locks, no metrics. It returns
+    the match path of each name for the parent to record.
+    """
+    classifier, match = _worker_state
+    return [classifier._resolve(item_name, match, classifier._match_keywords) for item_name in item_names]
+
+
+class _WorkerPool:
+    """Fork-based process pool pinned to one rule version, shared by concurrent batches"""
+    
+    def __init__(self, context, workers: int, state, version: int):
+        self.version = version
+        self.users = 0
+        self.retired = False
+        self.pool = context.Pool(workers, initializer=_init_worker, initargs=(state,))
+    
+    def close(self) -> None:
+        """Let the workers exit and reap them in the background; no request waits for it"""
+        self.pool.close()
+        threading.Thread(target=self.pool.join, name='batch-pool-reaper', daemon=True).start()
+
+
+def load_keyword_tables(keyword_file: str) -> List[Tuple[str, str, List[str]]]:
+    """
+    从CSV文件加载关键词表
+    
+    文件列为 垃圾类型,关键词,说明；类型优先级按首次出现的顺序，
+    同一类型内关键词按行顺序排列，说明取该类型第一条非空值
+    
+    Args:
+        keyword_file: CSV文件路径
+        
+    Returns:
+        关键词表 [(垃圾类型, 说明, [关键词, ...]), ...]
+    """
+    tables = {}
+    with open(keyword_file, 'r', encoding='utf-8') as file:
+        reader = csv.DictReader(file)
+        for row in reader:
+            garbage_type = row['垃圾类型'].strip()
+            keyword = row['关键词'].strip()
+            description = (row.get('说明') or '').strip()
+            if not garbage_type or not keyword:
+                continue
+            
+            entry = tables.setdefault(garbage_type, [description, []])
+            if not entry[0]:
+                entry[0] = description
+            entry[1].append(keyword)
+    
+    return [(garbage_type, description, keywords)
+            for garbage_type, (description, keywords) in tables.items()]
 
 
 class GarbageClassifier:
     """垃圾分类器"""
     
-    def __init__(self, data_manager: GarbageDataManager = None):
+    def __init__(self, data_manager: GarbageDataManager = None, keyword_file: str = None,
+                 cache_size: int = 10000, cache_ttl: float = 0,
+                 workers: int = 0, parallel_min_items: int = 5000):
         """
         初始化分类器
         
         Args:
             data_manager: 数据管理器实例
+            keyword_file: 关键词表CSV文件路径，为None时使用内置关键词表
+            cache_size: 分类结果缓存条目数，0 表示禁用
+            cache_ttl: 分类结果缓存存活秒数，0 表示不过期
+            workers: 批量分类的进程数，0 或 1 表示在当前进程内执行
+            parallel_min_items: 需要模糊匹配的不同物品数达到该值时才启用进程池
         """
         self.data_manager = data_manager or GarbageDataManager()
+        # Queries are normalized once, the same way stored names were at load
+        self.normalizer = self.data_manager.normalizer
+        self.workers = workers
+        self.parallel_min_items = parallel_min_items
+        
+        # Batch worker pool for the current rule version (see _acquire_pool)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        
+        # Result cache keyed on normalized item name, tagged with rule version
+        self._cache = LRUCache(cache_size, cache_ttl)
+        self._cache_version = self.data_manager.version
+        
+        # Classification outcomes per garbage type ('' for unrecognized items)
+        self._outcomes = WindowedCounter()
+        
+        # Compile keyword tables once into a single automaton
+        self._compile_keywords(keyword_file)
         
         # Garbage type color mapping (for UI display)
         self.type_colors = {
@@ -45,80 +173,126 @@ class GarbageClassifier:
         Returns:
             Tuple(success, garbage_type, reason, suggestion)
         """
-        if not item_name or not item_name.strip():
+        name = self.normalizer(item_name) if item_name else ''
+        if not name:
             return False, "", "请输入物品名称", ""
         
-        # Get classification from data manager
-        result = self.data_manager.get_classification(item_name)
+        version = self._sync_version()
         
-        if result:
-            garbage_type, reason = result
-            suggestion = self._get_disposal_suggestion(garbage_type)
-            return True, garbage_type, reason, suggestion
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == version:
+            result = cached[1]
         else:
-            # Try keyword analysis
-            predicted_result = self._keyword_analysis(item_name)
-            if predicted_result:
-                garbage_type, reason = predicted_result
-                suggestion = self._get_disposal_suggestion(garbage_type)
-                return True, garbage_type, f"智能预测：{reason}", suggestion
-            else:
-                return False, "未知", f"抱歉，未找到'{item_name}'的分类规则", "建议咨询相关部门或添加到规则库"
+            result = self._classify_uncached(name)
+            self._cache.put(name, (version, result))
+        
+        self._outcomes.incr(result[1] if result[0] else '')
+        return result if result[0] else self._miss_result(item_name)
     
-    def _keyword_analysis(self, item_name: str) -> Optional[Tuple[str, str]]:
+    def _sync_version(self) -> int:
+        """Drop everything cached under an older rule version; returns the current version"""
+        version = self.data_manager.version
+        if version != self._cache_version:
+            self._cache_version = version
+            self._cache.clear()
+        return version
+    
+    @staticmethod
+    def _miss_result(item_name: str) -> Tuple[bool, str, str, str]:
+        """Result for an unrecognized item, quoting the name as the user typed it"""
+        return False, "未知", f"抱歉，未找到'{item_name}'的分类规则", "建议咨询相关部门或添加到规则库"
+    
+    def _classify_uncached(self, item_name: str) -> Tuple[bool, str, str, str]:
         """
-        Keyword-based intelligent analysis
+        Classify a normalized item name without consulting the cache
+        
+        Misses come back as MISS_RESULT; callers quote the original input via _miss_result.
+        """
+        path, result = self._resolve(item_name, self._match_rule, self._keyword_analysis)
+        MATCH_TOTAL.inc((path,))
+        return result
+    
+    def _resolve(self, item_name: str, match, analyze) -> Tuple[str, Tuple[bool, str, str, str]]:
+        """
+        Classify a normalized item name: rule match first, then keyword analysis
         
         Args:
-            item_name: Item name
+            item_name: Normalized item name
+            match: Rule matcher, name -> ('exact' or 'fuzzy', (garbage_type, reason)) or None
+            analyze: Keyword analysis, name -> (garbage_type, reason) or None
             
         Returns:
-            Tuple(garbage_type, reason) or None
+            (match path: 'exact', 'fuzzy', 'keyword' or 'miss', result)
         """
-        item_lower = item_name.lower()
+        matched = match(item_name)
+        if matched is not None:
+            path, (garbage_type, reason) = matched
+            return path, (True, garbage_type, reason, self._get_disposal_suggestion(garbage_type))
         
-        # Recyclable waste keywords
-        recyclable_keywords = [
-            '纸', '塑料', '玻璃', '金属', '铁', '铝', '铜', '钢', '瓶', '罐', 
-            '盒', '箱', '袋', '报纸', '杂志', '书', '本', '卡片'
-        ]
+        predicted_result = analyze(item_name)
+        if predicted_result is not None:
+            garbage_type, reason = predicted_result
+            return 'keyword', (True, garbage_type, f"智能预测：{reason}", self._get_disposal_suggestion(garbage_type))
         
-        # Hazardous waste keywords
-        hazardous_keywords = [
-            '电池', '灯管', '灯泡', '温度计', '血压计', '药', '油漆', '农药',
-            '化学', '汞', '铅', '镉', '荧光', '节能灯', '水银'
-        ]
-        
-        # Kitchen waste keywords
-        kitchen_keywords = [
-            '菜', '果', '肉', '鱼', '虾', '蛋', '米', '面', '豆', '奶',
-            '剩', '皮', '核', '渣', '骨', '壳', '叶', '根', '茎'
-        ]
-        
-        # Other waste keywords
-        other_keywords = [
-            '烟', '灰', '尿布', '卫生', '陶瓷', '砖', '瓦', '灰土', '毛发',
-            '织物', '皮革', '橡胶', '木材'
-        ]
+        return 'miss', MISS_RESULT
+    
+    @timed('get_classification')
+    def _match_rule(self, item_name: str) -> Optional[Tuple[str, Tuple[str, str]]]:
+        """Rule match in this process (get_classification stage)"""
+        return self.data_manager.match(item_name)
+    
+    def _compile_keywords(self, keyword_file: str = None) -> None:
+        """
+        编译关键词表为 Aho–Corasick 自动机
         
-        # Check keyword matches
-        for keyword in hazardous_keywords:
-            if keyword in item_name:
-                return "有害垃圾", f"包含关键词'{keyword}'，可能含有有害物质"
+        Args:
+            keyword_file: 关键词表CSV文件路径
+        """
+        tables = DEFAULT_KEYWORD_TABLES
+        if keyword_file:
+            try:
+                if os.path.exists(keyword_file):
+                    tables = load_keyword_tables(keyword_file)
+                    print(f"成功加载关键词表 {keyword_file}")
+                else:
+                    print(f"警告: 关键词文件 {keyword_file} 不存在，使用内置关键词表")
+            except Exception as e:
+                print(f"加载关键词表时出错: {e}，使用内置关键词表")
+                tables = DEFAULT_KEYWORD_TABLES
         
-        for keyword in kitchen_keywords:
-            if keyword in item_name:
-                return "厨余垃圾", f"包含关键词'{keyword}'，属于有机废料"
+        # Keywords are matched against normalized queries, so normalize them the same way
+        keywords = []
+        self._keyword_entries = []
+        for garbage_type, description, type_keywords in tables:
+            for keyword in type_keywords:
+                normalized = self.normalizer(keyword)
+                if normalized:
+                    keywords.append(normalized)
+                    self._keyword_entries.append((garbage_type, description, keyword))
         
-        for keyword in recyclable_keywords:
-            if keyword in item_name:
-                return "可回收垃圾", f"包含关键词'{keyword}'，材料可回收利用"
+        self._keyword_matcher = KeywordMatcher(keywords)
+    
+    @timed('keyword_analysis')
+    def _keyword_analysis(self, item_name: str) -> Optional[Tuple[str, str]]:
+        """Keyword analysis in this process (keyword_analysis stage)"""
+        return self._match_keywords(item_name)
+    
+    def _match_keywords(self, item_name: str) -> Optional[Tuple[str, str]]:
+        """
+        Keyword-based intelligent analysis
         
-        for keyword in other_keywords:
-            if keyword in item_name:
-                return "其他垃圾", f"包含关键词'{keyword}'，难以回收处理"
+        Args:
+            item_name: Item name
+            
+        Returns:
+            Tuple(garbage_type, reason) or None
+        """
+        ordinal = self._keyword_matcher.best_match(item_name)
+        if ordinal is None:
+            return None
         
-        return None
+        garbage_type, description, keyword = self._keyword_entries[ordinal]
+        return garbage_type, f"包含关键词'{keyword}'，{description}"
     
     def _get_disposal_suggestion(self, garbage_type: str) -> str:
         """
@@ -138,6 +312,38 @@ class GarbageClassifier:
         }
         return suggestions.get(garbage_type, '请按照当地垃圾分类标准处理')
     
+    def cache_stats(self) -> dict:
+        """Get classification cache counters (hits, misses, evictions, ...)"""
+        stats = self._cache.stats()
+        stats['rule_version'] = self._cache_version
+        return stats
+    
+    def request_stats(self, windows: Tuple[int, ...] = (60, 300, 3600)) -> dict:
+        """
+        Get classification request counters, lifetime and per time window
+        
+        Args:
+            windows: Window lengths in seconds
+            
+        Returns:
+            {'lifetime': summary, 'windows': {'60s': summary, ...}}, where each summary
+            holds total, per-type counts, misses (unrecognized items) and miss_rate
+        """
+        def summarize(counts):
+            misses = counts.pop('', 0)
+            total = sum(counts.values()) + misses
+            return {
+                'total': total,
+                'by_type': counts,
+                'misses': misses,
+                'miss_rate': round(misses / total, 4) if total else 0.0
+            }
+        
+        return {
+            'lifetime': summarize(self._outcomes.totals()),
+            'windows': {name: summarize(counts) for name, counts in self._outcomes.windows(windows).items()}
+        }
+    
     def get_type_color(self, garbage_type: str) -> str:
         """Get color for garbage type"""
         return self.type_colors.get(garbage_type, '#000000')
@@ -156,11 +362,177 @@ class GarbageClassifier:
         Returns:
             List of classification results [(item_name, success, garbage_type, reason, suggestion)]
         """
-        results = []
-        for item_name in item_names:
-            success, garbage_type, reason, suggestion = self.classify(item_name)
-            results.append((item_name, success, garbage_type, reason, suggestion))
-        return results
+        # One chunk: duplicates are shared across the whole batch and the
+        # fuzzy misses are large enough to spread over the worker pool
+        return list(self._classify_chunk(list(item_names), {}, self._sync_version()))
+    
+    def iter_batch_classify(self, item_names: Iterable[str],
+                            chunk_size: int = 256) -> Iterator[Tuple[str, bool, str, str, str]]:
+        """
+        Lazily classify items chunk by chunk, for streaming responses
+        
+        Each distinct name is resolved once per batch, so cost grows with
+        the number of unique names rather than the batch size.
+        
+        Args:
+            item_names: Iterable of item names
+            chunk_size: Items resolved together before their results are yielded
+            
+        Yields:
+            (item_name, success, garbage_type, reason, suggestion), in input order
+        """
+        resolved = {}
+        resolved_version = None
+        items = iter(item_names)
+        while True:
+            chunk = list(islice(items, chunk_size))
+            if not chunk:
+                break
+            
+            # Results resolved under an older rule version must not be reused
+            version = self._sync_version()
+            if version != resolved_version:
+                resolved.clear()
+                resolved_version = version
+            yield from self._classify_chunk(chunk, resolved, version)
+    
+    def _classify_chunk(self, chunk: List[str], resolved: dict,
+                        version: int) -> Iterator[Tuple[str, bool, str, str, str]]:
+        """
+        Resolve a chunk of item names and fan the results back out
+        
+        Args:
+            chunk: Raw item names
+            resolved: Results of names already resolved in this batch (updated in place)
+            version: Current rule version
+            
+        Yields:
+            (item_name, success, garbage_type, reason, suggestion), in chunk order
+        """
+        normalize = self.normalizer
+        names = [normalize(item_name) if item_name else '' for item_name in chunk]
+        
+        # Unique, not yet resolved names: cache first, then one exact-match pass
+        missing = []
+        for name in dict.fromkeys(names):
+            if not name or name in resolved:
+                continue
+            cached = self._cache.get(name)
+            if cached is not None and cached[0] == version:
+                resolved[name] = cached[1]
+            else:
+                missing.append(name)
+        
+        exact = self.data_manager.get_rules(missing) if missing else {}
+        if exact:
+            MATCH_TOTAL.inc(('exact',), len(exact))
+        
+        # Only exact misses go through fuzzy matching and keyword analysis
+        fuzzy = [name for name in missing if name not in exact]
+        if self.workers > 1 and len(fuzzy) >= self.parallel_min_items:
+            fuzzy_results = self._classify_parallel(fuzzy, version)
+        else:
+            fuzzy_results = [self._classify_uncached(name) for name in fuzzy]
+        fuzzy_results = dict(zip(fuzzy, fuzzy_results))
+        
+        for name in missing:
+            rule = exact.get(name)
+            if rule is not None:
+                result = (True, rule[0], rule[1], self._get_disposal_suggestion(rule[0]))
+            else:
+                result = fuzzy_results[name]
+            resolved[name] = result
+            self._cache.put(name, (version, result))
+        
+        for item_name, name in zip(chunk, names):
+            if not name:
+                yield item_name, False, "", "请输入物品名称", ""
+                continue
+            result = resolved[name]
+            self._outcomes.incr(result[1] if result[0] else '')
+            if not result[0]:
+                result = self._miss_result(item_name)
+            yield (item_name,) + result
+    
+    def _classify_parallel(self, item_names: List[str], version: int) -> List[Tuple[bool, str, str, str]]:
+        """
+        Classify names in a fork-based process pool, results in input order
+        
+        Workers see the rule snapshot and indexes of their pool's version
+        through copy-on-write memory; match paths are recorded here, since
+        workers record no metrics.
+        
+        Args:
+            item_names: Normalized, unique item names
+            version: Rule version the names are resolved under
+            
+        Returns:
+            [(success, garbage_type, reason, suggestion), ...]
+        """
+        try:
+            context = multiprocessing.get_context('fork')
+        except ValueError:
+            # No fork on this platform: indexes cannot be shared cheaply
+            return [self._classify_uncached(item_name) for item_name in item_names]
+        
+        # A few chunks per worker to even out uneven fuzzy-match costs
+        chunk_size = -(-len(item_names) // (self.workers * 4))
+        chunks = [item_names[start:start + chunk_size] for start in range(0, len(item_names), chunk_size)]
+        
+        pool = self._acquire_pool(context, version)
+        try:
+            resolved = [pair for chunk_results in pool.pool.map(_classify_names, chunks) for pair in chunk_results]
+        finally:
+            self._release_pool(pool)
+        
+        paths = {}
+        for path, _ in resolved:
+            paths[path] = paths.get(path, 0) + 1
+        for path, count in paths.items():
+            MATCH_TOTAL.inc((path,), count)
+        return [result for _, result in resolved]
+    
+    def _acquire_pool(self, context, version: int) -> _WorkerPool:
+        """
+        Worker pool for a rule version, forked on first use and shared by concurrent batches
+        
+        Workers are forked once per rule version rather than per request.
+        The previous version's pool is closed once its last batch finishes.
+        """
+        stale = None
+        with self._pool_lock:
+            pool = self._pool
+            if pool is None or pool.version != version:
+                if pool is not None:
+                    pool.retired = True
+                    stale = pool if pool.users == 0 else None
+                if pool is None:
+                    atexit.register(self.close)
+                pool = _WorkerPool(context, self.workers, (self, self.data_manager.matcher()), version)
+                self._pool = pool
+            pool.users += 1
+        if stale is not None:
+            stale.close()
+        return pool
+    
+    def _release_pool(self, pool: _WorkerPool) -> None:
+        """Finish using a pool; closes it if it was retired and this was its last batch"""
+        with self._pool_lock:
+            pool.users -= 1
+            finished = pool.retired and pool.users == 0
+        if finished:
+            pool.close()
+    
+    def close(self) -> None:
+        """Shut down the batch worker pool; a batch still using it finishes first"""
+        with self._pool_lock:
+            pool, self._pool = self._pool, None
+            if pool is None:
+                return
+            pool.retired = True
+            idle = pool.users == 0
+        if idle:
+            pool.close()
     
     def get_similar_items(self, item_name: str, limit: int = 5) -> List[str]:
         """
@@ -171,18 +543,19 @@ class GarbageClassifier:
             limit: Result limit
             
         Returns:
-            List of similar item names
+            List of similar item names, most similar first
         """
-        all_items = list(self.data_manager.get_all_rules().keys())
-        similar = []
-        
-        item_lower = item_name.lower()
-        
-        # Find items containing same characters
-        for stored_item in all_items:
-            stored_lower = stored_item.lower()
-            if any(char in stored_lower for char in item_lower if char.isalnum()):
-                similar.append(stored_item)
+        return [name for name, _ in self.rank_similar_items(item_name, limit)]
+    
+    def rank_similar_items(self, item_name: str, limit: int = 5) -> List[Tuple[str, float]]:
+        """
+        Rank stored items by character n-gram similarity
         
-        return similar[:limit]
-
+        Args:
+            item_name: Item name
+            limit: Result limit
+            
+        Returns:
+            List of (item_name, score) with cosine similarity in (0, 1]
+        """
+        return self.data_manager.find_similar(self.normalizer(item_name) if item_name else '', limit, normalized=True)
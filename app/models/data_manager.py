@@ -3,36 +3,113 @@
 负责CSV文件的读写操作和数据管理
 """
 
+import bisect
 import csv
+import functools
 import os
-from typing import Dict, List, Tuple, Optional
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Tuple, Optional
+
+from .journal import RuleJournal
+from .metrics import MATCH_TOTAL, timed
+from .normalizer import QueryNormalizer, default_normalizer
+from .snapshot import RuleSnapshot
+
+try:
+    import fcntl
+except ImportError:  # Windows: no inter-process locking, single process only
+    fcntl = None
+
+# Storage modes: full CSV rewrite per change, or append-only log plus background compaction
+STORAGE_MODES = ('csv', 'journal')
 
 
 class GarbageDataManager:
     """垃圾分类数据管理器"""
     
-    def __init__(self, csv_file: str = None):
+    def __init__(self, csv_file: str = None, storage_mode: str = 'csv',
+                 compact_interval: float = 30, compact_threshold: int = 1000,
+                 reload_interval: float = 0, normalizer: QueryNormalizer = None):
         """
         初始化数据管理器
         
         Args:
             csv_file: CSV文件路径，如果为None则从配置读取
+            storage_mode: 存储模式，'csv' 每次变更重写CSV，'journal' 追加写日志并后台压缩
+            compact_interval: journal 模式下后台压缩的检查间隔（秒）
+            compact_threshold: journal 模式下日志累积多少条记录后立即压缩
+            reload_interval: 检查规则文件是否被其他进程修改的间隔（秒），0 表示不检查
+            normalizer: 查询与物品名称的规范化器，为None时使用默认规范化器
         """
         if csv_file is None:
             from flask import current_app
             csv_file = current_app.config['DATA_FILE']
         
+        if storage_mode not in STORAGE_MODES:
+            raise ValueError(f"未知的存储模式: {storage_mode}，可选: {', '.join(STORAGE_MODES)}")
+        
         self.csv_file = csv_file
-        self.rules_dict = {}
+        self.storage_mode = storage_mode
+        self.normalizer = normalizer or default_normalizer()
+        
+        # Current immutable snapshot; readers grab it once, writers swap in a new one
+        self._snapshot = RuleSnapshot.build({}, 0, self.normalizer)
+        
+        # Serializes mutations and their log/snapshot writes within this process
+        self._write_lock = threading.RLock()
+        
+        # Serializes them across processes: <csv>.lock is held exclusively from the
+        # reload that precedes a mutation until it is persisted, and during compaction
+        self.lock_file = f"{csv_file}.lock"
+        
+        # Journal mode: mutations are fsync'd to <csv>.log, compacted into the CSV in the background
+        self._journal = RuleJournal(f"{csv_file}.log") if storage_mode == 'journal' else None
+        self.compact_interval = compact_interval
+        self.compact_threshold = compact_threshold
+        self._compact_event = threading.Event()
+        self._compactor = None
+        self._compactor_start_lock = threading.Lock()
+        
+        # Hot reload: file signature of the last load/write, checked by a watcher thread
+        self.reload_interval = reload_interval
+        self._signature = None
+        self._watcher_pid = None
+        self._watcher_start_lock = threading.Lock()
+        
         self.load_rules()
+        # Only the initial load compacts what earlier runs left behind; reloads never do
+        if self._journal is not None and self._journal.has_changes():
+            self._request_compaction()
+        if self.reload_interval:
+            self._start_watcher()
     
-    def load_rules(self) -> None:
-        """从CSV文件加载垃圾分类规则"""
-        try:
-            if not os.path.exists(self.csv_file):
-                print(f"警告: CSV文件 {self.csv_file} 不存在，将创建空规则")
-                return
-            
+    @property
+    def rules_dict(self) -> Mapping[str, Dict[str, str]]:
+        """当前规则快照的只读视图"""
+        return self._snapshot.rules
+    
+    @property
+    def version(self) -> int:
+        """规则版本号，每次加载或变更后递增（用于缓存失效）"""
+        return self._snapshot.version
+    
+    @property
+    def revision(self) -> str:
+        """规则内容标识，内容不变则不变，多进程间一致（用于 HTTP ETag）"""
+        return self._current().digest
+    
+    def _current(self) -> RuleSnapshot:
+        """Current snapshot; starts the file watcher in this process on first use"""
+        if self.reload_interval and self._watcher_pid != os.getpid():
+            self._start_watcher()
+        return self._snapshot
+    
+    def _read_rules(self) -> Dict[str, Tuple[str, str]]:
+        """从CSV文件（及变更日志）读取规则，返回 {物品名称: (垃圾类型, 分类依据)}"""
+        rules = {}
+        if os.path.exists(self.csv_file):
             with open(self.csv_file, 'r', encoding='utf-8') as file:
                 reader = csv.DictReader(file)
                 for row in reader:
@@ -40,63 +117,361 @@ class GarbageDataManager:
                     garbage_type = row['垃圾类型'].strip()
                     reason = row['分类依据'].strip()
                     
-                    self.rules_dict[item_name] = {
-                        'type': garbage_type,
-                        'reason': reason
-                    }
-            
-            print(f"成功加载 {len(self.rules_dict)} 条垃圾分类规则")
-            
+                    rules[item_name] = (garbage_type, reason)
+        else:
+            print(f"警告: CSV文件 {self.csv_file} 不存在，将创建空规则")
+        
+        # Replay mutations not yet compacted into the snapshot
+        if self._journal is not None:
+            replayed = self._journal.replay(rules)
+            if replayed:
+                print(f"已重放 {replayed} 条规则变更日志")
+        
+        return rules
+    
+    def load_rules(self) -> None:
+        """从CSV文件加载垃圾分类规则，构建新快照后原子替换"""
+        with self._write_lock, self._file_lock(exclusive=False):
+            self._load_locked()
+    
+    def _load_locked(self) -> None:
+        """Load rules from disk and publish them; caller must hold the write lock and the file lock"""
+        signature = self._file_signature()
+        try:
+            rules = self._read_rules()
+            print(f"成功加载 {len(rules)} 条垃圾分类规则")
         except Exception as e:
             print(f"加载规则时出错: {e}")
-            self.rules_dict = {}
+            rules = {}
+        
+        self._publish(self._snapshot.derive(rules))
+        self._signature = signature
+    
+    def _refresh_locked(self) -> None:
+        """Reload if another process changed the files; caller must hold the write lock and the file lock"""
+        if self._file_signature() != self._signature:
+            print(f"检测到规则文件变化，重新加载 {self.csv_file}")
+            self._load_locked()
+    
+    @contextmanager
+    def _file_lock(self, exclusive: bool = True):
+        """
+        Inter-process lock on <csv>.lock; caller must hold the write lock
+        
+        Each acquisition opens its own descriptor, so flock also excludes
+        other threads of this process.
+        """
+        if fcntl is None:
+            yield
+            return
+        fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            os.close(fd)
+    
+    def _file_signature(self) -> tuple:
+        """(inode, mtime, size) of the rule file and any change logs"""
+        paths = [self.csv_file]
+        if self._journal is not None:
+            paths.append(self._journal.log_file)
+        
+        signature = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+    
+    def reload_if_changed(self) -> bool:
+        """
+        规则文件被其他进程修改时重新加载
+        
+        Returns:
+            是否重新加载
+        """
+        if self._file_signature() == self._signature:
+            return False
+        
+        # Compaction and mutations hold the lock exclusively, so the files are never read mid-change
+        with self._write_lock, self._file_lock(exclusive=False):
+            if self._file_signature() == self._signature:
+                return False
+            print(f"检测到规则文件变化，重新加载 {self.csv_file}")
+            self._load_locked()
+            return True
+    
+    def _start_watcher(self) -> None:
+        """Start the file watcher thread in the current process"""
+        with self._watcher_start_lock:
+            if self._watcher_pid == os.getpid():
+                return
+            self._watcher_pid = os.getpid()
+            threading.Thread(target=self._watch_loop, name='rules-watcher', daemon=True).start()
+    
+    def _watch_loop(self) -> None:
+        """Watcher thread body"""
+        while True:
+            time.sleep(self.reload_interval)
+            try:
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"检查规则文件变化时出错: {e}")
+    
+    def _apply(self, changes: Iterable[Tuple[str, Optional[Tuple[str, str]]]]) -> None:
+        """
+        Swap in a new snapshot with the changes applied; caller must hold the write lock
+        
+        Args:
+            changes: (物品名称, (垃圾类型, 分类依据) 或 None 表示删除) 序列
+        """
+        self._publish(self._snapshot.apply(changes))
+    
+    def _publish(self, snapshot: RuleSnapshot) -> None:
+        """
+        Build indexes, then swap the snapshot in; caller must hold the write lock
+        
+        Readers keep using the previous snapshot until the new one is ready. The
+        similarity index is only built ahead if the previous snapshot had one.
+        """
+        snapshot.prepare(similarity=self._snapshot.has_similarity_index)
+        self._snapshot = snapshot
     
     def save_rules(self) -> bool:
-        """将规则保存到CSV文件"""
+        """将规则保存到CSV文件（写临时文件后原子替换）"""
+        with self._write_lock, self._file_lock():
+            self._refresh_locked()
+            return self._save_locked()
+    
+    def _save_locked(self) -> bool:
+        """Write the current snapshot to the CSV; caller must hold the write lock and the file lock"""
+        saved = self._write_snapshot(self._snapshot)
+        if saved:
+            self._signature = self._file_signature()
+        return saved
+    
+    def _write_snapshot(self, snapshot: RuleSnapshot) -> bool:
+        """
+        原子写入CSV快照
+        
+        Args:
+            snapshot: 要写入的规则快照
+            
+        Returns:
+            操作是否成功
+        """
+        tmp_file = f"{self.csv_file}.{os.getpid()}.{threading.get_ident()}.tmp"
         try:
-            with open(self.csv_file, 'w', newline='', encoding='utf-8') as file:
-                fieldnames = ['物品名称', '垃圾类型', '分类依据']
-                writer = csv.DictWriter(file, fieldnames=fieldnames)
+            with open(tmp_file, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file, lineterminator='\n')
+                writer.writerow(['物品名称', '垃圾类型', '分类依据'])
+                writer.writerows(snapshot.iter_rules())
                 
-                writer.writeheader()
-                for item_name, rule_info in self.rules_dict.items():
-                    writer.writerow({
-                        '物品名称': item_name,
-                        '垃圾类型': rule_info['type'],
-                        '分类依据': rule_info['reason']
-                    })
-            
-            print(f"成功保存 {len(self.rules_dict)} 条规则到文件")
+                file.flush()
+                os.fsync(file.fileno())
+            
+            os.replace(tmp_file, self.csv_file)
+            print(f"成功保存 {len(snapshot.names)} 条规则到文件")
             return True
             
         except Exception as e:
             print(f"保存规则时出错: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return False
+    
+    def _persist(self, records: List[Dict[str, str]]) -> bool:
+        """
+        持久化一组变更；调用方需持有写锁和文件锁
+        
+        Args:
+            records: 变更日志记录
+            
+        Returns:
+            操作是否成功
+        """
+        if self._journal is None:
+            return self._save_locked()
+        
+        try:
+            self._journal.append(records)
+        except Exception as e:
+            print(f"写入变更日志时出错: {e}")
             return False
+        self._signature = self._file_signature()
+        
+        if self._journal.pending >= self.compact_threshold:
+            self._request_compaction()
+        else:
+            self._ensure_compactor()
+        return True
     
-    def get_classification(self, item_name: str) -> Optional[Tuple[str, str]]:
+    def compact(self) -> bool:
+        """
+        将变更日志压缩进CSV快照
+        
+        Returns:
+            操作是否成功
+        """
+        if self._journal is None:
+            return self.save_rules()
+        
+        with self._write_lock, self._file_lock():
+            # Compact what is on disk: other processes may have appended since this one last loaded
+            self._refresh_locked()
+            if not self._journal.has_changes():
+                return True
+            
+            if not self._write_snapshot(self._snapshot):
+                return False
+            self._journal.clear()
+            self._signature = self._file_signature()
+            return True
+    
+    def _ensure_compactor(self) -> None:
+        """Start the background compactor thread on first use (after any process fork)"""
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        with self._compactor_start_lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(
+                    target=self._compact_loop, name='rules-compactor', daemon=True
+                )
+                self._compactor.start()
+    
+    def _request_compaction(self) -> None:
+        """Wake the compactor immediately"""
+        self._ensure_compactor()
+        self._compact_event.set()
+    
+    def _compact_loop(self) -> None:
+        """Compactor thread body"""
+        while True:
+            self._compact_event.wait(self.compact_interval)
+            self._compact_event.clear()
+            try:
+                if self._journal.has_changes():
+                    self.compact()
+            except Exception as e:
+                print(f"压缩规则日志时出错: {e}")
+    
+    def get_rule(self, item_name: str) -> Optional[Dict[str, str]]:
+        """
+        按名称精确获取规则
+        
+        Args:
+            item_name: 物品名称
+            
+        Returns:
+            {'type': 垃圾类型, 'reason': 分类依据} 或 None
+        """
+        rule = self._current().get(item_name.strip())
+        return {'type': rule[0], 'reason': rule[1]} if rule else None
+    
+    def get_rules(self, keys: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        按规范化名称批量精确获取规则
+        
+        Args:
+            keys: 经 normalizer 规范化的物品名称
+            
+        Returns:
+            {规范化名称: (垃圾类型, 分类依据)}，不含未找到的名称
+        """
+        snapshot = self._current()
+        lookup = snapshot.lookup
+        found = {}
+        for key in keys:
+            ordinal = lookup.get(key)
+            if ordinal is not None:
+                found[key] = snapshot.rule_at(ordinal)
+        return found
+    
+    @timed('get_classification')
+    def get_classification(self, item_name: str, normalized: bool = False) -> Optional[Tuple[str, str]]:
         """
         获取物品的垃圾分类信息
         
         Args:
             item_name: 物品名称
+            normalized: item_name 是否已经过 normalizer 规范化
             
         Returns:
             元组(垃圾类型, 分类依据) 或 None
         """
-        item_name = item_name.strip()
+        matched = self.match(item_name if normalized else self.normalizer(item_name))
+        if matched is None:
+            return None
+        path, rule = matched
+        MATCH_TOTAL.inc((path,))
+        return rule
+    
+    def match(self, key: str) -> Optional[Tuple[str, Tuple[str, str]]]:
+        """
+        在当前快照上匹配规范化名称（不记录指标）
+        
+        Args:
+            key: 经 normalizer 规范化的物品名称
+            
+        Returns:
+            (匹配方式 'exact' 或 'fuzzy', (垃圾类型, 分类依据)) 或 None
+        """
+        return self._match_snapshot(self._current(), key)
+    
+    def matcher(self) -> Callable[[str], Optional[Tuple[str, Tuple[str, str]]]]:
+        """
+        固定在当前快照上的 match 函数，供 fork 出的工作进程使用
+        
+        Indexes are built here, in the calling process, so the returned
+        function only reads immutable data: it takes no locks, starts no
+        watcher and records no metrics.
+        
+        Returns:
+            与 match 相同签名的函数
+        """
+        snapshot = self._current()
+        snapshot.prepare()
+        return functools.partial(self._match_snapshot, snapshot)
+    
+    @staticmethod
+    def _match_snapshot(snapshot: RuleSnapshot, key: str) -> Optional[Tuple[str, Tuple[str, str]]]:
+        """Exact, then fuzzy match of a normalized name against a snapshot"""
+        if not key:
+            return None
         
-        # Exact match
-        if item_name in self.rules_dict:
-            rule = self.rules_dict[item_name]
-            return rule['type'], rule['reason']
+        # Exact match on the normalized name
+        ordinal = snapshot.lookup.get(key)
+        if ordinal is not None:
+            return 'exact', snapshot.rule_at(ordinal)
         
-        # Fuzzy match - check if contains keyword
-        for stored_name, rule in self.rules_dict.items():
-            if item_name in stored_name or stored_name in item_name:
-                return rule['type'], f"根据相似物品'{stored_name}'分类：{rule['reason']}"
+        # Fuzzy match - first stored name that contains or is contained in the query
+        ordinal = snapshot.index.find_first(key)
+        if ordinal is not None:
+            garbage_type, reason = snapshot.rule_at(ordinal)
+            return 'fuzzy', (garbage_type, f"根据相似物品'{snapshot.names[ordinal]}'分类：{reason}")
         
         return None
     
+    def find_similar(self, item_name: str, limit: int = 5, normalized: bool = False) -> List[Tuple[str, float]]:
+        """
+        查找名称相似的物品
+        
+        Args:
+            item_name: 物品名称
+            limit: 返回数量
+            normalized: item_name 是否已经过 normalizer 规范化
+            
+        Returns:
+            [(物品名称, 相似度), ...]，按相似度降序排列
+        """
+        key = item_name if normalized else self.normalizer(item_name)
+        snapshot = self._current()
+        names = snapshot.names
+        return [(names[ordinal], score) for ordinal, score in snapshot.similarity_index.top_k(key, limit)]
+    
     def add_rule(self, item_name: str, garbage_type: str, reason: str) -> bool:
         """
         添加新的分类规则
@@ -117,12 +492,12 @@ class GarbageDataManager:
             if not all([item_name, garbage_type, reason]):
                 return False
             
-            self.rules_dict[item_name] = {
-                'type': garbage_type,
-                'reason': reason
-            }
-            
-            return self.save_rules()
+            with self._write_lock, self._file_lock():
+                # Pick up other processes' edits first so they are not overwritten
+                self._refresh_locked()
+                self._apply([(item_name, (garbage_type, reason))])
+                
+                return self._persist([RuleJournal.set_record(item_name, garbage_type, reason)])
             
         except Exception as e:
             print(f"添加规则时出错: {e}")
@@ -154,24 +529,90 @@ class GarbageDataManager:
         """
         try:
             item_name = item_name.strip()
-            if item_name in self.rules_dict:
-                del self.rules_dict[item_name]
-                return self.save_rules()
-            return False
+            with self._write_lock, self._file_lock():
+                self._refresh_locked()
+                if item_name in self._snapshot.positions:
+                    self._apply([(item_name, None)])
+                    return self._persist([RuleJournal.delete_record(item_name)])
+                return False
             
         except Exception as e:
             print(f"删除规则时出错: {e}")
             return False
     
-    def get_all_rules(self) -> Dict[str, Dict[str, str]]:
-        """获取所有规则"""
-        return self.rules_dict.copy()
+    def import_rules(self, rules: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        批量添加或更新规则，一次性替换快照并只持久化一次
+        
+        Args:
+            rules: (物品名称, 垃圾类型, 分类依据) 序列，调用方负责校验；同名规则后者覆盖前者
+            
+        Returns:
+            写入的不同物品名称数（重复名称只计一次），失败返回 -1
+        """
+        try:
+            latest = {item_name.strip(): (garbage_type.strip(), reason.strip())
+                      for item_name, garbage_type, reason in rules}
+            if not latest:
+                return 0
+            
+            with self._write_lock, self._file_lock():
+                self._refresh_locked()
+                self._apply(latest.items())
+                
+                records = [RuleJournal.set_record(item_name, *rule) for item_name, rule in latest.items()]
+                return len(latest) if self._persist(records) else -1
+            
+        except Exception as e:
+            print(f"批量导入规则时出错: {e}")
+            return -1
+    
+    def iter_rules(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        按存储顺序逐条遍历规则（遍历期间的变更不影响本次结果）
+        
+        Yields:
+            (物品名称, 垃圾类型, 分类依据)
+        """
+        return self._current().iter_rules()
+    
+    def list_rules(self, garbage_type: str = None, prefix: str = '', after: str = None,
+                   offset: int = 0, limit: int = 50) -> Tuple[List[Tuple[str, str, str]], int]:
+        """
+        按名称排序分页查询规则
+        
+        Args:
+            garbage_type: 只返回该类型的规则
+            prefix: 物品名称前缀
+            after: 游标，只返回名称排在其后的规则
+            offset: 在游标之后再跳过的条数
+            limit: 返回条数
+            
+        Returns:
+            ([(物品名称, 垃圾类型, 分类依据), ...], 符合筛选条件的规则总数)
+        """
+        snapshot = self._current()
+        names = snapshot.sorted_names(garbage_type)
+        
+        # Prefix range via binary search on the sorted names
+        lo = bisect.bisect_left(names, prefix) if prefix else 0
+        hi = bisect.bisect_left(names, prefix + '\U0010ffff') if prefix else len(names)
+        
+        start = lo
+        if after is not None:
+            start = max(start, bisect.bisect_right(names, after))
+        start += max(0, offset)
+        
+        rows = []
+        for item_name in names[start:min(hi, start + max(0, limit))]:
+            rows.append((item_name, *snapshot.get(item_name)))
+        return rows, hi - lo
+    
+    def get_all_rules(self) -> Mapping[str, Dict[str, str]]:
+        """获取所有规则的只读视图（不复制，读取时不受之后的变更影响）"""
+        return self._current().rules
     
     def get_statistics(self) -> Dict[str, int]:
-        """获取分类统计信息"""
-        stats = {}
-        for rule in self.rules_dict.values():
-            garbage_type = rule['type']
-            stats[garbage_type] = stats.get(garbage_type, 0) + 1
-        return stats
+        """获取分类统计信息（随规则变更增量维护）"""
+        return dict(self._current().counts)
 
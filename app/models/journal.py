@@ -0,0 +1,121 @@
+"""
+垃圾分类系统 - 规则变更日志模块
+追加写入、fsync 持久化的规则变更日志（write-ahead log）
+"""
+
+import json
+import os
+from typing import Dict, Iterable, List, Tuple
+
+
+class RuleJournal:
+    """Append-only, fsync'd log of rule mutations"""
+
+    def __init__(self, log_file: str):
+        """
+        初始化日志
+
+        Args:
+            log_file: 日志文件路径
+        """
+        self.log_file = log_file
+
+        # Records on disk since the last compaction, as far as this process knows
+        self.pending = 0
+
+    @staticmethod
+    def set_record(item_name: str, garbage_type: str, reason: str) -> Dict[str, str]:
+        """Record for adding or updating a rule"""
+        return {'op': 'set', 'item_name': item_name, 'type': garbage_type, 'reason': reason}
+
+    @staticmethod
+    def delete_record(item_name: str) -> Dict[str, str]:
+        """Record for deleting a rule"""
+        return {'op': 'delete', 'item_name': item_name}
+
+    def append(self, records: Iterable[Dict[str, str]]) -> None:
+        """
+        追加记录并 fsync，返回即表示已落盘
+
+        Args:
+            records: 变更记录
+        """
+        payload = ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+        if not payload:
+            return
+
+        fd = os.open(self.log_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            data = payload.encode('utf-8')
+            written = 0
+            while written < len(data):
+                written += os.write(fd, data[written:])
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        self.pending += payload.count('\n')
+
+    def replay(self, rules_dict: Dict[str, Tuple[str, str]]) -> int:
+        """
+        重放日志（记录幂等，可重复重放）
+
+        Args:
+            rules_dict: 从快照加载的规则字典 {物品名称: (垃圾类型, 分类依据)}，原地更新
+
+        Returns:
+            重放的记录数
+        """
+        applied = 0
+        for record in self._read(self.log_file):
+            if record.get('op') == 'set':
+                rules_dict[record['item_name']] = (record['type'], record['reason'])
+            elif record.get('op') == 'delete':
+                rules_dict.pop(record['item_name'], None)
+            else:
+                continue
+            applied += 1
+
+        self.pending = applied
+        return applied
+
+    @staticmethod
+    def _read(path: str) -> List[Dict[str, str]]:
+        """Read records; a torn trailing line left by a crash is truncated away"""
+        if not os.path.exists(path):
+            return []
+
+        records = []
+        valid_length = 0
+        with open(path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    records.append(json.loads(line.decode('utf-8')))
+                except ValueError:
+                    break
+                valid_length += len(line)
+
+        # Later appends must not land behind a broken line
+        if valid_length < os.path.getsize(path):
+            print(f"警告: 日志 {path} 末尾记录不完整，已截断")
+            with open(path, 'r+b') as file:
+                file.truncate(valid_length)
+                os.fsync(file.fileno())
+        return records
+
+    def has_changes(self) -> bool:
+        """Whether the log still needs compaction"""
+        return self.pending > 0
+
+    def clear(self) -> None:
+        """
+        快照写入成功后删除日志；调用方需持有文件锁
+
+        A crash before the removal leaves the log in place; replaying it over
+        the new snapshot yields the same rules.
+        """
+        if os.path.exists(self.log_file):
+            os.remove(self.log_file)
+        self.pending = 0
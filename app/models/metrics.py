@@ -0,0 +1,366 @@
+"""
+垃圾分类系统 - 运行指标模块
+按时间窗口聚合的请求计数、各处理阶段耗时直方图与 Prometheus 文本格式导出；数据分散在固定数量的分片中，每个分片各自加锁
+"""
+
+import bisect
+import functools
+import itertools
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterable, List, Sequence, Tuple
+
+
+# Latency buckets (seconds) spanning sub-millisecond text lookups to multi-second model inference
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+
+
+# Round-robin shard assignment for new threads; next() on itertools.count is atomic
+_SHARD_SEQUENCE = itertools.count()
+
+# Live sharded metrics, so a forked child can replace locks inherited in a held state
+_SHARDED = weakref.WeakSet()
+
+
+class _ThreadSharded:
+    """
+    Base for metrics written from many threads: a fixed number of shards,
+    each guarded by its own lock
+
+    Sharded, per-shard locked; not lock-free. Every write and every read of
+    a shard takes that shard's threading.Lock. Threads are assigned a shard
+    round-robin on first write, so concurrent writers rarely contend for the
+    same lock. The shard count does not grow with the number of threads (the
+    server starts one per request), which keeps memory and the cost of
+    merging shards on read bounded. A forked child gets fresh locks (see
+    _reset_after_fork), but code that may run in forked workers should
+    still avoid recording metrics.
+    """
+
+    SHARDS = 16
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = [(threading.Lock(), self._new_shard()) for _ in range(self.SHARDS)]
+        _SHARDED.add(self)
+
+    def _reset_locks(self) -> None:
+        """Fresh shard locks in a forked child; a parent thread may have held one at fork time"""
+        self._local = threading.local()
+        self._shards = [(threading.Lock(), shard) for _, shard in self._shards]
+
+    def _new_shard(self):
+        raise NotImplementedError
+
+    def _shard(self):
+        """(lock, shard) assigned to this thread"""
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._shards[next(_SHARD_SEQUENCE) % len(self._shards)]
+            self._local.shard = shard
+        return shard
+
+
+def _reset_after_fork() -> None:
+    """Runs in the child after fork: only the forking thread survives there"""
+    for metric in list(_SHARDED):
+        metric._reset_locks()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class WindowedCounter(_ThreadSharded):
+    """
+    Per-key event counter with lifetime totals and sliding time windows
+
+    Each shard is (totals, ring of time bucket stamps, ring of buckets).
+    """
+
+    def __init__(self, bucket_seconds: float = 10, max_window: float = 3600):
+        """
+        初始化计数器
+
+        Args:
+            bucket_seconds: 时间桶宽度（秒），窗口统计精度
+            max_window: 支持查询的最长时间窗口（秒）
+        """
+        self.bucket_seconds = bucket_seconds
+        self.bucket_count = int(max_window // bucket_seconds) + 1
+        super().__init__()
+
+    def _new_shard(self):
+        return {}, [-1] * self.bucket_count, [{} for _ in range(self.bucket_count)]
+
+    def incr(self, key: Hashable, amount: int = 1) -> None:
+        """
+        计数
+
+        Args:
+            key: 事件键
+            amount: 增量
+        """
+        stamp = int(time.time() // self.bucket_seconds)
+        slot = stamp % self.bucket_count
+        lock, (totals, stamps, buckets) = self._shard()
+        with lock:
+            totals[key] = totals.get(key, 0) + amount
+            bucket = buckets[slot]
+            if stamps[slot] != stamp:
+                # Recycle the expired slot
+                bucket = {}
+                buckets[slot] = bucket
+                stamps[slot] = stamp
+            bucket[key] = bucket.get(key, 0) + amount
+
+    def totals(self) -> Dict[Hashable, int]:
+        """启动以来各事件键的累计次数"""
+        merged = {}
+        for lock, (totals, _, _) in self._shards:
+            with lock:
+                totals = totals.copy()
+            for key, count in totals.items():
+                merged[key] = merged.get(key, 0) + count
+        return merged
+
+    def window(self, seconds: float) -> Dict[Hashable, int]:
+        """
+        最近一段时间内各事件键的次数（按时间桶取整）
+
+        Args:
+            seconds: 窗口长度（秒），不超过 max_window
+
+        Returns:
+            {事件键: 次数}
+        """
+        now = int(time.time() // self.bucket_seconds)
+        oldest = now - min(self.bucket_count, max(1, int(seconds // self.bucket_seconds))) + 1
+
+        merged = {}
+        for lock, (_, stamps, buckets) in self._shards:
+            with lock:
+                live = [buckets[slot].copy() for slot in range(self.bucket_count)
+                        if oldest <= stamps[slot] <= now]
+            for bucket in live:
+                for key, count in bucket.items():
+                    merged[key] = merged.get(key, 0) + count
+        return merged
+
+    def windows(self, windows: Iterable[float]) -> Dict[str, Dict[Hashable, int]]:
+        """
+        多个时间窗口的计数
+
+        Args:
+            windows: 窗口长度（秒）序列
+
+        Returns:
+            {'<秒数>s': {事件键: 次数}}
+        """
+        return {f'{int(seconds)}s': self.window(seconds) for seconds in windows}
+
+
+def _escape(value) -> str:
+    """Escape a Prometheus label value"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    """Render a Prometheus label set"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Counter(_ThreadSharded):
+    """Monotonic counter with labels"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        """
+        Args:
+            name: 指标名（以 _total 结尾）
+            documentation: 指标说明
+            label_names: 标签名
+        """
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def _new_shard(self):
+        return {}
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        """
+        计数
+
+        Args:
+            labels: 标签值，顺序同 label_names
+            amount: 增量
+        """
+        lock, shard = self._shard()
+        with lock:
+            shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self) -> Dict[Tuple[str, ...], float]:
+        """各标签组合的累计值"""
+        merged = {}
+        for lock, shard in self._shards:
+            with lock:
+                shard = shard.copy()
+            for labels, value in shard.items():
+                merged[labels] = merged.get(labels, 0) + value
+        return merged
+
+    def render(self) -> List[str]:
+        """Prometheus text lines"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for labels, value in sorted(self.collect().items()):
+            lines.append(f'{self.name}{_format_labels(self.label_names, labels)} {value}')
+        return lines
+
+
+class Histogram(_ThreadSharded):
+    """Fixed-bucket histogram with labels"""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            name: 指标名
+            documentation: 指标说明
+            label_names: 标签名
+            buckets: 桶上界（升序，不含 +Inf）
+        """
+        super().__init__()
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+
+    def _new_shard(self):
+        return {}
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        """
+        记录一次观测值
+
+        Args:
+            value: 观测值（秒）
+            labels: 标签值，顺序同 label_names
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        lock, shard = self._shard()
+        with lock:
+            series = shard.get(labels)
+            if series is None:
+                # Per-bucket (non-cumulative) counts, the +Inf bucket last, then the sum
+                series = [0] * (len(self.buckets) + 1) + [0.0]
+                shard[labels] = series
+            series[index] += 1
+            series[-1] += value
+
+    def collect(self) -> Dict[Tuple[str, ...], List[float]]:
+        """各标签组合的分桶计数（非累计）及总和"""
+        merged = {}
+        for lock, shard in self._shards:
+            with lock:
+                shard = [(labels, list(series)) for labels, series in shard.items()]
+            for labels, series in shard:
+                total = merged.get(labels)
+                merged[labels] = series if total is None else [a + b for a, b in zip(total, series)]
+        return merged
+
+    def render(self) -> List[str]:
+        """Prometheus text lines"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for labels, series in sorted(self.collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float('inf') else f'le="{bound}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}')
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f'{self.name}_sum{label_text} {series[-1]}')
+            lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, documentation: str, label_names: Sequence[str] = ()) -> Counter:
+        """创建并注册计数器"""
+        metric = Counter(name, documentation, label_names)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        """创建并注册直方图"""
+        metric = Histogram(name, documentation, label_names, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'garbage_stage_duration_seconds', 'Time spent in each processing stage', ('stage',)
+)
+MATCH_TOTAL = REGISTRY.counter(
+    'garbage_match_total', 'Uncached text classifications by match path', ('path',)
+)
+
+
+def timed(stage: str):
+    """
+    装饰器：把函数耗时记入 STAGE_SECONDS
+
+    Args:
+        stage: 阶段名（stage 标签值）
+    """
+    labels = (stage,)
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                STAGE_SECONDS.observe(time.perf_counter() - start, labels)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def span(stage: str):
+    """
+    上下文管理器：把代码块耗时记入 STAGE_SECONDS
+
+    Args:
+        stage: 阶段名（stage 标签值）
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, (stage,))
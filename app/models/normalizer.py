@@ -0,0 +1,113 @@
+"""
+垃圾分类系统 - 查询文本规范化模块
+统一查询与规则名称的写法（全角/半角、繁体/简体、大小写、标点与空白），使等价写法命中同一条规则
+"""
+
+import unicodedata
+from typing import List, Optional, Union
+
+
+# Traditional -> simplified pairs for characters common in item names and
+# everyday queries. Several traditional forms may fold into one simplified
+# character; queries and stored names go through the same table, so folding
+# only has to be consistent, not a complete conversion.
+TRADITIONAL_SIMPLIFIED_PAIRS = """
+電电 紙纸 膠胶 鐵铁 鋁铝 鋼钢 銅铜 錫锡 鋅锌 鋰锂 鎳镍 鎘镉 鉛铅 銀银 屬属 藥药 燈灯 舊旧 報报 書书
+廚厨 餘余 飯饭 葉叶 蝦虾 殼壳 頭头 雞鸡 鴨鸭 魚鱼 麵面 條条 煙烟 衛卫 褲裤 磚砖 塊块 筆笔 帶带 盤盘
+鍋锅 壺壶 線线 機机 腦脑 視视 螢萤 熒荧 溫温 殺杀 蟲虫 劑剂 過过 紐纽 鈕钮 釦扣 乾干 濕湿 張张 雜杂
+誌志 廢废 類类 質质 鏡镜 錶表 鐘钟 傘伞 襪袜 髮发 發发 鬍胡 膚肤 潔洁 齒齿 塗涂 漿浆 醬酱 蘿萝 蔔卜
+蘋苹 檸柠 鳳凤 餅饼 麥麦 穀谷 碼码 號号 單单 據据 標标 籤签 裝装 環环 圍围 燒烧 噴喷 滅灭 墊垫 氣气
+體体 熱热 凍冻 櫃柜 貓猫 籠笼 飼饲 養养 寵宠 鑰钥 鎖锁 鏈链 輪轮 軟软 輕轻 價价 層层 廣广 應应 當当
+淨净 濾滤 網网 綠绿 紅红 藍蓝 黃黄 絲丝 綿绵 織织 紡纺 繩绳 結结 組组 細细 純纯 傢家 廁厕 鹽盐 醫医
+療疗 針针 塵尘 滷卤 燭烛 爐炉 鍵键 纜缆 濃浓 鹼碱 礦矿 臺台 檯台 盃杯 棄弃 處处 區区 運运 輸输 動动
+態态 測测 試试 驗验 導导 彈弹 兒儿 嬰婴 幣币 廠厂 儲储 備备 記记 錄录 錯错 樣样 檔档 維维 護护 鏽锈
+節节 計计 壓压 妝妆 紗纱 飲饮 遞递 鈴铃 鮮鲜 髒脏 壞坏 斷断 殘残 灑洒 氫氢 顯显 數数 開开 關关 風风
+課课 習习 郵邮 蓋盖 寶宝 蠟蜡 鑽钻 鋸锯 釘钉 鏟铲 錘锤 繃绷 們们 這这 個个 說说 為为 時时 會会 後后
+來来 對对 學学 國国 實实 現现 點点 進进 種种 將将 產产 業业 務务 經经 長长 問问 題题 義义 邊边 嗎吗
+麼么 沒没 還还 讓让 給给 從从 與与 聲声 員员 華华 東东 車车 門门 見见 場场 難难 總总 議议 認认 識识
+劃划 變变 辦办 達达 勞劳 廳厅 萬万 億亿 幾几 雙双 兩两 隻只 團团 輛辆 頁页 週周 歲岁 臉脸 腳脚 腸肠
+膽胆 汙污 亂乱 圖图 畫画 寫写 讀读 聽听 話话 語语 詞词 練练 檢检 級级 優优 樓楼 築筑 構构 設设 飾饰
+買买 賣卖 錢钱 貝贝 愛爱 歷历 曆历 刪删 無无 樂乐 馬马 鳥鸟 龍龙 請请 謝谢 瓊琼 聯联 陽阳 陰阴 館馆
+豬猪 牽牵 觀观 燙烫 緊紧 擔担 險险 廂厢 窩窝 鍍镀 錐锥 鉗钳 紀纪 綁绑 縫缝 繡绣 補补 稅税 瑣琐 餃饺
+饅馒 餛馄 飩饨 醃腌 罈坛 壇坛 甕瓮 蓮莲 筍笋 薑姜 蔥葱 棗枣 櫻樱 梔栀 鬆松 糰团 餵喂 儀仪 紋纹 薩萨
+漢汉 堅坚 鐳镭 盞盏 燼烬 灘滩
+""".split()
+
+_TRADITIONAL_TO_SIMPLIFIED = dict(TRADITIONAL_SIMPLIFIED_PAIRS)
+
+# Bump whenever folding rules or the table above change: persisted name keys are rebuilt
+TABLE_VERSION = 1
+
+
+def _fold(char: str) -> Optional[str]:
+    """Replacement for one NFKC-normalized character: None drops it"""
+    category = unicodedata.category(char)
+    if category[0] in 'PZ' or category in ('Cc', 'Cf'):
+        # Punctuation, whitespace/separators, control and zero-width characters
+        return None
+    return char.lower()
+
+
+class QueryNormalizer:
+    """
+    Compiled text normalizer shared by queries and stored rule names
+
+    NFKC (which also folds full-width forms to half-width), then one
+    str.translate pass that drops punctuation and whitespace, lowercases and
+    optionally maps traditional to simplified characters. The table covers
+    the BMP; astral characters (emoji, rare ideographs) only go through NFKC.
+    """
+
+    def __init__(self, traditional_to_simplified: bool = True):
+        """
+        编译规范化转换表
+
+        Args:
+            traditional_to_simplified: 是否把繁体字转换为简体字
+        """
+        self.traditional_to_simplified = traditional_to_simplified
+
+        # A list indexed by code point: lookups never raise for BMP characters,
+        # which keeps str.translate fast; astral code points fall off the end unchanged
+        table: List[Union[int, str, None]] = list(range(0x10000))
+        for codepoint in range(0x10000):
+            char = chr(codepoint)
+            folded = _fold(char)
+            if folded != char:
+                table[codepoint] = folded
+        if traditional_to_simplified:
+            for traditional, simplified in _TRADITIONAL_TO_SIMPLIFIED.items():
+                table[ord(traditional)] = simplified
+        self._table = table
+
+    @property
+    def signature(self) -> int:
+        """规范化规则的标识，规则变化（如开关繁简转换）后持久化的规范化名称需要重建"""
+        return TABLE_VERSION * 2 + int(self.traditional_to_simplified)
+
+    def __call__(self, text: str) -> str:
+        """
+        规范化文本
+
+        Args:
+            text: 原始文本
+
+        Returns:
+            规范化后的文本（可能为空字符串）
+        """
+        if not text:
+            return ''
+        if not text.isascii():
+            text = unicodedata.normalize('NFKC', text)
+        return text.translate(self._table)
+
+
+_default_normalizer = None
+
+
+def default_normalizer() -> QueryNormalizer:
+    """进程内共享的默认规范化器（含繁简转换），首次使用时编译"""
+    global _default_normalizer
+    if _default_normalizer is None:
+        _default_normalizer = QueryNormalizer()
+    return _default_normalizer
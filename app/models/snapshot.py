@@ -0,0 +1,430 @@
+"""
+垃圾分类系统 - 规则快照模块
+不可变的规则快照，整体替换以保证并发读取的一致性
+"""
+
+import hashlib
+import threading
+from array import array
+from collections.abc import Mapping
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .normalizer import default_normalizer
+from .text_index import SubstringIndex, SimilarityIndex
+
+# Largest id an 'H' array can hold; id arrays widen to 'I' beyond it
+_SHORT_ID_LIMIT = 0xFFFF
+
+
+def _id_array(size: int, ids: Iterable[int] = ()) -> array:
+    """Compact array for ids into a pool of the given size"""
+    return array('H' if size <= _SHORT_ID_LIMIT + 1 else 'I', ids)
+
+
+class StringPool:
+    """
+    Append-only table of distinct strings
+
+    Snapshots store small integer ids instead of one string object per rule.
+    Ids are never reassigned, so a pool can be shared by every snapshot
+    derived from the same load: readers of an older snapshot only look up ids
+    that already existed when it was built. Strings no rule refers to any more
+    stay in the pool until the next full load builds a fresh one.
+    """
+
+    __slots__ = ('values', '_ids')
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: str) -> int:
+        """字符串对应的 id，首次出现时追加（调用方需持有写锁）"""
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self._ids[value] = value_id
+        return value_id
+
+
+class RulesView(Mapping):
+    """
+    Read-only mapping view of a snapshot: {物品名称: {'type': 垃圾类型, 'reason': 分类依据}}
+
+    Values are built on access, so callers may keep or modify them without
+    affecting the snapshot; creating the view copies nothing.
+    """
+
+    __slots__ = ('_snapshot',)
+
+    def __init__(self, snapshot: 'RuleSnapshot'):
+        self._snapshot = snapshot
+
+    def __getitem__(self, item_name: str) -> Dict[str, str]:
+        rule = self._snapshot.get(item_name)
+        if rule is None:
+            raise KeyError(item_name)
+        return {'type': rule[0], 'reason': rule[1]}
+
+    def __contains__(self, item_name) -> bool:
+        return item_name in self._snapshot.positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._snapshot.names)
+
+    def __len__(self) -> int:
+        return len(self._snapshot.names)
+
+
+class RuleSnapshot:
+    """
+    Immutable rule set plus lazily built lookup indexes
+
+    Rules are stored as parallel arrays in storage order: names[i] has type
+    types.values[type_ids[i]] and reason reasons.values[reason_ids[i]]. Type
+    and reason strings are interned in pools shared with derived snapshots.
+
+    Lookups go through normalized name keys: keys[i] is the normalized form
+    of names[i], and both indexes are built over keys, so their ordinals map
+    back to stored names through names.
+
+    Writers call prepare() before publishing a snapshot, so readers normally
+    find the indexes built; anything still built lazily is built once, by the
+    first thread that needs it, while other threads wait for it.
+    """
+
+    __slots__ = ('names', 'types', 'reasons', 'version', 'counts', 'normalize',
+                 '_type_ids', '_reason_ids', '_positions', '_keys', '_key_source', '_lookup',
+                 '_index', '_similarity_index', '_sorted_names', '_digest', '_build_lock')
+
+    def __init__(self, names: List[str], type_ids: array, reason_ids: array,
+                 types: StringPool, reasons: StringPool, version: int,
+                 counts: Optional[Dict[str, int]] = None,
+                 normalize: Optional[Callable[[str], str]] = None):
+        """
+        Args:
+            names: 按存储顺序排列的物品名称（快照创建后不得再修改）
+            type_ids: 各规则垃圾类型在 types 中的 id
+            reason_ids: 各规则分类依据在 reasons 中的 id
+            types: 垃圾类型字符串池
+            reasons: 分类依据字符串池
+            version: 规则版本号
+            counts: 各垃圾类型的规则数，为None时重新统计
+            normalize: 名称规范化函数，为None时使用默认规范化器
+        """
+        self.names = names
+        self.types = types
+        self.reasons = reasons
+        self.version = version
+        self.normalize = normalize or default_normalizer()
+        self._type_ids = type_ids
+        self._reason_ids = reason_ids
+        self.counts = counts if counts is not None else self._count_types()
+        self._positions = None
+        self._keys = None
+        # (names, keys) of an earlier snapshot, reused instead of renormalizing unchanged names
+        self._key_source = None
+        self._lookup = None
+        self._index = None
+        self._similarity_index = None
+        self._sorted_names = None
+        self._digest = None
+        self._build_lock = threading.RLock()
+
+    @classmethod
+    def build(cls, rules: Dict[str, Tuple[str, str]], version: int,
+              normalize: Optional[Callable[[str], str]] = None) -> 'RuleSnapshot':
+        """
+        从规则字典构建快照（使用新的字符串池）
+
+        Args:
+            rules: {物品名称: (垃圾类型, 分类依据)}
+            version: 规则版本号
+            normalize: 名称规范化函数
+
+        Returns:
+            新快照
+        """
+        types, reasons = StringPool(), StringPool()
+        type_ids = [types.intern(garbage_type) for garbage_type, _ in rules.values()]
+        reason_ids = [reasons.intern(reason) for _, reason in rules.values()]
+        return cls(list(rules), _id_array(len(types), type_ids), _id_array(len(reasons), reason_ids),
+                   types, reasons, version, normalize=normalize)
+
+    def _count_types(self) -> Dict[str, int]:
+        """按垃圾类型统计规则数（类型按首次出现的顺序）"""
+        counts = {}
+        for type_id in self._type_ids:
+            counts[type_id] = counts.get(type_id, 0) + 1
+        types = self.types.values
+        return {types[type_id]: count for type_id, count in counts.items()}
+
+    def _built(self, slot: str, build: Callable[[], object]):
+        """Value of a lazily built slot, built under the lock by the first thread that needs it"""
+        with self._build_lock:
+            value = getattr(self, slot)
+            if value is None:
+                value = build()
+                setattr(self, slot, value)
+            return value
+
+    def prepare(self, similarity: bool = False) -> None:
+        """
+        发布前构建读取路径用到的索引，使读请求无需等待
+
+        Args:
+            similarity: 是否同时构建相似度索引
+        """
+        self.positions
+        self.lookup
+        self.index
+        if similarity:
+            self.similarity_index
+
+    @property
+    def has_similarity_index(self) -> bool:
+        """相似度索引是否已构建（后继快照据此决定是否预先构建）"""
+        return self._similarity_index is not None
+
+    @property
+    def rules(self) -> RulesView:
+        """只读规则视图"""
+        return RulesView(self)
+
+    @property
+    def positions(self) -> Dict[str, int]:
+        """物品名称 -> 存储序号，首次使用时构建"""
+        positions = self._positions
+        if positions is None:
+            positions = self._built(
+                '_positions', lambda: {item_name: ordinal for ordinal, item_name in enumerate(self.names)}
+            )
+        return positions
+
+    def rule_at(self, ordinal: int) -> Tuple[str, str]:
+        """第 ordinal 条规则的 (垃圾类型, 分类依据)"""
+        return self.types.values[self._type_ids[ordinal]], self.reasons.values[self._reason_ids[ordinal]]
+
+    def get(self, item_name: str) -> Optional[Tuple[str, str]]:
+        """按原始名称精确获取 (垃圾类型, 分类依据)，不存在时返回 None"""
+        ordinal = self.positions.get(item_name)
+        return None if ordinal is None else self.rule_at(ordinal)
+
+    def iter_rules(self) -> Iterator[Tuple[str, str, str]]:
+        """按存储顺序遍历 (物品名称, 垃圾类型, 分类依据)"""
+        types, reasons = self.types.values, self.reasons.values
+        for item_name, type_id, reason_id in zip(self.names, self._type_ids, self._reason_ids):
+            yield item_name, types[type_id], reasons[reason_id]
+
+    @property
+    def keys(self) -> List[str]:
+        """与 names 一一对应的规范化名称，首次使用时计算"""
+        keys = self._keys
+        if keys is None:
+            keys = self._built('_keys', self._build_keys)
+        return keys
+
+    def _build_keys(self) -> List[str]:
+        normalize = self.normalize
+        source = self._key_source
+        self._key_source = None
+        if source is not None:
+            known = dict(zip(*source))
+            return [known.get(name) or normalize(name) for name in self.names]
+        return [normalize(name) for name in self.names]
+
+    @property
+    def lookup(self) -> Dict[str, int]:
+        """规范化名称 -> 存储序号，多条规则规范化后相同时取存储顺序最前的一条"""
+        lookup = self._lookup
+        if lookup is None:
+            lookup = self._built('_lookup', self._build_lookup)
+        return lookup
+
+    def _build_lookup(self) -> Dict[str, int]:
+        lookup = {}
+        for ordinal, key in enumerate(self.keys):
+            lookup.setdefault(key, ordinal)
+        return lookup
+
+    @property
+    def index(self) -> SubstringIndex:
+        """规范化名称子串索引，首次使用时构建"""
+        index = self._index
+        if index is None:
+            index = self._built('_index', lambda: SubstringIndex(self.keys))
+        return index
+
+    @property
+    def similarity_index(self) -> SimilarityIndex:
+        """规范化名称相似度索引，首次使用时构建"""
+        index = self._similarity_index
+        if index is None:
+            index = self._built('_similarity_index', lambda: SimilarityIndex(self.keys))
+        return index
+
+    def sorted_names(self, garbage_type: Optional[str] = None) -> List[str]:
+        """
+        按名称排序的物品名称列表（用于前缀查找和分页），首次使用时构建
+
+        Args:
+            garbage_type: 只返回该类型的物品，None 表示全部
+
+        Returns:
+            排序后的名称列表（不得修改）
+        """
+        sorted_names = self._sorted_names
+        if sorted_names is None:
+            sorted_names = self._built('_sorted_names', self._build_sorted_names)
+        return sorted_names.get(garbage_type, [])
+
+    def _build_sorted_names(self) -> Dict[Optional[str], List[str]]:
+        names, type_ids, types = self.names, self._type_ids, self.types.values
+        order = sorted(range(len(names)), key=names.__getitem__)
+        sorted_names = {None: [names[ordinal] for ordinal in order]}
+        for ordinal in order:
+            sorted_names.setdefault(types[type_ids[ordinal]], []).append(names[ordinal])
+        return sorted_names
+
+    @property
+    def digest(self) -> str:
+        """规则内容摘要，内容相同的快照（包括不同进程中的）摘要相同"""
+        digest = self._digest
+        if digest is None:
+            digest = self._built('_digest', self._build_digest)
+        return digest
+
+    def _build_digest(self) -> str:
+        hasher = hashlib.sha1()
+        for item_name, garbage_type, reason in self.iter_rules():
+            hasher.update(f"{item_name}\0{garbage_type}\0{reason}\n".encode('utf-8'))
+        return hasher.hexdigest()
+
+    def derive(self, rules: Dict[str, Tuple[str, str]]) -> 'RuleSnapshot':
+        """
+        基于完整规则字典创建下一版本快照（重新加载时），名称集合与顺序不变时复用规范化名称和索引
+
+        Args:
+            rules: {物品名称: (垃圾类型, 分类依据)}
+
+        Returns:
+            新快照
+        """
+        snapshot = RuleSnapshot.build(rules, self.version + 1, self.normalize)
+        if len(snapshot.names) == len(self.names) and snapshot.names == self.names:
+            self._share_name_state(snapshot)
+        else:
+            self._pass_keys(snapshot)
+        return snapshot
+
+    def apply(self, changes: Iterable[Tuple[str, Optional[Tuple[str, str]]]]) -> 'RuleSnapshot':
+        """
+        创建应用了一组变更的下一版本快照（调用方需持有写锁）
+
+        Changes follow dict semantics: updating a rule keeps its position, new
+        names are appended, and a deleted name that is added again moves to the end.
+
+        Args:
+            changes: (物品名称, (垃圾类型, 分类依据) 或 None 表示删除) 序列
+
+        Returns:
+            新快照
+        """
+        types, reasons = self.types, self.reasons
+        names, positions = self.names, self.positions
+        type_ids = array(self._type_ids.typecode, self._type_ids)
+        reason_ids = array(self._reason_ids.typecode, self._reason_ids)
+        counts = dict(self.counts)
+        type_values = types.values
+        resized = False
+        deleted = set()
+
+        for item_name, rule in changes:
+            ordinal = positions.get(item_name)
+            if ordinal is not None:
+                old_type = type_values[type_ids[ordinal]]
+                counts[old_type] -= 1
+                if not counts[old_type]:
+                    del counts[old_type]
+
+            if not resized and (rule is None or ordinal is None):
+                # Copy on the first structural change; pure updates share the name list
+                names, positions = list(names), dict(positions)
+                resized = True
+
+            if rule is None:
+                if ordinal is not None:
+                    del positions[item_name]
+                    deleted.add(ordinal)
+                continue
+
+            garbage_type, reason = rule
+            type_id, reason_id = types.intern(garbage_type), reasons.intern(reason)
+            if type_id > _SHORT_ID_LIMIT and type_ids.typecode == 'H':
+                type_ids = array('I', type_ids)
+            if reason_id > _SHORT_ID_LIMIT and reason_ids.typecode == 'H':
+                reason_ids = array('I', reason_ids)
+
+            if ordinal is None:
+                positions[item_name] = len(names)
+                names.append(item_name)
+                type_ids.append(type_id)
+                reason_ids.append(reason_id)
+            else:
+                type_ids[ordinal] = type_id
+                reason_ids[ordinal] = reason_id
+            counts[garbage_type] = counts.get(garbage_type, 0) + 1
+
+        if deleted:
+            kept = [ordinal for ordinal in range(len(names)) if ordinal not in deleted]
+            names = [names[ordinal] for ordinal in kept]
+            type_ids = array(type_ids.typecode, [type_ids[ordinal] for ordinal in kept])
+            reason_ids = array(reason_ids.typecode, [reason_ids[ordinal] for ordinal in kept])
+            positions = None
+
+        snapshot = RuleSnapshot(names, type_ids, reason_ids, types, reasons, self.version + 1,
+                                counts=counts, normalize=self.normalize)
+        snapshot._positions = positions
+        if names is self.names:
+            self._share_name_state(snapshot)
+        elif not deleted and self._keys is not None:
+            self._extend_name_state(snapshot)
+        else:
+            self._pass_keys(snapshot)
+        return snapshot
+
+    def _share_name_state(self, snapshot: 'RuleSnapshot') -> None:
+        """Hand name-derived state to a successor with the same names in the same order"""
+        snapshot.names = self.names
+        snapshot._positions = self._positions
+        snapshot._keys = self._keys
+        snapshot._key_source = self._key_source
+        snapshot._lookup = self._lookup
+        snapshot._index = self._index
+        snapshot._similarity_index = self._similarity_index
+
+    def _extend_name_state(self, snapshot: 'RuleSnapshot') -> None:
+        """Extend keys and whichever indexes are built for a successor that only appended names"""
+        start = len(self.names)
+        added = [self.normalize(name) for name in snapshot.names[start:]]
+        snapshot._keys = self._keys + added
+        if self._lookup is not None:
+            lookup = dict(self._lookup)
+            for ordinal, key in enumerate(added, start):
+                lookup.setdefault(key, ordinal)
+            snapshot._lookup = lookup
+        if self._index is not None:
+            snapshot._index = self._index.extended(added)
+        if self._similarity_index is not None:
+            snapshot._similarity_index = self._similarity_index.extended(added)
+
+    def _pass_keys(self, snapshot: 'RuleSnapshot') -> None:
+        """Let a successor with different names reuse already normalized keys"""
+        if self._keys is not None:
+            snapshot._key_source = (self.names, self._keys)
+        else:
+            snapshot._key_source = self._key_source
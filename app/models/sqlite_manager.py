@@ -0,0 +1,594 @@
+"""
+垃圾分类系统 - SQLite 规则存储模块
+WAL 模式的 SQLite 规则库，多进程共享同一份一致的规则数据
+"""
+
+import csv
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional
+
+from .metrics import MATCH_TOTAL, timed
+from .normalizer import QueryNormalizer, default_normalizer
+from .text_index import SimilarityIndex
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    item_name TEXT NOT NULL UNIQUE,
+    garbage_type TEXT NOT NULL,
+    reason TEXT NOT NULL,
+    name_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_rules_type ON rules(garbage_type);
+CREATE INDEX IF NOT EXISTS idx_rules_type_name ON rules(garbage_type, item_name);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta(key, value) VALUES ('version', 0);
+CREATE TABLE IF NOT EXISTS type_counts (
+    garbage_type TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+# Trigger-maintained per-type counts. Recreated in one transaction on startup so that
+# databases with the earlier INSERT OR IGNORE triggers (which abort under an UPSERT
+# that changes a rule's type) are upgraded without a window where no trigger runs.
+TYPE_COUNT_TRIGGERS = """
+BEGIN IMMEDIATE;
+DROP TRIGGER IF EXISTS type_counts_insert;
+DROP TRIGGER IF EXISTS type_counts_delete;
+DROP TRIGGER IF EXISTS type_counts_update;
+CREATE TRIGGER type_counts_insert AFTER INSERT ON rules BEGIN
+    INSERT INTO type_counts(garbage_type, count) VALUES (new.garbage_type, 1)
+    ON CONFLICT(garbage_type) DO UPDATE SET count = count + 1;
+END;
+CREATE TRIGGER type_counts_delete AFTER DELETE ON rules BEGIN
+    UPDATE type_counts SET count = count - 1 WHERE garbage_type = old.garbage_type;
+    DELETE FROM type_counts WHERE garbage_type = old.garbage_type AND count <= 0;
+END;
+CREATE TRIGGER type_counts_update AFTER UPDATE OF garbage_type ON rules
+WHEN new.garbage_type != old.garbage_type BEGIN
+    UPDATE type_counts SET count = count - 1 WHERE garbage_type = old.garbage_type;
+    DELETE FROM type_counts WHERE garbage_type = old.garbage_type AND count <= 0;
+    INSERT INTO type_counts(garbage_type, count) VALUES (new.garbage_type, 1)
+    ON CONFLICT(garbage_type) DO UPDATE SET count = count + 1;
+END;
+COMMIT;
+"""
+
+# FTS5 trigram index over normalized item names, kept in sync by triggers (SQLite >= 3.34).
+# Replaces the earlier rules_fts index over raw item names.
+FTS_SCHEMA = """
+DROP TRIGGER IF EXISTS rules_fts_insert;
+DROP TRIGGER IF EXISTS rules_fts_delete;
+DROP TRIGGER IF EXISTS rules_fts_update;
+DROP TABLE IF EXISTS rules_fts;
+CREATE VIRTUAL TABLE IF NOT EXISTS rules_key_fts USING fts5(
+    name_key, content='rules', content_rowid='id', tokenize='trigram case_sensitive 1'
+);
+CREATE TRIGGER IF NOT EXISTS rules_key_fts_insert AFTER INSERT ON rules BEGIN
+    INSERT INTO rules_key_fts(rowid, name_key) VALUES (new.id, new.name_key);
+END;
+CREATE TRIGGER IF NOT EXISTS rules_key_fts_delete AFTER DELETE ON rules BEGIN
+    INSERT INTO rules_key_fts(rules_key_fts, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+END;
+CREATE TRIGGER IF NOT EXISTS rules_key_fts_update AFTER UPDATE OF name_key ON rules BEGIN
+    INSERT INTO rules_key_fts(rules_key_fts, rowid, name_key) VALUES ('delete', old.id, old.name_key);
+    INSERT INTO rules_key_fts(rowid, name_key) VALUES (new.id, new.name_key);
+END;
+"""
+
+UPSERT_RULE = (
+    'INSERT INTO rules(item_name, garbage_type, reason, name_key) VALUES (?, ?, ?, ?) '
+    'ON CONFLICT(item_name) DO UPDATE SET '
+    'garbage_type = excluded.garbage_type, reason = excluded.reason'
+)
+
+
+class SQLiteDataManager:
+    """SQLite 垃圾分类数据管理器（与 GarbageDataManager 接口一致）"""
+
+    storage_mode = 'sqlite'
+
+    def __init__(self, db_file: str = None, csv_file: str = None, normalizer: QueryNormalizer = None):
+        """
+        初始化数据管理器
+
+        Args:
+            db_file: SQLite数据库路径，如果为None则从配置读取
+            csv_file: CSV文件路径，数据库为空时从中导入规则，save_rules 导出到此文件
+            normalizer: 查询与物品名称的规范化器，为None时使用默认规范化器
+        """
+        if db_file is None or csv_file is None:
+            from flask import current_app
+            db_file = db_file or current_app.config['RULES_DB_FILE']
+            csv_file = csv_file or current_app.config['DATA_FILE']
+
+        self.db_file = db_file
+        self.csv_file = csv_file
+        self.normalizer = normalizer or default_normalizer()
+
+        # One connection per thread (and per process after fork)
+        self._local = threading.local()
+
+        self.fts_enabled = False
+        # (stored names, SimilarityIndex over their normalized keys) for _similarity_version
+        self._similarity_index = None
+        self._similarity_version = None
+
+        self._init_schema()
+        self.load_rules()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _init_schema(self) -> None:
+        """Create tables, indexes and (when supported) the FTS5 trigram index"""
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.executescript(TYPE_COUNT_TRIGGERS)
+
+        # Databases predating normalized names get the column; keys are filled in by load_rules
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(rules)')]
+        if 'name_key' not in columns:
+            conn.execute('ALTER TABLE rules ADD COLUMN name_key TEXT')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_rules_name_key ON rules(name_key)')
+
+        fts_exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'rules_key_fts'"
+        ).fetchone() is not None
+        try:
+            conn.executescript(FTS_SCHEMA)
+            if not fts_exists:
+                conn.execute("INSERT INTO rules_key_fts(rules_key_fts) VALUES ('rebuild')")
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"警告: SQLite 不支持 FTS5 trigram ({e})，模糊匹配将使用全表扫描")
+
+    def _refresh_name_keys(self) -> None:
+        """Fill in missing normalized names, or recompute all of them when the normalizer changed"""
+        conn = self._connect()
+        row = conn.execute("SELECT value FROM meta WHERE key = 'name_key_format'").fetchone()
+        signature = self.normalizer.signature
+        condition = '' if row is None or row[0] != signature else 'WHERE name_key IS NULL'
+
+        rows = conn.execute(f'SELECT id, item_name FROM rules {condition}').fetchall()
+        if not rows and row is not None and row[0] == signature:
+            return
+
+        normalize = self.normalizer
+        with self._transaction() as tx:
+            tx.executemany(
+                'UPDATE rules SET name_key = ? WHERE id = ?',
+                [(normalize(item_name), rule_id) for rule_id, item_name in rows]
+            )
+            tx.execute(
+                "INSERT INTO meta(key, value) VALUES ('name_key_format', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (signature,)
+            )
+        if rows:
+            print(f"已规范化 {len(rows)} 条规则名称")
+
+    def load_rules(self) -> None:
+        """数据库为空时从CSV文件导入垃圾分类规则，并重建分类计数"""
+        try:
+            conn = self._connect()
+
+            # Counters are trigger-maintained; rebuild in case of databases predating them
+            with self._transaction() as tx:
+                tx.execute('DELETE FROM type_counts')
+                tx.execute(
+                    'INSERT INTO type_counts(garbage_type, count) '
+                    'SELECT garbage_type, COUNT(*) FROM rules GROUP BY garbage_type ORDER BY MIN(id)'
+                )
+            self._refresh_name_keys()
+            count = conn.execute('SELECT COUNT(*) FROM rules').fetchone()[0]
+            if count == 0 and self.csv_file and os.path.exists(self.csv_file):
+                rows = []
+                with open(self.csv_file, 'r', encoding='utf-8') as file:
+                    reader = csv.DictReader(file)
+                    for row in reader:
+                        item_name = row['物品名称'].strip()
+                        rows.append((
+                            item_name,
+                            row['垃圾类型'].strip(),
+                            row['分类依据'].strip(),
+                            self.normalizer(item_name)
+                        ))
+
+                with self._transaction() as tx:
+                    tx.executemany(UPSERT_RULE, rows)
+                    self._bump_version(tx)
+                count = conn.execute('SELECT COUNT(*) FROM rules').fetchone()[0]
+                print(f"已从 {self.csv_file} 导入规则到 {self.db_file}")
+
+            print(f"成功加载 {count} 条垃圾分类规则")
+
+        except Exception as e:
+            print(f"加载规则时出错: {e}")
+
+    @contextmanager
+    def _transaction(self):
+        """Immediate (write-locked) transaction on this thread's connection"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+
+    @property
+    def version(self) -> int:
+        """规则版本号，任一进程修改规则后递增"""
+        row = self._connect().execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        return row[0] if row else 0
+
+    @property
+    def revision(self) -> str:
+        """规则内容标识，多进程间一致（用于 HTTP ETag）"""
+        return str(self.version)
+
+    def save_rules(self) -> bool:
+        """将规则导出到CSV文件（写临时文件后原子替换）"""
+        tmp_file = f"{self.csv_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            rules = self._connect().execute(
+                'SELECT item_name, garbage_type, reason FROM rules ORDER BY id'
+            ).fetchall()
+            with open(tmp_file, 'w', newline='', encoding='utf-8') as file:
+                writer = csv.writer(file, lineterminator='\n')
+                writer.writerow(['物品名称', '垃圾类型', '分类依据'])
+                writer.writerows(rules)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_file, self.csv_file)
+            print(f"成功保存 {len(rules)} 条规则到文件")
+            return True
+
+        except Exception as e:
+            print(f"保存规则时出错: {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+            return False
+
+    def get_rule(self, item_name: str) -> Optional[Dict[str, str]]:
+        """
+        按名称精确获取规则
+
+        Args:
+            item_name: 物品名称
+
+        Returns:
+            {'type': 垃圾类型, 'reason': 分类依据} 或 None
+        """
+        row = self._connect().execute(
+            'SELECT garbage_type, reason FROM rules WHERE item_name = ?', (item_name.strip(),)
+        ).fetchone()
+        return {'type': row[0], 'reason': row[1]} if row else None
+
+    def get_rules(self, keys: Iterable[str]) -> Dict[str, Tuple[str, str]]:
+        """
+        按规范化名称批量精确获取规则
+
+        Args:
+            keys: 经 normalizer 规范化的物品名称
+
+        Returns:
+            {规范化名称: (垃圾类型, 分类依据)}，不含未找到的名称
+        """
+        keys = list(keys)
+        conn = self._connect()
+        rules = {}
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            # Newest first, so the earliest rule sharing a key is written last and wins
+            rows = conn.execute(
+                f"SELECT name_key, garbage_type, reason FROM rules WHERE name_key IN ({','.join('?' * len(chunk))}) "
+                f"ORDER BY id DESC",
+                chunk
+            )
+            for key, garbage_type, reason in rows:
+                rules[key] = (garbage_type, reason)
+        return rules
+
+    @timed('get_classification')
+    def get_classification(self, item_name: str, normalized: bool = False) -> Optional[Tuple[str, str]]:
+        """
+        获取物品的垃圾分类信息
+
+        Args:
+            item_name: 物品名称
+            normalized: item_name 是否已经过 normalizer 规范化
+
+        Returns:
+            元组(垃圾类型, 分类依据) 或 None
+        """
+        matched = self.match(item_name if normalized else self.normalizer(item_name))
+        if matched is None:
+            return None
+        path, rule = matched
+        MATCH_TOTAL.inc((path,))
+        return rule
+
+    def match(self, key: str) -> Optional[Tuple[str, Tuple[str, str]]]:
+        """
+        匹配规范化名称（不记录指标）
+
+        Args:
+            key: 经 normalizer 规范化的物品名称
+
+        Returns:
+            (匹配方式 'exact' 或 'fuzzy', (垃圾类型, 分类依据)) 或 None
+        """
+        if not key:
+            return None
+        conn = self._connect()
+
+        # Exact match on the normalized name (earliest rule when several share it)
+        row = conn.execute(
+            'SELECT garbage_type, reason FROM rules WHERE name_key = ? ORDER BY id LIMIT 1', (key,)
+        ).fetchone()
+        if row:
+            return 'exact', (row[0], row[1])
+
+        # Fuzzy match - earliest rule whose name contains or is contained in the query
+        candidates = []
+
+        # Stored name contained in query: look up every substring through the unique index
+        substrings = list({key[i:j] for i in range(len(key)) for j in range(i + 1, len(key) + 1)})
+        for start in range(0, len(substrings), 500):
+            chunk = substrings[start:start + 500]
+            row = conn.execute(
+                f"SELECT MIN(id) FROM rules WHERE name_key IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchone()
+            if row and row[0] is not None:
+                candidates.append(row[0])
+
+        # Query contained in stored name: trigram index for 3+ chars, substring scan otherwise
+        if self.fts_enabled and len(key) >= 3:
+            row = conn.execute(
+                'SELECT MIN(rowid) FROM rules_key_fts WHERE rules_key_fts MATCH ?',
+                ('"' + key.replace('"', '""') + '"',)
+            ).fetchone()
+        else:
+            row = conn.execute(
+                'SELECT MIN(id) FROM rules WHERE instr(name_key, ?) > 0', (key,)
+            ).fetchone()
+        if row and row[0] is not None:
+            candidates.append(row[0])
+
+        if not candidates:
+            return None
+
+        row = conn.execute(
+            'SELECT item_name, garbage_type, reason FROM rules WHERE id = ?', (min(candidates),)
+        ).fetchone()
+        if not row:
+            return None
+        stored_name, garbage_type, reason = row
+        return 'fuzzy', (garbage_type, f"根据相似物品'{stored_name}'分类：{reason}")
+
+    def matcher(self) -> Callable[[str], Optional[Tuple[str, Tuple[str, str]]]]:
+        """
+        供 fork 出的工作进程使用的 match 函数
+
+        Connections are opened per process, so a worker never shares the
+        parent's connection or waits on its locks.
+
+        Returns:
+            与 match 相同签名的函数
+        """
+        return self.match
+
+    def find_similar(self, item_name: str, limit: int = 5, normalized: bool = False) -> List[Tuple[str, float]]:
+        """
+        查找名称相似的物品
+
+        Args:
+            item_name: 物品名称
+            limit: 返回数量
+            normalized: item_name 是否已经过 normalizer 规范化
+
+        Returns:
+            [(物品名称, 相似度), ...]，按相似度降序排列
+        """
+        version = self.version
+        cached = self._similarity_index
+        if cached is None or self._similarity_version != version:
+            rows = self._connect().execute('SELECT item_name, name_key FROM rules ORDER BY id').fetchall()
+            # Index over normalized names; ordinals map back to stored names
+            cached = ([name for name, _ in rows], SimilarityIndex(key or '' for _, key in rows))
+            self._similarity_index = cached
+            self._similarity_version = version
+        names, index = cached
+        key = item_name if normalized else self.normalizer(item_name)
+        return [(names[ordinal], score) for ordinal, score in index.top_k(key, limit)]
+
+    def add_rule(self, item_name: str, garbage_type: str, reason: str) -> bool:
+        """
+        添加新的分类规则
+
+        Args:
+            item_name: 物品名称
+            garbage_type: 垃圾类型
+            reason: 分类依据
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            item_name = item_name.strip()
+            garbage_type = garbage_type.strip()
+            reason = reason.strip()
+
+            if not all([item_name, garbage_type, reason]):
+                return False
+
+            with self._transaction() as tx:
+                tx.execute(UPSERT_RULE, (item_name, garbage_type, reason, self.normalizer(item_name)))
+                self._bump_version(tx)
+            return True
+
+        except Exception as e:
+            print(f"添加规则时出错: {e}")
+            return False
+
+    def update_rule(self, item_name: str, garbage_type: str, reason: str) -> bool:
+        """
+        更新现有规则
+
+        Args:
+            item_name: 物品名称
+            garbage_type: 垃圾类型
+            reason: 分类依据
+
+        Returns:
+            操作是否成功
+        """
+        return self.add_rule(item_name, garbage_type, reason)
+
+    def delete_rule(self, item_name: str) -> bool:
+        """
+        删除规则
+
+        Args:
+            item_name: 物品名称
+
+        Returns:
+            操作是否成功
+        """
+        try:
+            item_name = item_name.strip()
+            with self._transaction() as tx:
+                deleted = tx.execute('DELETE FROM rules WHERE item_name = ?', (item_name,)).rowcount
+                if deleted:
+                    self._bump_version(tx)
+            return deleted > 0
+
+        except Exception as e:
+            print(f"删除规则时出错: {e}")
+            return False
+
+    def import_rules(self, rules: Iterable[Tuple[str, str, str]]) -> int:
+        """
+        批量添加或更新规则，在单个事务内写入
+
+        Args:
+            rules: (物品名称, 垃圾类型, 分类依据) 序列，调用方负责校验；同名规则后者覆盖前者
+
+        Returns:
+            写入的不同物品名称数（重复名称只计一次），失败返回 -1
+        """
+        try:
+            normalize = self.normalizer
+            latest = {item_name.strip(): (garbage_type.strip(), reason.strip())
+                      for item_name, garbage_type, reason in rules}
+            if not latest:
+                return 0
+
+            with self._transaction() as tx:
+                tx.executemany(UPSERT_RULE, [(item_name, garbage_type, reason, normalize(item_name))
+                                             for item_name, (garbage_type, reason) in latest.items()])
+                self._bump_version(tx)
+            return len(latest)
+
+        except Exception as e:
+            print(f"批量导入规则时出错: {e}")
+            return -1
+
+    def iter_rules(self) -> Iterator[Tuple[str, str, str]]:
+        """
+        按存储顺序逐条遍历规则（在一个读事务内，遍历期间的变更不影响本次结果）
+
+        Yields:
+            (物品名称, 垃圾类型, 分类依据)
+        """
+        # Dedicated connection: the generator may be consumed on another thread
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None, check_same_thread=False)
+        try:
+            conn.execute('BEGIN')
+            cursor = conn.execute('SELECT item_name, garbage_type, reason FROM rules ORDER BY id')
+            while True:
+                rows = cursor.fetchmany(1000)
+                if not rows:
+                    break
+                yield from rows
+            conn.execute('COMMIT')
+        finally:
+            conn.close()
+
+    def list_rules(self, garbage_type: str = None, prefix: str = '', after: str = None,
+                   offset: int = 0, limit: int = 50) -> Tuple[List[Tuple[str, str, str]], int]:
+        """
+        按名称排序分页查询规则
+
+        Args:
+            garbage_type: 只返回该类型的规则
+            prefix: 物品名称前缀
+            after: 游标，只返回名称排在其后的规则
+            offset: 在游标之后再跳过的条数
+            limit: 返回条数
+
+        Returns:
+            ([(物品名称, 垃圾类型, 分类依据), ...], 符合筛选条件的规则总数)
+        """
+        # Prefix as a range on the (garbage_type, item_name) / item_name indexes
+        conditions = []
+        params = []
+        if garbage_type is not None:
+            conditions.append('garbage_type = ?')
+            params.append(garbage_type)
+        if prefix:
+            conditions.append('item_name >= ? AND item_name < ?')
+            params += [prefix, prefix + '\U0010ffff']
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+        conn = self._connect()
+        total = conn.execute(f'SELECT COUNT(*) FROM rules {where}', params).fetchone()[0]
+
+        if after is not None:
+            conditions.append('item_name > ?')
+            params.append(after)
+            where = f"WHERE {' AND '.join(conditions)}"
+        rows = conn.execute(
+            f'SELECT item_name, garbage_type, reason FROM rules {where} '
+            f'ORDER BY item_name LIMIT ? OFFSET ?',
+            params + [max(0, limit), max(0, offset)]
+        ).fetchall()
+        return rows, total
+
+    def get_all_rules(self) -> Dict[str, Dict[str, str]]:
+        """获取所有规则"""
+        rows = self._connect().execute(
+            'SELECT item_name, garbage_type, reason FROM rules ORDER BY id'
+        ).fetchall()
+        return {item_name: {'type': garbage_type, 'reason': reason} for item_name, garbage_type, reason in rows}
+
+    def get_statistics(self) -> Dict[str, int]:
+        """获取分类统计信息（由触发器增量维护）"""
+        rows = self._connect().execute(
+            'SELECT garbage_type, count FROM type_counts ORDER BY rowid'
+        ).fetchall()
+        return {garbage_type: count for garbage_type, count in rows}
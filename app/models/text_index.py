@@ -0,0 +1,348 @@
+"""
+垃圾分类系统 - 文本索引模块
+为规则名称提供预构建的子串索引，避免模糊匹配时全表扫描
+"""
+
+import math
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+
+class SubstringIndex:
+    """物品名称子串索引（字符 n-gram 倒排索引）"""
+
+    def __init__(self, names: Iterable[str]):
+        """
+        构建索引
+
+        Args:
+            names: 按规则顺序排列的物品名称
+        """
+        self.names: List[str] = list(names)
+
+        # Name -> ordinal, for "query contains stored name" lookups
+        self._positions: Dict[str, int] = {}
+
+        # Unigram/bigram -> ascending ordinals, for "stored name contains query"
+        self._postings: Dict[str, List[int]] = {}
+
+        self._max_length = 0
+
+        for ordinal, name in enumerate(self.names):
+            self._positions.setdefault(name, ordinal)
+            self._max_length = max(self._max_length, len(name))
+            for gram in set(self._grams(name)):
+                self._postings.setdefault(gram, []).append(ordinal)
+
+    @staticmethod
+    def _grams(text: str) -> List[str]:
+        """Unigrams and bigrams of text"""
+        return list(text) + [text[i:i + 2] for i in range(len(text) - 1)]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def extended(self, names: Iterable[str]) -> 'SubstringIndex':
+        """
+        在末尾追加名称后的新索引（本索引不变）
+
+        Posting lists of grams the new names do not contain are shared with
+        this index, so appending a few names costs far less than a rebuild.
+
+        Args:
+            names: 追加的名称，序号接在现有名称之后
+
+        Returns:
+            新索引，与用全部名称重新构建的结果一致
+        """
+        index = SubstringIndex.__new__(SubstringIndex)
+        index.names = self.names + list(names)
+        index._positions = dict(self._positions)
+        index._postings = dict(self._postings)
+        index._max_length = self._max_length
+
+        copied = set()
+        for ordinal in range(len(self.names), len(index.names)):
+            name = index.names[ordinal]
+            index._positions.setdefault(name, ordinal)
+            index._max_length = max(index._max_length, len(name))
+            for gram in set(self._grams(name)):
+                if gram not in copied:
+                    index._postings[gram] = list(index._postings.get(gram, ()))
+                    copied.add(gram)
+                index._postings[gram].append(ordinal)
+        return index
+
+    def find_first(self, query: str) -> Optional[int]:
+        """
+        查找第一个满足 query in name 或 name in query 的名称
+
+        Args:
+            query: 查询字符串
+
+        Returns:
+            名称序号，与按顺序逐条比较的结果一致；无匹配返回 None
+        """
+        if not self.names:
+            return None
+        if not query:
+            return 0
+
+        best = self._first_contained_in(query)
+        candidate = self._first_containing(query, best)
+        if candidate is not None:
+            best = candidate
+        return best
+
+    def _first_contained_in(self, query: str) -> Optional[int]:
+        """Smallest ordinal of a stored name that is a substring of query"""
+        best = None
+        length = len(query)
+        for start in range(length):
+            stop_limit = min(length, start + self._max_length)
+            for stop in range(start + 1, stop_limit + 1):
+                ordinal = self._positions.get(query[start:stop])
+                if ordinal is not None and (best is None or ordinal < best):
+                    best = ordinal
+        return best
+
+    def _first_containing(self, query: str, bound: Optional[int]) -> Optional[int]:
+        """Smallest ordinal (below bound) of a stored name that contains query"""
+        if len(query) > self._max_length:
+            return None
+
+        # Pick the rarest gram of the query; every match must appear in its postings
+        postings = None
+        grams = list(query) if len(query) == 1 else [query[i:i + 2] for i in range(len(query) - 1)]
+        for gram in grams:
+            gram_postings = self._postings.get(gram)
+            if gram_postings is None:
+                return None
+            if postings is None or len(gram_postings) < len(postings):
+                postings = gram_postings
+
+        for ordinal in postings:
+            if bound is not None and ordinal >= bound:
+                break
+            if query in self.names[ordinal]:
+                return ordinal
+        return None
+
+
+class KeywordMatcher:
+    """多模式关键词匹配器（Aho–Corasick 自动机）"""
+
+    def __init__(self, keywords: Iterable[str]):
+        """
+        编译关键词自动机
+
+        Args:
+            keywords: 按优先级排列的关键词，序号越小优先级越高
+        """
+        self.keywords: List[str] = []
+
+        # Trie transitions, failure links and best (lowest) keyword ordinal per state
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._best: List[Optional[int]] = [None]
+
+        for keyword in keywords:
+            self._add(keyword)
+        self._build()
+
+    def _add(self, keyword: str) -> None:
+        ordinal = len(self.keywords)
+        self.keywords.append(keyword)
+
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._best.append(None)
+            state = next_state
+
+        if self._best[state] is None or ordinal < self._best[state]:
+            self._best[state] = ordinal
+
+    def _build(self) -> None:
+        """Compute failure links breadth-first and fold outputs along them"""
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+
+                inherited = self._best[self._fail[child]]
+                if inherited is not None and (self._best[child] is None or inherited < self._best[child]):
+                    self._best[child] = inherited
+
+    def __len__(self) -> int:
+        return len(self.keywords)
+
+    def best_match(self, text: str) -> Optional[int]:
+        """
+        单次扫描文本，返回出现在文本中的优先级最高的关键词序号
+
+        Args:
+            text: 待匹配文本
+
+        Returns:
+            关键词序号，无匹配返回 None
+        """
+        goto = self._goto
+        fail = self._fail
+        best_by_state = self._best
+        best = best_by_state[0]
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = best_by_state[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break
+        return best
+
+
+class SimilarityIndex:
+    """物品名称相似度索引（字符 n-gram TF-IDF 余弦相似度）"""
+
+    def __init__(self, names: Iterable[str]):
+        """
+        构建索引
+
+        Args:
+            names: 按规则顺序排列的物品名称
+        """
+        self.names: List[str] = list(names)
+        count = len(self.names)
+
+        postings: Dict[str, List[int]] = {}
+        for ordinal, name in enumerate(self.names):
+            for gram in self._features(name):
+                postings.setdefault(gram, []).append(ordinal)
+
+        # Smoothed IDF; grams unseen at build time get the maximum weight
+        self._unseen_idf = math.log(count + 1) + 1.0
+        self._idf: Dict[str, float] = {
+            gram: math.log((count + 1) / (len(ordinals) + 1)) + 1.0
+            for gram, ordinals in postings.items()
+        }
+        self._postings: Dict[str, np.ndarray] = {
+            gram: np.asarray(ordinals, dtype=np.int32)
+            for gram, ordinals in postings.items()
+        }
+
+        # Each gram appears at most once per posting list, so fancy-index adds are safe
+        norms = np.zeros(count, dtype=np.float64)
+        for gram, ordinals in self._postings.items():
+            norms[ordinals] += self._idf[gram] ** 2
+        norms[norms == 0] = 1.0
+        self._inv_norms = (1.0 / np.sqrt(norms)).astype(np.float32)
+
+    @staticmethod
+    def _features(text: str) -> Set[str]:
+        """Alphanumeric unigrams and bigrams of lowercased text"""
+        text = text.lower()
+        features = {char for char in text if char.isalnum()}
+        for i in range(len(text) - 1):
+            bigram = text[i:i + 2]
+            if bigram.isalnum():
+                features.add(bigram)
+        return features
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def extended(self, names: Iterable[str]) -> 'SimilarityIndex':
+        """
+        在末尾追加名称后的新索引（本索引不变）
+
+        IDF weights stay those of the last full build: grams new to the index
+        get the unseen-gram weight, which queries already gave them. Scores of
+        existing names are unchanged; rebuild to refresh the weights.
+
+        Args:
+            names: 追加的名称，序号接在现有名称之后
+
+        Returns:
+            新索引
+        """
+        start = len(self.names)
+        index = SimilarityIndex.__new__(SimilarityIndex)
+        index.names = self.names + list(names)
+        index._unseen_idf = self._unseen_idf
+        index._idf = dict(self._idf)
+        index._postings = dict(self._postings)
+
+        additions: Dict[str, List[int]] = {}
+        for ordinal in range(start, len(index.names)):
+            for gram in self._features(index.names[ordinal]):
+                additions.setdefault(gram, []).append(ordinal)
+
+        norms = np.zeros(len(index.names) - start, dtype=np.float64)
+        for gram, ordinals in additions.items():
+            weight = index._idf.setdefault(gram, self._unseen_idf)
+            ordinals = np.asarray(ordinals, dtype=np.int32)
+            existing = index._postings.get(gram)
+            index._postings[gram] = ordinals if existing is None else np.concatenate((existing, ordinals))
+            norms[ordinals - start] += weight ** 2
+        norms[norms == 0] = 1.0
+        index._inv_norms = np.concatenate((self._inv_norms, (1.0 / np.sqrt(norms)).astype(np.float32)))
+        return index
+
+    def top_k(self, query: str, limit: int = 5) -> List[Tuple[int, float]]:
+        """
+        按余弦相似度返回最相似的名称
+
+        Args:
+            query: 查询字符串
+            limit: 返回数量
+
+        Returns:
+            [(名称序号, 相似度), ...]，按相似度降序、序号升序排列
+        """
+        features = self._features(query)
+        if not features or limit <= 0 or not self.names:
+            return []
+
+        scores = np.zeros(len(self.names), dtype=np.float32)
+        query_norm = 0.0
+        for gram in features:
+            weight = self._idf.get(gram)
+            if weight is None:
+                query_norm += self._unseen_idf ** 2
+                continue
+            query_norm += weight * weight
+            scores[self._postings[gram]] += weight * weight
+
+        candidates = np.flatnonzero(scores)
+        if candidates.size == 0:
+            return []
+
+        candidate_scores = scores[candidates] * self._inv_norms[candidates] / math.sqrt(query_norm)
+        np.minimum(candidate_scores, 1.0, out=candidate_scores)
+        if candidates.size > limit:
+            # argpartition picks arbitrarily among names tied at the cut, so keep
+            # every name scoring at least the limit-th best and let lexsort decide
+            cutoff = -np.partition(-candidate_scores, limit - 1)[limit - 1]
+            keep = candidate_scores >= cutoff
+            candidates = candidates[keep]
+            candidate_scores = candidate_scores[keep]
+
+        order = np.lexsort((candidates, -candidate_scores))[:limit]
+        return [(int(candidates[i]), float(candidate_scores[i])) for i in order]
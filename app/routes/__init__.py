@@ -16,9 +16,9 @@ def register_routes(app, api):
         api: Flask-RESTful API实例
     """
     from .api import (
-        ClassifyAPI, BatchClassifyAPI, RulesAPI, 
+        ClassifyAPI, BatchClassifyAPI, RulesAPI, RulesBulkAPI,
         StatisticsAPI, SimilarItemsAPI, 
-        ImageClassifyAPI, ImageStatusAPI
+        ImageClassifyAPI, BatchImageClassifyAPI, ImageStatusAPI
     )
     from .main import register_main_routes
     
@@ -26,9 +26,11 @@ def register_routes(app, api):
     api.add_resource(ClassifyAPI, '/api/classify')
     api.add_resource(BatchClassifyAPI, '/api/batch-classify')
     api.add_resource(RulesAPI, '/api/rules')
+    api.add_resource(RulesBulkAPI, '/api/rules/bulk')
     api.add_resource(StatisticsAPI, '/api/statistics')
     api.add_resource(SimilarItemsAPI, '/api/similar-items')
     api.add_resource(ImageClassifyAPI, '/api/classify-image')
+    api.add_resource(BatchImageClassifyAPI, '/api/batch-classify-image')
     api.add_resource(ImageStatusAPI, '/api/image-status')
     
     # Register main routes
@@ -3,17 +3,24 @@ API路由
 所有RESTful API接口定义
 """
 
-from flask import request
+from flask import request, current_app, Response, stream_with_context
 from flask_restful import Resource
 from datetime import datetime
+import csv
+import io
+import json
 import logging
+import zipfile
 
-from app.models import GarbageDataManager, GarbageClassifier
+from app.models import GarbageClassifier, QueryNormalizer, create_data_manager
+from app.models.metrics import span
 from app.services import ImageGarbageClassifier, IMAGE_CLASSIFIER_AVAILABLE
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+VALID_GARBAGE_TYPES = ['可回收垃圾', '有害垃圾', '厨余垃圾', '其他垃圾']
+
 # Initialize data manager and classifier (singleton pattern)
 data_manager = None
 classifier = None
@@ -24,7 +31,15 @@ def get_data_manager():
     """Get or create data manager instance"""
     global data_manager
     if data_manager is None:
-        data_manager = GarbageDataManager()
+        data_manager = create_data_manager(
+            storage_mode=current_app.config.get('RULES_STORAGE', 'csv'),
+            csv_file=current_app.config['DATA_FILE'],
+            db_file=current_app.config.get('RULES_DB_FILE'),
+            compact_interval=current_app.config.get('RULES_COMPACT_INTERVAL', 30),
+            compact_threshold=current_app.config.get('RULES_COMPACT_THRESHOLD', 1000),
+            reload_interval=current_app.config.get('RULES_RELOAD_INTERVAL', 0),
+            normalizer=QueryNormalizer(current_app.config.get('QUERY_TRADITIONAL_TO_SIMPLIFIED', True))
+        )
     return data_manager
 
 
@@ -32,7 +47,14 @@ def get_classifier():
     """Get or create classifier instance"""
     global classifier
     if classifier is None:
-        classifier = GarbageClassifier(get_data_manager())
+        classifier = GarbageClassifier(
+            get_data_manager(),
+            keyword_file=current_app.config.get('KEYWORD_FILE'),
+            cache_size=current_app.config.get('CLASSIFY_CACHE_SIZE', 0),
+            cache_ttl=current_app.config.get('CLASSIFY_CACHE_TTL', 0),
+            workers=current_app.config.get('CLASSIFY_WORKERS', 0),
+            parallel_min_items=current_app.config.get('CLASSIFY_PARALLEL_MIN_ITEMS', 5000)
+        )
     return classifier
 
 
@@ -40,10 +62,31 @@ def get_image_classifier():
     """Get or create image classifier instance"""
     global image_classifier
     if IMAGE_CLASSIFIER_AVAILABLE and image_classifier is None:
-        image_classifier = ImageGarbageClassifier()
+        image_classifier = ImageGarbageClassifier(
+            cache_dir=current_app.config.get('MODEL_CACHE_DIR'),
+            max_batch_size=current_app.config.get('IMAGE_MAX_BATCH_SIZE', 1),
+            batch_window_ms=current_app.config.get('IMAGE_BATCH_WINDOW_MS', 0),
+            backend=current_app.config.get('IMAGE_BACKEND', 'torch'),
+            result_cache_size=current_app.config.get('IMAGE_CACHE_SIZE', 0),
+            result_cache_ttl=current_app.config.get('IMAGE_CACHE_TTL', 0),
+            result_cache_distance=current_app.config.get('IMAGE_CACHE_HASH_DISTANCE', -1)
+        )
     return image_classifier
 
 
+def start_image_model_preload(app):
+    """
+    Start loading and warming up the image model in the background
+    
+    Args:
+        app: Flask应用实例
+    """
+    with app.app_context():
+        img_clf = get_image_classifier()
+    if img_clf is not None:
+        img_clf.start_background_load(warm_up=True)
+
+
 class ClassifyAPI(Resource):
     """Garbage classification API"""
     
@@ -133,6 +176,56 @@ class ClassifyAPI(Resource):
 class BatchClassifyAPI(Resource):
     """Batch garbage classification API"""
     
+    @staticmethod
+    def _format_result(clf, result):
+        """Format one (item_name, success, garbage_type, reason, suggestion) tuple"""
+        item_name, success, garbage_type, reason, suggestion = result
+        return {
+            'item_name': item_name,
+            'success': success,
+            'garbage_type': garbage_type,
+            'reason': reason,
+            'suggestion': suggestion,
+            'color': clf.get_type_color(garbage_type) if success else '#666666',
+            'icon': clf.get_type_icon(garbage_type) if success else '❓'
+        }
+    
+    def _stream(self, clf, items):
+        """
+        NDJSON response: one result per line as soon as it is classified, then a summary line
+        
+        Headers are already sent when the body starts, so a failure mid-stream
+        ends the body with a {"done": false, "error": ...} line instead of a truncated response.
+        """
+        def generate():
+            processed = 0
+            successful = 0
+            try:
+                for result in clf.iter_batch_classify(items):
+                    line = json.dumps(self._format_result(clf, result), ensure_ascii=False) + '\n'
+                    processed += 1
+                    successful += result[1]
+                    yield line
+            except Exception as e:
+                logger.error(f"批量分类流式输出错误: {e}")
+                yield json.dumps({
+                    'done': False,
+                    'error': f'批量分类失败: {str(e)}',
+                    'processed': processed,
+                    'total': len(items),
+                    'successful': successful,
+                    'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                }, ensure_ascii=False) + '\n'
+                return
+            yield json.dumps({
+                'done': True,
+                'total': len(items),
+                'successful': successful,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }, ensure_ascii=False) + '\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
     def post(self):
         """
         批量垃圾分类识别
@@ -152,9 +245,16 @@ class BatchClassifyAPI(Resource):
                     type: string
                   description: 物品名称列表
                   example: ["电池", "纸箱", "苹果核"]
+          - name: stream
+            in: query
+            type: boolean
+            default: false
+            description: 以 NDJSON 流式返回，每行一个分类结果，最后一行为 {"done": true, ...} 汇总（中途出错时为 {"done": false, "error": ...}）；也可通过 Accept application/x-ndjson 启用
         responses:
           200:
             description: 批量分类成功
+          400:
+            description: 参数错误或物品数量超过上限
         """
         try:
             data = request.get_json()
@@ -162,25 +262,21 @@ class BatchClassifyAPI(Resource):
                 return {'error': '请提供物品列表'}, 400
             
             items = data['items']
-            if not isinstance(items, list):
+            if not isinstance(items, list) or not all(isinstance(item, str) for item in items):
                 return {'error': '物品列表格式错误'}, 400
             
-            # Batch classification
+            max_items = current_app.config.get('BATCH_CLASSIFY_MAX_ITEMS', 10000)
+            if len(items) > max_items:
+                return {'error': f'物品数量超过上限: {max_items}'}, 400
+            
             clf = get_classifier()
-            results = clf.batch_classify(items)
             
-            # Format results
-            formatted_results = []
-            for item_name, success, garbage_type, reason, suggestion in results:
-                formatted_results.append({
-                    'item_name': item_name,
-                    'success': success,
-                    'garbage_type': garbage_type,
-                    'reason': reason,
-                    'suggestion': suggestion,
-                    'color': clf.get_type_color(garbage_type) if success else '#666666',
-                    'icon': clf.get_type_icon(garbage_type) if success else '❓'
-                })
+            if (request.args.get('stream', '').lower() == 'true'
+                    or request.accept_mimetypes.best == 'application/x-ndjson'):
+                return self._stream(clf, items)
+            
+            # Batch classification
+            formatted_results = [self._format_result(clf, result) for result in clf.batch_classify(items)]
             
             return {
                 'results': formatted_results,
@@ -199,34 +295,92 @@ class RulesAPI(Resource):
     
     def get(self):
         """
-        获取所有分类规则
+        分页获取分类规则（按物品名称排序）
         ---
         tags:
           - 规则管理
+        parameters:
+          - name: garbage_type
+            in: query
+            type: string
+            required: false
+            description: 只返回该垃圾类型的规则
+          - name: prefix
+            in: query
+            type: string
+            required: false
+            description: 物品名称前缀
+          - name: cursor
+            in: query
+            type: string
+            required: false
+            description: 上一页返回的 next_cursor
+          - name: offset
+            in: query
+            type: integer
+            default: 0
+            description: 跳过的条数（可与 cursor 同时使用）
+          - name: limit
+            in: query
+            type: integer
+            default: 50
+            description: 每页条数
         responses:
           200:
             description: 获取规则成功
+          304:
+            description: 规则未变化（If-None-Match 与 ETag 相同）
+          400:
+            description: 参数错误
         """
         try:
+            garbage_type = request.args.get('garbage_type') or None
+            prefix = request.args.get('prefix', '').strip()
+            cursor = request.args.get('cursor') or None
+            try:
+                offset = int(request.args.get('offset', 0))
+                limit = int(request.args.get('limit', current_app.config.get('RULES_PAGE_SIZE', 50)))
+            except ValueError:
+                return {'error': 'offset 和 limit 必须是整数'}, 400
+            if offset < 0 or limit < 1:
+                return {'error': 'offset 不能为负数，limit 必须大于0'}, 400
+            limit = min(limit, current_app.config.get('RULES_PAGE_MAX', 500))
+            
+            if garbage_type is not None and garbage_type not in VALID_GARBAGE_TYPES:
+                return {'error': f'垃圾类型必须是: {", ".join(VALID_GARBAGE_TYPES)}'}, 400
+            
+            # The page is fully determined by the query string and the rule revision
             dm = get_data_manager()
+            tag = f'rules-{dm.revision}'
+            headers = {'ETag': f'W/"{tag}"', 'Cache-Control': 'no-cache'}
+            if request.if_none_match.contains_weak(tag):
+                return Response(status=304, headers=headers)
+            
             clf = get_classifier()
-            rules = dm.get_all_rules()
+            rows, total = dm.list_rules(
+                garbage_type=garbage_type, prefix=prefix, after=cursor, offset=offset, limit=limit + 1
+            )
+            has_more = len(rows) > limit
+            rows = rows[:limit]
             
             # Format rules data
             formatted_rules = []
-            for item_name, rule_info in rules.items():
+            for item_name, rule_type, reason in rows:
                 formatted_rules.append({
                     'item_name': item_name,
-                    'garbage_type': rule_info['type'],
-                    'reason': rule_info['reason'],
-                    'color': clf.get_type_color(rule_info['type']),
-                    'icon': clf.get_type_icon(rule_info['type'])
+                    'garbage_type': rule_type,
+                    'reason': reason,
+                    'color': clf.get_type_color(rule_type),
+                    'icon': clf.get_type_icon(rule_type)
                 })
             
             return {
                 'rules': formatted_rules,
-                'total': len(formatted_rules)
-            }
+                'total': total,
+                'count': len(formatted_rules),
+                'limit': limit,
+                'next_cursor': formatted_rules[-1]['item_name'] if has_more else None
+            }, 200, headers
             
         except Exception as e:
             logger.error(f"获取规则错误: {e}")
@@ -275,9 +429,8 @@ class RulesAPI(Resource):
                 return {'error': '所有字段都不能为空'}, 400
             
             # Validate garbage type
-            valid_types = ['可回收垃圾', '有害垃圾', '厨余垃圾', '其他垃圾']
-            if garbage_type not in valid_types:
-                return {'error': f'垃圾类型必须是: {", ".join(valid_types)}'}, 400
+            if garbage_type not in VALID_GARBAGE_TYPES:
+                return {'error': f'垃圾类型必须是: {", ".join(VALID_GARBAGE_TYPES)}'}, 400
             
             # Add rule
             dm = get_data_manager()
@@ -393,6 +546,237 @@ class RulesAPI(Resource):
             return {'error': f'删除规则失败: {str(e)}'}, 500
 
 
+class RulesBulkAPI(Resource):
+    """Bulk rule import/export API"""
+    
+    # Column names accepted on import; the first set matches the rule data file
+    csv_columns = [
+        ('物品名称', '垃圾类型', '分类依据'),
+        ('item_name', 'garbage_type', 'reason')
+    ]
+    max_reported_errors = 1000
+    
+    def _get_format(self, filename=''):
+        """Resolve 'csv' or 'jsonl' from the format argument, file name or content type"""
+        fmt = request.args.get('format', '').lower()
+        if not fmt:
+            content_type = request.mimetype or ''
+            if filename.lower().endswith(('.jsonl', '.ndjson')) or 'ndjson' in content_type or 'jsonl' in content_type:
+                fmt = 'jsonl'
+            else:
+                fmt = 'csv'
+        if fmt not in ('csv', 'jsonl'):
+            raise ValueError(f'不支持的格式: {fmt}，可选 csv 或 jsonl')
+        return fmt
+    
+    @staticmethod
+    def _decode_lines(stream, undecodable):
+        """
+        Decode the upload line by line, so one bad line does not reject the whole file
+        
+        Lines that are not valid UTF-8 come out blank and their numbers are appended to undecodable.
+        """
+        for line_number, line in enumerate(stream, 1):
+            try:
+                yield line.decode('utf-8-sig' if line_number == 1 else 'utf-8')
+            except UnicodeDecodeError:
+                undecodable.append(line_number)
+                yield '\n'
+    
+    def _iter_rows(self, stream, fmt):
+        """
+        Parse the uploaded body line by line
+        
+        Yields:
+            (line_number, (item_name, garbage_type, reason) or None, error message or None)
+        """
+        undecodable = []
+        text = self._decode_lines(stream, undecodable)
+        decode_error = '编码错误，文件须为 UTF-8'
+        
+        if fmt == 'jsonl':
+            for line_number, line in enumerate(text, 1):
+                if undecodable:
+                    yield undecodable.pop(), None, decode_error
+                    continue
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                except ValueError:
+                    yield line_number, None, 'JSON格式错误'
+                    continue
+                if not isinstance(data, dict):
+                    yield line_number, None, '每行必须是JSON对象'
+                    continue
+                yield line_number, (data.get('item_name'), data.get('garbage_type'), data.get('reason')), None
+            return
+        
+        reader = csv.reader(text)
+        header = [column.strip() for column in next(reader, [])]
+        for columns in self.csv_columns:
+            if all(column in header for column in columns):
+                positions = [header.index(column) for column in columns]
+                break
+        else:
+            raise ValueError('CSV表头必须包含 物品名称,垃圾类型,分类依据 或 item_name,garbage_type,reason')
+        
+        for row in reader:
+            # Undecodable lines were read as blank rows (or inside a quoted field)
+            while undecodable:
+                yield undecodable.pop(0), None, decode_error
+            if not any(cell.strip() for cell in row):
+                continue
+            if len(row) <= max(positions):
+                yield reader.line_num, None, '列数不足'
+                continue
+            yield reader.line_num, tuple(row[position] for position in positions), None
+        for line_number in undecodable:
+            yield line_number, None, decode_error
+    
+    def get(self):
+        """
+        流式导出全部分类规则
+        ---
+        tags:
+          - 规则管理
+        parameters:
+          - name: format
+            in: query
+            type: string
+            enum: [csv, jsonl]
+            default: csv
+            description: 导出格式，csv 与规则数据文件格式相同，jsonl 每行一个规则对象
+        produces:
+          - text/csv
+          - application/x-ndjson
+        responses:
+          200:
+            description: 规则文件
+          400:
+            description: 参数错误
+        """
+        try:
+            fmt = self._get_format()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        
+        rules = get_data_manager().iter_rules()
+        
+        def generate_csv():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer, lineterminator='\n')
+            writer.writerow(self.csv_columns[0])
+            for count, rule in enumerate(rules, 1):
+                writer.writerow(rule)
+                if count % 500 == 0:
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+            yield buffer.getvalue()
+        
+        def generate_jsonl():
+            for item_name, garbage_type, reason in rules:
+                yield json.dumps({
+                    'item_name': item_name,
+                    'garbage_type': garbage_type,
+                    'reason': reason
+                }, ensure_ascii=False) + '\n'
+        
+        if fmt == 'jsonl':
+            body, mimetype = generate_jsonl(), 'application/x-ndjson'
+        else:
+            body, mimetype = generate_csv(), 'text/csv'
+        
+        return Response(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={'Content-Disposition': f'attachment; filename=garbage_rules.{fmt}'}
+        )
+    
+    def post(self):
+        """
+        批量导入分类规则（同名规则覆盖）
+        ---
+        tags:
+          - 规则管理
+        consumes:
+          - text/csv
+          - application/x-ndjson
+          - multipart/form-data
+        parameters:
+          - name: file
+            in: formData
+            type: file
+            required: false
+            description: 规则文件；也可直接以请求体上传
+          - name: format
+            in: query
+            type: string
+            enum: [csv, jsonl]
+            description: 文件格式，默认按文件扩展名或 Content-Type 判断。csv 表头为 物品名称,垃圾类型,分类依据 或 item_name,garbage_type,reason；jsonl 每行一个含 item_name、garbage_type、reason 的对象
+        responses:
+          200:
+            description: 导入完成，errors 中列出被跳过的行
+          400:
+            description: 文件格式错误或没有有效规则
+        """
+        try:
+            upload = request.files.get('file')
+            if upload is not None:
+                stream, filename = upload.stream, upload.filename or ''
+            else:
+                stream, filename = io.BufferedReader(request.stream), ''
+            fmt = self._get_format(filename)
+            
+            rules = []
+            errors = []
+            failed = 0
+            for line_number, row, error in self._iter_rows(stream, fmt):
+                item_name = ''
+                if row is not None:
+                    item_name, garbage_type, reason = (
+                        value.strip() if isinstance(value, str) else '' for value in row
+                    )
+                    if not all([item_name, garbage_type, reason]):
+                        error = '所有字段都不能为空'
+                    elif garbage_type not in VALID_GARBAGE_TYPES:
+                        error = f'垃圾类型必须是: {", ".join(VALID_GARBAGE_TYPES)}'
+                    else:
+                        rules.append((item_name, garbage_type, reason))
+                        continue
+                
+                failed += 1
+                if len(errors) < self.max_reported_errors:
+                    errors.append({'line': line_number, 'item_name': item_name, 'error': error})
+            
+            if not rules:
+                return {'error': '没有可导入的有效规则', 'failed': failed, 'errors': errors}, 400
+            
+            # Apply everything at once: one snapshot swap / transaction, one persist
+            dm = get_data_manager()
+            imported = dm.import_rules(rules)
+            if imported < 0:
+                return {'error': '规则导入失败'}, 500
+            
+            logger.info(f"批量导入规则: {imported} 条成功, {failed} 条跳过")
+            return {
+                'success': True,
+                'message': '规则导入完成',
+                'imported': imported,
+                'failed': failed,
+                'errors': errors,
+                'errors_truncated': failed > len(errors)
+            }
+            
+        except (ValueError, csv.Error) as e:
+            logger.error(f"批量导入规则错误: {e}")
+            return {'error': f'规则文件格式错误: {str(e)}'}, 400
+        except Exception as e:
+            logger.error(f"批量导入规则错误: {e}")
+            return {'error': f'批量导入规则失败: {str(e)}'}, 500
+
+
 class StatisticsAPI(Resource):
     """Statistics API"""
     
@@ -427,6 +811,8 @@ class StatisticsAPI(Resource):
             return {
                 'statistics': formatted_stats,
                 'total_rules': total,
+                'classification_cache': clf.cache_stats(),
+                'requests': clf.request_stats(),
                 'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
             
@@ -457,7 +843,18 @@ class SimilarItemsAPI(Resource):
             description: 返回数量限制
         responses:
           200:
-            description: 获取建议成功
+            description: 获取建议成功，结果按相似度降序排列
+            schema:
+              type: object
+              properties:
+                similar_items:
+                  type: array
+                  items:
+                    type: string
+                  description: 相似物品名称
+                results:
+                  type: array
+                  description: 相似物品详情 (item_name, score, garbage_type, color, icon)
         """
         try:
             item_name = request.args.get('item_name')
@@ -467,12 +864,27 @@ class SimilarItemsAPI(Resource):
                 return {'error': '请提供物品名称'}, 400
             
             clf = get_classifier()
-            similar_items = clf.get_similar_items(item_name.strip(), limit)
+            dm = get_data_manager()
+            ranked = clf.rank_similar_items(item_name, limit)
+            
+            # Format ranked results
+            results = []
+            for similar_name, score in ranked:
+                rule = dm.get_rule(similar_name) or {}
+                garbage_type = rule.get('type', '未知')
+                results.append({
+                    'item_name': similar_name,
+                    'score': round(score, 4),
+                    'garbage_type': garbage_type,
+                    'color': clf.get_type_color(garbage_type),
+                    'icon': clf.get_type_icon(garbage_type)
+                })
             
             return {
                 'item_name': item_name,
-                'similar_items': similar_items,
-                'count': len(similar_items)
+                'similar_items': [r['item_name'] for r in results],
+                'results': results,
+                'count': len(results)
             }
             
         except Exception as e:
@@ -518,11 +930,13 @@ class ImageClassifyAPI(Resource):
                     'message': '请安装依赖: pip install torch transformers pillow'
                 }, 503
             
-            # Check if file exists
-            if 'image' not in request.files:
+            # Check if file exists (first access parses the multipart upload)
+            with span('upload_parse'):
+                files = request.files
+            if 'image' not in files:
                 return {'error': '请上传图片文件'}, 400
             
-            file = request.files['image']
+            file = files['image']
             
             # Check filename
             if file.filename == '':
@@ -544,7 +958,8 @@ class ImageClassifyAPI(Resource):
                 return {'error': '置信度阈值必须在0-1之间'}, 400
             
             # Read image data
-            image_data = file.read()
+            with span('upload_read'):
+                image_data = file.read()
             
             # Check file size
             if len(image_data) == 0:
@@ -590,6 +1005,200 @@ class ImageClassifyAPI(Resource):
             return {'error': f'图片识别失败: {str(e)}'}, 500
 
 
+class BatchImageClassifyAPI(Resource):
+    """Batch image classification API"""
+    
+    allowed_extensions = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
+    
+    # Per-image size limit, matching single image uploads
+    max_image_bytes = 16 * 1024 * 1024
+    
+    def _collect_images(self, max_files, max_total_bytes):
+        """
+        Collect (filename, image_data) pairs from uploaded files and zip archives
+        
+        Args:
+            max_files: Maximum number of images
+            max_total_bytes: Budget for decompressed zip members across the request
+        
+        Returns:
+            (images, errors)
+        
+        Raises:
+            OverflowError: Too many images or decompressed data over budget
+        """
+        images = []
+        errors = []
+        budget = [max_total_bytes]
+        
+        for file in request.files.getlist('images'):
+            if file.filename == '':
+                continue
+            
+            file_ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
+            if file_ext == 'zip':
+                try:
+                    with zipfile.ZipFile(io.BytesIO(file.read())) as archive:
+                        for info in archive.infolist():
+                            if info.is_dir():
+                                continue
+                            member_ext = info.filename.rsplit('.', 1)[1].lower() if '.' in info.filename else ''
+                            if member_ext not in self.allowed_extensions:
+                                continue
+                            if len(images) >= max_files:
+                                raise OverflowError(f'图片数量超过上限: {max_files}')
+                            image_data = self._read_member(archive, info, budget)
+                            if image_data is None:
+                                errors.append({'filename': info.filename, 'error': '图片文件过大，请上传小于16MB的图片'})
+                                continue
+                            images.append((info.filename, image_data))
+                except zipfile.BadZipFile:
+                    errors.append({'filename': file.filename, 'error': '压缩包格式错误'})
+                continue
+            
+            if file_ext not in self.allowed_extensions:
+                errors.append({'filename': file.filename, 'error': f'不支持的文件类型: .{file_ext}'})
+                continue
+            
+            if len(images) >= max_files:
+                raise OverflowError(f'图片数量超过上限: {max_files}')
+            images.append((file.filename, file.read()))
+        
+        return images, errors
+    
+    def _read_member(self, archive, info, budget):
+        """
+        Decompress one zip member, counting the bytes actually produced
+        
+        ZipInfo.file_size comes from the archive and can lie, so both limits
+        are enforced while reading.
+        
+        Args:
+            archive: Open zipfile.ZipFile
+            info: Member to read
+            budget: One-element list holding the remaining decompressed-byte budget, updated in place
+        
+        Returns:
+            Member data, or None if it exceeds the per-image limit
+        
+        Raises:
+            OverflowError: Request's decompressed-byte budget exhausted
+        """
+        chunks = []
+        size = 0
+        with archive.open(info) as member:
+            while True:
+                chunk = member.read(min(1024 * 1024, self.max_image_bytes + 1 - size))
+                if not chunk:
+                    break
+                size += len(chunk)
+                budget[0] -= len(chunk)
+                if budget[0] < 0:
+                    raise OverflowError('压缩包解压后总大小超过上限')
+                if size > self.max_image_bytes:
+                    return None
+                chunks.append(chunk)
+        return b''.join(chunks)
+    
+    def post(self):
+        """
+        批量图片垃圾分类识别
+        ---
+        tags:
+          - 图片识别
+        consumes:
+          - multipart/form-data
+        parameters:
+          - name: images
+            in: formData
+            type: file
+            required: true
+            description: 多个图片文件 (jpg, png, jpeg, gif, bmp) 或包含图片的 zip 压缩包，可重复上传
+          - name: confidence_threshold
+            in: formData
+            type: number
+            default: 0.1
+            description: 置信度阈值 (0-1)
+        responses:
+          200:
+            description: 识别完成，results 中每项与单张图片识别结果格式一致
+          400:
+            description: 请求错误
+          503:
+            description: 图片识别功能不可用
+        """
+        try:
+            if not IMAGE_CLASSIFIER_AVAILABLE:
+                return {
+                    'error': '图片识别功能不可用',
+                    'message': '请安装依赖: pip install torch transformers pillow'
+                }, 503
+            
+            if 'images' not in request.files:
+                return {'error': '请上传图片文件'}, 400
+            
+            confidence_threshold = float(request.form.get('confidence_threshold', 0.1))
+            if not 0 <= confidence_threshold <= 1:
+                return {'error': '置信度阈值必须在0-1之间'}, 400
+            
+            max_files = current_app.config.get('IMAGE_BATCH_MAX_FILES', 64)
+            max_total_bytes = current_app.config.get('IMAGE_BATCH_MAX_UNZIPPED_BYTES', 64 * 1024 * 1024)
+            try:
+                images, errors = self._collect_images(max_files, max_total_bytes)
+            except OverflowError as e:
+                return {'error': str(e)}, 400
+            
+            empty = [filename for filename, image_data in images if len(image_data) == 0]
+            errors.extend({'filename': filename, 'error': '图片文件为空'} for filename in empty)
+            images = [(filename, image_data) for filename, image_data in images if len(image_data) > 0]
+            
+            if not images:
+                return {'error': '未找到可识别的图片', 'errors': errors}, 400
+            
+            # Execute batched image classification
+            logger.info(f"开始批量识别图片，数量: {len(images)}")
+            img_clf = get_image_classifier()
+            classifications = img_clf.classify_images(
+                [image_data for _, image_data in images],
+                confidence_threshold=confidence_threshold,
+                chunk_size=current_app.config.get('IMAGE_MAX_BATCH_SIZE', 8)
+            )
+            
+            # Format results
+            clf = get_classifier()
+            results = []
+            for (filename, _), classification in zip(images, classifications):
+                success, garbage_type, reason, object_name, predictions = classification
+                results.append({
+                    'filename': filename,
+                    'success': success,
+                    'object_name': object_name,
+                    'garbage_type': garbage_type,
+                    'reason': reason,
+                    'suggestion': img_clf.get_disposal_suggestion(garbage_type) if success else "",
+                    'color': clf.get_type_color(garbage_type) if success else '#666666',
+                    'icon': clf.get_type_icon(garbage_type) if success else '❓',
+                    'predictions': predictions
+                })
+            
+            logger.info(f"批量图片识别完成: {len(results)} 张")
+            return {
+                'results': results,
+                'errors': errors,
+                'total': len(results),
+                'successful': sum(1 for r in results if r['success']),
+                'confidence_threshold': confidence_threshold,
+                'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            }
+            
+        except ValueError as e:
+            logger.error(f"批量图片处理错误: {e}")
+            return {'error': f'图片处理失败: {str(e)}'}, 400
+        except Exception as e:
+            logger.error(f"批量图片识别错误: {e}")
+            return {'error': f'批量图片识别失败: {str(e)}'}, 500
+
+
 class ImageStatusAPI(Resource):
     """Image recognition status API"""
     
@@ -599,15 +1208,37 @@ class ImageStatusAPI(Resource):
         ---
         tags:
           - 图片识别
+        parameters:
+          - name: require_ready
+            in: query
+            type: boolean
+            default: false
+            description: 为 true 时模型未就绪返回 503，供负载均衡健康检查使用
         responses:
           200:
-            description: 状态信息
+            description: 状态信息（含加载进度与就绪状态）
+          503:
+            description: 模型尚未就绪（仅 require_ready=true 时）
         """
         img_clf = get_image_classifier()
-        return {
+        status = img_clf.get_status() if img_clf else {
+            'state': 'unavailable',
+            'stage': None,
+            'progress': 0.0,
+            'ready': False,
+            'error': None,
+            'load_seconds': None
+        }
+        
+        response = {
             'available': IMAGE_CLASSIFIER_AVAILABLE and img_clf is not None,
             'message': '图片识别功能可用' if IMAGE_CLASSIFIER_AVAILABLE else '图片识别功能不可用，请安装依赖',
             'required_packages': ['torch', 'transformers', 'pillow'] if not IMAGE_CLASSIFIER_AVAILABLE else [],
-            'model_loaded': img_clf.model_info is not None if img_clf else False
+            'model_loaded': img_clf.model_info is not None if img_clf else False,
+            **status
         }
-
+        
+        require_ready = request.args.get('require_ready', '').lower() in ('1', 'true', 'yes')
+        if require_ready and not status['ready']:
+            return response, 503
+        return response
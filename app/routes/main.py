@@ -3,7 +3,7 @@
 处理主页和健康检查等基础路由
 """
 
-from flask import send_from_directory, jsonify
+from flask import send_from_directory, jsonify, Response
 from datetime import datetime
 import os
 
@@ -21,6 +21,12 @@ def register_main_routes(app):
         """Main page route, return frontend application"""
         return send_from_directory(app.static_folder, 'index.html')
     
+    @app.route('/metrics')
+    def metrics():
+        """Prometheus metrics endpoint (per-stage latency histograms, match path counters)"""
+        from app.models.metrics import REGISTRY
+        return Response(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    
     @app.route('/api/info')
     def api_info():
         """API information endpoint"""
@@ -33,10 +39,13 @@ def register_main_routes(app):
                 'classify': '/api/classify',
                 'batch_classify': '/api/batch-classify',
                 'rules': '/api/rules',
+                'rules_bulk': '/api/rules/bulk',
                 'statistics': '/api/statistics',
                 'similar_items': '/api/similar-items',
                 'image_classify': '/api/classify-image',
-                'image_status': '/api/image-status'
+                'batch_image_classify': '/api/batch-classify-image',
+                'image_status': '/api/image-status',
+                'metrics': '/metrics'
             }
         })
 
@@ -0,0 +1,97 @@
+"""
+垃圾分类系统 - 请求合并调度模块
+在短时间窗口内收集并发请求，合并为一次批量推理
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+class MicroBatchScheduler:
+    """Request-coalescing micro-batch scheduler"""
+
+    def __init__(self, process_batch: Callable[[List[Any]], List[Any]],
+                 max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        """
+        Initialize scheduler
+
+        Args:
+            process_batch: Function mapping a list of inputs to a list of results (same order)
+            max_batch_size: Maximum number of inputs per batch
+            max_wait_ms: Maximum time to wait for more inputs after the first one arrives
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def _ensure_worker(self):
+        """Start worker thread on first use (after any process fork)"""
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name='micro-batch-scheduler', daemon=True
+                )
+                self._worker.start()
+
+    def submit(self, item: Any) -> Future:
+        """
+        Submit one input for batched processing
+
+        Args:
+            item: Input passed to process_batch
+
+        Returns:
+            Future resolved with this input's result
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item: Any) -> Any:
+        """Submit one input and block until its result is ready"""
+        return self.submit(item).result()
+
+    def _collect(self) -> list:
+        """Block for the first input, then gather more until the window or size limit"""
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        """Worker loop"""
+        while True:
+            batch = self._collect()
+            pending = [(item, future) for item, future in batch
+                       if future.set_running_or_notify_cancel()]
+            if not pending:
+                continue
+
+            try:
+                results = self.process_batch([item for item, _ in pending])
+                if len(results) != len(pending):
+                    raise RuntimeError(f"批处理结果数量不匹配: {len(results)} != {len(pending)}")
+                for (_, future), result in zip(pending, results):
+                    future.set_result(result)
+            except Exception as e:
+                for _, future in pending:
+                    if not future.done():
+                        future.set_exception(e)
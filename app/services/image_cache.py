@@ -0,0 +1,184 @@
+"""
+垃圾分类系统 - 图片识别结果缓存模块
+按上传内容的 SHA-256 精确复用识别结果，可选按感知哈希（dHash）的汉明距离复用近似重复图片的结果
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from app.models.cache import LRUCache
+
+
+Predictions = Tuple[Tuple[str, float], ...]
+
+# int.bit_count is Python 3.10+
+_popcount = getattr(int, 'bit_count', None) or (lambda value: bin(value).count('1'))
+
+
+def content_digest(image_data: bytes) -> bytes:
+    """上传内容的 SHA-256 摘要"""
+    return hashlib.sha256(image_data).digest()
+
+
+def difference_hash(image: Image.Image, hash_size: int = 8) -> int:
+    """
+    计算图片的差异哈希（dHash）
+
+    Downscales to (hash_size + 1) x hash_size grayscale and sets one bit per
+    horizontally adjacent pixel pair that gets brighter, so re-encoding, mild
+    rescaling and small lighting changes flip only a few bits.
+
+    Args:
+        image: PIL 图片
+        hash_size: 每行比特数，哈希共 hash_size² 位
+
+    Returns:
+        哈希值（整数）
+    """
+    pixels = image.convert('L').resize((hash_size + 1, hash_size), Image.BILINEAR).tobytes()
+    value = 0
+    width = hash_size + 1
+    for row in range(0, len(pixels), width):
+        for column in range(row, row + hash_size):
+            value = (value << 1) | (pixels[column] < pixels[column + 1])
+    return value
+
+
+class ImageResultCache:
+    """
+    Bounded cache of raw top-k image predictions
+
+    Exact lookups use an LRU keyed by the SHA-256 of the upload bytes.
+    Near-duplicate lookups scan a second bounded LRU of perceptual hashes for
+    the closest entry within max_distance bits. Predictions are stored before
+    any confidence threshold is applied, so one entry serves every threshold.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 0, max_distance: int = -1):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大条目数（精确缓存与感知哈希缓存各自的上限），0 表示禁用
+            ttl: 精确缓存条目存活秒数，0 表示不过期
+            max_distance: 近似重复判定的最大汉明距离，负数表示只做精确匹配
+        """
+        self.maxsize = max(0, int(maxsize))
+        self.max_distance = int(max_distance)
+        self._exact = LRUCache(self.maxsize, ttl)
+
+        # Perceptual hash -> predictions; scanned linearly, so keep maxsize moderate
+        self._similar = OrderedDict()
+        self._lock = threading.Lock()
+        self.similar_hits = 0
+        self.similar_misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    @property
+    def similarity_enabled(self) -> bool:
+        return self.maxsize > 0 and self.max_distance >= 0
+
+    @staticmethod
+    def _serve(predictions: Predictions, top_k: int) -> Optional[List[Tuple[str, float]]]:
+        """Slice stored predictions to top_k, or None if fewer were stored"""
+        if len(predictions) < top_k:
+            return None
+        return list(predictions[:top_k])
+
+    def get(self, digest: bytes, top_k: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        按内容摘要查找
+
+        Args:
+            digest: content_digest() 的结果
+            top_k: 需要的预测条数
+
+        Returns:
+            [(item_name, similarity), ...]，未命中返回 None
+        """
+        if not self.enabled:
+            return None
+        predictions = self._exact.get(digest)
+        return None if predictions is None else self._serve(predictions, top_k)
+
+    def get_similar(self, perceptual_hash: int, top_k: int) -> Optional[List[Tuple[str, float]]]:
+        """
+        查找汉明距离最近且不超过阈值的近似重复图片
+
+        Args:
+            perceptual_hash: difference_hash() 的结果
+            top_k: 需要的预测条数
+
+        Returns:
+            [(item_name, similarity), ...]，未命中返回 None
+        """
+        if not self.similarity_enabled:
+            return None
+
+        with self._lock:
+            best_hash, best_distance = None, self.max_distance + 1
+            for stored_hash in self._similar:
+                distance = _popcount(stored_hash ^ perceptual_hash)
+                if distance < best_distance:
+                    best_hash, best_distance = stored_hash, distance
+                    if distance == 0:
+                        break
+
+            predictions = None
+            if best_hash is not None:
+                predictions = self._serve(self._similar[best_hash], top_k)
+            if predictions is None:
+                self.similar_misses += 1
+                return None
+            self._similar.move_to_end(best_hash)
+            self.similar_hits += 1
+            return predictions
+
+    def put(self, digest: bytes, predictions: List[Tuple[str, float]],
+            perceptual_hash: Optional[int] = None) -> None:
+        """
+        写入识别结果
+
+        Args:
+            digest: content_digest() 的结果
+            predictions: 未按置信度过滤的 top-k 预测
+            perceptual_hash: difference_hash() 的结果（不做近似匹配时为 None）
+        """
+        if not self.enabled:
+            return
+
+        predictions = tuple((name, float(score)) for name, score in predictions)
+        self._exact.put(digest, predictions)
+
+        if perceptual_hash is not None and self.similarity_enabled:
+            with self._lock:
+                self._similar[perceptual_hash] = predictions
+                self._similar.move_to_end(perceptual_hash)
+                while len(self._similar) > self.maxsize:
+                    self._similar.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._exact.clear()
+        with self._lock:
+            self._similar.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """获取缓存统计"""
+        with self._lock:
+            lookups = self.similar_hits + self.similar_misses
+            similar = {
+                'size': len(self._similar),
+                'max_distance': self.max_distance,
+                'hits': self.similar_hits,
+                'misses': self.similar_misses,
+                'hit_rate': round(self.similar_hits / lookups, 4) if lookups else 0.0
+            } if self.similarity_enabled else None
+        return {'exact': self._exact.stats(), 'similar': similar}
@@ -4,23 +4,41 @@
 """
 
 import os
+import hashlib
+import threading
+import time
 import numpy as np
 from typing import Tuple, Optional, List
 from PIL import Image
 import io
 
+from app.models.metrics import span, timed
+
+from .batch_scheduler import MicroBatchScheduler
+from .image_cache import ImageResultCache, content_digest, difference_hash
+from .model_backends import create_image_encoder, release_image_tower
+
 # Lazy import model libraries to avoid loading at startup
 _model = None
 _model_loaded = False
+_model_lock = threading.Lock()
 
 
 def _load_model():
-    """Load Chinese CLIP pretrained model"""
-    global _model, _model_loaded
-    
+    """Load Chinese CLIP pretrained model (single-flight across threads)"""
     if _model_loaded:
         return _model
     
+    with _model_lock:
+        if _model_loaded:
+            return _model
+        return _load_model_locked()
+
+
+def _load_model_locked():
+    """Load model; caller must hold _model_lock"""
+    global _model, _model_loaded
+    
     try:
         import torch
         from transformers import CLIPProcessor, CLIPModel, AutoProcessor, AutoModel
@@ -89,9 +107,59 @@ def _load_model():
 class ImageGarbageClassifier:
     """Image garbage classifier (using Chinese model)"""
     
-    def __init__(self):
-        """Initialize image classifier"""
+    def __init__(self, cache_dir: str = None, max_batch_size: int = 1, batch_window_ms: float = 0,
+                 backend: str = 'torch', result_cache_size: int = 0, result_cache_ttl: float = 0,
+                 result_cache_distance: int = -1):
+        """
+        Initialize image classifier
+        
+        Args:
+            cache_dir: Directory for persisted label embeddings, None disables disk cache
+            max_batch_size: Max concurrent requests coalesced into one forward pass (1 disables)
+            batch_window_ms: Max time to wait for more requests before running a batch
+            backend: Image encoder backend ('torch', 'int8' or 'onnx')
+            result_cache_size: Max cached prediction results (0 disables)
+            result_cache_ttl: Seconds an exact-match result stays cached (0 never expires)
+            result_cache_distance: Max dHash Hamming distance for near-duplicate reuse (negative disables)
+        """
         self.model_info = None
+        self.cache_dir = cache_dir
+        self.backend = backend
+        self.image_encoder = None
+        
+        # Loading state for readiness reporting
+        self._load_lock = threading.Lock()
+        self._loader_thread = None
+        self._warmup_requested = False
+        self.warmed_up = False
+        self._stage = None
+        self._error = None
+        self._load_started_at = None
+        self._load_finished_at = None
+        
+        # Coalesce concurrent predict_object calls into batched forward passes
+        self._scheduler = None
+        if max_batch_size > 1:
+            self._scheduler = MicroBatchScheduler(
+                self._process_scheduled_batch,
+                max_batch_size=max_batch_size,
+                max_wait_ms=batch_window_ms
+            )
+        
+        # Raw top-k predictions keyed by upload SHA-256 and, optionally, perceptual hash
+        self.result_cache = ImageResultCache(result_cache_size, result_cache_ttl, result_cache_distance)
+        
+        # Normalized text embeddings of all_labels, computed once after model load
+        self.label_embeddings = None
+        self.logit_scale = None
+        
+        # Pixel pipeline (CLIP defaults until the model's processor config is read)
+        self.resize_mode = 'shortest_edge'
+        self.resize_size = (224, 224)
+        self.crop_size = (224, 224)
+        self.resample = Image.BICUBIC
+        self.image_mean = np.array([0.48145466, 0.4578275, 0.40821073], dtype=np.float32)
+        self.image_std = np.array([0.26862954, 0.26130258, 0.27577711], dtype=np.float32)
         
         # Chinese candidate labels (garbage classification related)
         self.candidate_labels = {
@@ -128,34 +196,340 @@ class ImageGarbageClassifier:
             for label in labels:
                 self.label_to_type[label] = garbage_type
     
+    # Loading stages reported by get_status, in order
+    LOAD_STAGES = ['加载模型', '准备标签向量', '初始化推理后端', '预热推理']
+    
     def load_model(self):
-        """Load model"""
-        if self.model_info is None:
-            self.model_info = _load_model()
+        """Load model and precompute label embeddings (single-flight)"""
+        if self.image_encoder is not None:
+            return
+        
+        with self._load_lock:
+            if self.image_encoder is not None:
+                return
+            
+            if self._error:
+                self._error = None
+                self._load_started_at = time.time()
+                self._load_finished_at = None
+            self._load_started_at = self._load_started_at or time.time()
+            try:
+                if self.model_info is None:
+                    self._stage = '加载模型'
+                    self.model_info = _load_model()
+                    self._configure_pixel_pipeline()
+                if self.label_embeddings is None:
+                    self._stage = '准备标签向量'
+                    self._prepare_label_embeddings()
+                self._stage = '初始化推理后端'
+                self._prepare_image_encoder()
+            except Exception as e:
+                self._error = str(e)
+                self._load_finished_at = time.time()
+                raise
+            
+            self._stage = None
+            if not self._warmup_requested:
+                self._load_finished_at = time.time()
+    
+    def warm_up(self):
+        """Run one dummy inference so the first real request hits a hot model"""
+        self.load_model()
+        self._stage = '预热推理'
+        try:
+            height, width = self.crop_size or self.resize_size
+            self.predict_images([Image.new('RGB', (width, height), (128, 128, 128))], top_k=1)
+        except Exception as e:
+            self._error = f"预热失败: {e}"
+            raise
+        finally:
+            self._stage = None
+        self.warmed_up = True
+        self._load_finished_at = time.time()
+    
+    def start_background_load(self, warm_up: bool = True):
+        """
+        Load (and optionally warm up) the model in a background thread
+        
+        Args:
+            warm_up: Run a warm-up inference before reporting ready
+        """
+        with self._load_lock:
+            if self._loader_thread is not None:
+                return
+            self._warmup_requested = warm_up
+            self._load_started_at = time.time()
+            self._loader_thread = threading.Thread(
+                target=self._background_load, name='image-model-loader', daemon=True
+            )
+            self._loader_thread.start()
+    
+    def _background_load(self):
+        """Background loader thread body"""
+        try:
+            self.load_model()
+            if self._warmup_requested:
+                self.warm_up()
+            print(f"✅ 图片识别模型已就绪，耗时 {self._load_finished_at - self._load_started_at:.1f} 秒")
+        except Exception as e:
+            print(f"⚠️  图片识别模型后台加载失败: {e}")
+    
+    @property
+    def ready(self) -> bool:
+        """Whether the model is loaded (and warmed up, if requested)"""
+        return self.image_encoder is not None and (self.warmed_up or not self._warmup_requested)
+    
+    def get_status(self) -> dict:
+        """
+        Get loading progress and readiness
+        
+        Returns:
+            Dict with state, stage, progress (0-1), ready, error and load_seconds
+        """
+        stages = self.LOAD_STAGES if self._warmup_requested else self.LOAD_STAGES[:-1]
+        stage = self._stage
+        
+        if self.ready:
+            state, progress = 'ready', 1.0
+        elif self._error:
+            state, progress = 'failed', 0.0
+        elif stage is not None:
+            state, progress = 'loading', stages.index(stage) / len(stages) if stage in stages else 0.0
+        elif self.image_encoder is not None:
+            state, progress = 'loading', (len(stages) - 1) / len(stages)
+        else:
+            state, progress = ('loading' if self._loader_thread is not None else 'idle'), 0.0
+        
+        load_seconds = None
+        if self._load_started_at is not None:
+            load_seconds = round((self._load_finished_at or time.time()) - self._load_started_at, 2)
+        
+        return {
+            'state': state,
+            'stage': stage,
+            'progress': round(progress, 2),
+            'ready': self.ready,
+            'error': self._error,
+            'load_seconds': load_seconds,
+            'result_cache': self.result_cache.stats() if self.result_cache.enabled else None
+        }
+    
+    def _prepare_image_encoder(self):
+        """Create the configured image encoder backend, falling back to FP32 PyTorch"""
+        try:
+            self.image_encoder = create_image_encoder(self.backend, self.model_info, self.cache_dir)
+        except Exception as e:
+            print(f"⚠️  推理后端 {self.backend} 初始化失败: {e}，使用 FP32 PyTorch")
+            self.image_encoder = create_image_encoder('torch', self.model_info)
+        print(f"✅ 图像编码后端: {self.image_encoder.name}")
+        
+        # Label embeddings are ready, so ONNX needs nothing from the FP32 vision tower
+        if self.image_encoder.name == 'onnx' and release_image_tower(self.model_info):
+            print("✅ 已释放 FP32 图像编码器")
+    
+    def _configure_pixel_pipeline(self):
+        """Read resize/crop/normalization settings from the model's image processor"""
+        processor = self.model_info['processor']
+        image_processor = getattr(processor, 'image_processor', None) or getattr(processor, 'feature_extractor', None)
+        if image_processor is None:
+            return
+        
+        size = getattr(image_processor, 'size', None)
+        if isinstance(size, int):
+            self.resize_mode, self.resize_size = 'shortest_edge', (size, size)
+        elif isinstance(size, dict) and 'shortest_edge' in size:
+            self.resize_mode = 'shortest_edge'
+            self.resize_size = (size['shortest_edge'], size['shortest_edge'])
+        elif isinstance(size, dict) and 'height' in size and 'width' in size:
+            self.resize_mode, self.resize_size = 'exact', (size['height'], size['width'])
+        
+        crop_size = getattr(image_processor, 'crop_size', None)
+        if not getattr(image_processor, 'do_center_crop', True) or crop_size is None:
+            self.crop_size = None
+        elif isinstance(crop_size, int):
+            self.crop_size = (crop_size, crop_size)
+        elif isinstance(crop_size, dict):
+            self.crop_size = (crop_size['height'], crop_size['width'])
+        
+        if getattr(image_processor, 'resample', None) is not None:
+            self.resample = image_processor.resample
+        if getattr(image_processor, 'image_mean', None) is not None:
+            self.image_mean = np.array(image_processor.image_mean, dtype=np.float32)
+        if getattr(image_processor, 'image_std', None) is not None:
+            self.image_std = np.array(image_processor.image_std, dtype=np.float32)
+    
+    def _label_cache_path(self) -> Optional[str]:
+        """Cache file path keyed by model name and label-set hash"""
+        if not self.cache_dir:
+            return None
+        label_hash = hashlib.sha256('\n'.join(self.all_labels).encode('utf-8')).hexdigest()[:16]
+        model_name = self.model_info['name'].replace('/', '__')
+        return os.path.join(self.cache_dir, f"labels-{model_name}-{label_hash}.pt")
+    
+    def _prepare_label_embeddings(self):
+        """Load label embeddings from disk cache, or compute and persist them"""
+        import torch
+        
+        model = self.model_info['model']
+        device = self.model_info['device']
+        cache_path = self._label_cache_path()
+        
+        embeddings = None
+        if cache_path and os.path.exists(cache_path):
+            try:
+                embeddings = torch.load(cache_path, map_location=device)
+                if embeddings.shape[0] != len(self.all_labels):
+                    embeddings = None
+                else:
+                    print(f"✅ 已从缓存加载标签向量: {cache_path}")
+            except Exception as e:
+                print(f"⚠️  标签向量缓存读取失败: {e}")
+                embeddings = None
+        
+        if embeddings is None:
+            processor = self.model_info['processor']
+            inputs = processor(
+                text=self.all_labels,
+                return_tensors="pt",
+                padding=True
+            ).to(device)
+            with torch.no_grad():
+                embeddings = model.get_text_features(**inputs)
+                embeddings = embeddings / embeddings.norm(dim=-1, keepdim=True)
+            
+            if cache_path:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    tmp_path = f"{cache_path}.tmp"
+                    torch.save(embeddings.cpu(), tmp_path)
+                    os.replace(tmp_path, cache_path)
+                except Exception as e:
+                    print(f"⚠️  标签向量缓存写入失败: {e}")
+        
+        with torch.no_grad():
+            self.logit_scale = model.logit_scale.exp().item()
+        self.label_embeddings = embeddings
+    
+    def _encode_images(self, images):
+        """
+        Encode images into normalized embeddings
+        
+        Args:
+            images: PIL image or list of PIL images
+            
+        Returns:
+            Tensor of shape (num_images, embed_dim)
+        """
+        pixel_values = self.to_pixel_values(images)
+        with span('image_forward'):
+            image_embeds = self.image_encoder(pixel_values)
+        image_embeds = image_embeds.to(self.label_embeddings.device)
+        return image_embeds / image_embeds.norm(dim=-1, keepdim=True)
+    
+    @timed('rank_labels')
+    def _rank_labels(self, image_embeds, top_k: int) -> List[List[Tuple[str, float]]]:
+        """
+        Score image embeddings against cached label embeddings
+        
+        Args:
+            image_embeds: Normalized image embeddings (num_images, embed_dim)
+            top_k: Return top k predictions per image
+            
+        Returns:
+            [[(item_name, probability), ...], ...] per image
+        """
+        import torch
+        
+        with torch.no_grad():
+            logits_per_image = self.logit_scale * image_embeds @ self.label_embeddings.t()
+            probs = logits_per_image.softmax(dim=1)
+            values, indices = probs.topk(min(top_k, len(self.all_labels)), dim=1)
+        
+        results = []
+        for row_values, row_indices in zip(values.tolist(), indices.tolist()):
+            results.append([(self.all_labels[index], score) for index, score in zip(row_indices, row_values)])
+        return results
     
+    @timed('preprocess_image')
     def preprocess_image(self, image_data: bytes):
         """
         Preprocess image
         
+        Decodes straight to near model resolution (JPEG draft mode scales
+        during DCT decoding), then resizes and center-crops to model input size.
+        
         Args:
             image_data: Image binary data
             
         Returns:
-            Preprocessed PIL image
+            Preprocessed PIL image at model input resolution
         """
         try:
             # Load image from binary data
             image = Image.open(io.BytesIO(image_data))
             
+            # Let the JPEG decoder downscale by 1/2, 1/4 or 1/8 while staying above target size
+            target_height, target_width = self.resize_size
+            if image.format == 'JPEG':
+                image.draft('RGB', (target_width, target_height))
+            
             # Convert to RGB (if RGBA or other formats)
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            return image
+            return self._resize_and_crop(image)
             
         except Exception as e:
             raise ValueError(f"图片预处理失败: {e}")
     
+    def _resize_and_crop(self, image):
+        """Resize and center-crop like the model's image processor"""
+        width, height = image.size
+        target_height, target_width = self.resize_size
+        
+        if self.resize_mode == 'shortest_edge':
+            shortest = target_height
+            if width <= height:
+                new_size = (shortest, max(1, int(shortest * height / width)))
+            else:
+                new_size = (max(1, int(shortest * width / height)), shortest)
+        else:
+            new_size = (target_width, target_height)
+        
+        if image.size != new_size:
+            # reducing_gap shrinks large images with a cheap box reduce before resampling
+            image = image.resize(new_size, self.resample, reducing_gap=3.0)
+        
+        if self.crop_size is not None:
+            crop_height, crop_width = self.crop_size
+            width, height = image.size
+            left = max(0, (width - crop_width) // 2)
+            top = max(0, (height - crop_height) // 2)
+            image = image.crop((left, top, left + crop_width, top + crop_height))
+        
+        return image
+    
+    @timed('to_pixel_values')
+    def to_pixel_values(self, images) -> np.ndarray:
+        """
+        Convert preprocessed images into a normalized NCHW float32 array
+        
+        Args:
+            images: Preprocessed PIL image or list of PIL images
+            
+        Returns:
+            Array of shape (num_images, 3, height, width)
+        """
+        if isinstance(images, Image.Image):
+            images = [images]
+        
+        batch = np.stack([np.asarray(image, dtype=np.float32) for image in images])
+        batch *= 1.0 / 255.0
+        batch -= self.image_mean
+        batch /= self.image_std
+        return np.ascontiguousarray(batch.transpose(0, 3, 1, 2))
+    
+    @timed('predict_object')
     def predict_object(self, image_data: bytes, top_k: int = 5) -> List[Tuple[str, float]]:
         """
         Recognize objects in image (using Chinese labels)
@@ -168,65 +542,67 @@ class ImageGarbageClassifier:
             [(item_name, similarity), ...]
         """
         try:
-            import torch
+            # Identical upload bytes: skip decoding and inference entirely
+            digest = None
+            if self.result_cache.enabled:
+                digest = content_digest(image_data)
+                cached = self.result_cache.get(digest, top_k)
+                if cached is not None:
+                    return cached
             
-            # Ensure model is loaded
+            # Ensure model and label embeddings are loaded
             self.load_model()
             
             # Preprocess image
             image = self.preprocess_image(image_data)
             
-            processor = self.model_info['processor']
-            model = self.model_info['model']
-            model_type = self.model_info['type']
-            
-            # Process input
-            inputs = processor(
-                text=self.all_labels,
-                images=image,
-                return_tensors="pt",
-                padding=True
-            ).to(self.model_info['device'])
-            
-            # Inference
-            with torch.no_grad():
-                if model_type == "chinese_clip":
-                    # Chinese CLIP may use different output format
-                    outputs = model(**inputs)
-                    # Try to get image-text similarity
-                    if hasattr(outputs, 'logits_per_image'):
-                        logits_per_image = outputs.logits_per_image
-                    else:
-                        # Manually calculate similarity
-                        image_embeds = outputs.image_embeds
-                        text_embeds = outputs.text_embeds
-                        # Normalize
-                        image_embeds = image_embeds / image_embeds.norm(dim=-1, keepdim=True)
-                        text_embeds = text_embeds / text_embeds.norm(dim=-1, keepdim=True)
-                        # Calculate similarity
-                        logits_per_image = torch.matmul(image_embeds, text_embeds.t()) * 100
-                else:  # openai_clip
-                    outputs = model(**inputs)
-                    logits_per_image = outputs.logits_per_image
-                
-                # Calculate probabilities
-                probs = logits_per_image.softmax(dim=1)[0]
-                values, indices = probs.topk(min(top_k, len(self.all_labels)))
+            # Near-duplicate of a recent upload (re-encoded, re-shot from a fixed camera)
+            perceptual_hash = None
+            if self.result_cache.similarity_enabled:
+                perceptual_hash = difference_hash(image)
+                cached = self.result_cache.get_similar(perceptual_hash, top_k)
+                if cached is not None:
+                    self.result_cache.put(digest, cached)
+                    return cached
             
-            # Format results
-            results = []
-            for i in range(len(values)):
-                label = self.all_labels[indices[i].item()]
-                score = values[i].item()
-                results.append((label, score))
+            # Only the image tower runs per request; labels are precomputed
+            if self._scheduler is not None:
+                predictions = self._scheduler((image, top_k))
+            else:
+                predictions = self.predict_images([image], top_k)[0]
             
-            return results
+            if digest is not None:
+                self.result_cache.put(digest, predictions, perceptual_hash)
+            return predictions
             
         except Exception as e:
             import traceback
             traceback.print_exc()
             raise RuntimeError(f"物体识别失败: {e}")
     
+    def predict_images(self, images: list, top_k: int = 5) -> List[List[Tuple[str, float]]]:
+        """
+        Recognize objects in several preprocessed images with one forward pass
+        
+        Args:
+            images: List of preprocessed PIL images
+            top_k: Return top k predictions per image
+            
+        Returns:
+            [[(item_name, similarity), ...], ...] in input order
+        """
+        self.load_model()
+        image_embeds = self._encode_images(images)
+        return self._rank_labels(image_embeds, top_k)
+    
+    def _process_scheduled_batch(self, requests: list) -> List[List[Tuple[str, float]]]:
+        """Run coalesced (image, top_k) requests as one batch"""
+        images = [image for image, _ in requests]
+        max_top_k = max(top_k for _, top_k in requests)
+        predictions = self.predict_images(images, max_top_k)
+        return [result[:top_k] for result, (_, top_k) in zip(predictions, requests)]
+    
+    @timed('map_object_to_garbage_type')
     def map_object_to_garbage_type(self, object_name: str) -> Tuple[Optional[str], str]:
         """
         Map recognized object to garbage type
@@ -263,38 +639,127 @@ class ImageGarbageClassifier:
         try:
             # Recognize objects in image
             predictions = self.predict_object(image_data, top_k=5)
+            return self._interpret_predictions(predictions, confidence_threshold)
+                
+        except Exception as e:
+            return False, "错误", f"图片分类失败: {str(e)}", "", []
+    
+    def classify_images(self, image_data_list: List[bytes], confidence_threshold: float = 0.1,
+                        chunk_size: int = 16, max_workers: int = 4) -> List[Tuple[bool, str, str, str, List[dict]]]:
+        """
+        Classify garbage from many images with parallel decode and batched inference
+        
+        Args:
+            image_data_list: List of image binary data
+            confidence_threshold: Confidence threshold
+            chunk_size: Max images per forward pass
+            max_workers: Decode thread count
             
-            # Format prediction results
-            detailed_results = []
-            for object_name, confidence in predictions:
-                garbage_type, reason = self.map_object_to_garbage_type(object_name)
-                detailed_results.append({
-                    'object_name': object_name,
-                    'confidence': round(confidence * 100, 2),
-                    'garbage_type': garbage_type if garbage_type else '未知',
-                    'can_classify': garbage_type is not None
-                })
+        Returns:
+            List of (success, garbage_type, reason, object_name, detailed_predictions), in input order
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        # Model config determines decode target size
+        self.load_model()
+        
+        results = [None] * len(image_data_list)
+        cache = self.result_cache
+        # Per position: (upload digest, perceptual hash) for storing fresh predictions
+        cache_keys = [(None, None)] * len(image_data_list)
+        
+        def decode(image_data):
+            # Returns (image, error, digest, cached predictions)
+            digest = None
+            if cache.enabled:
+                digest = content_digest(image_data)
+                cached = cache.get(digest, 5)
+                if cached is not None:
+                    return None, None, digest, cached
+            try:
+                return self.preprocess_image(image_data), None, digest, None
+            except Exception as e:
+                return None, e, digest, None
+        
+        # Hash and decode in parallel; hashlib and PIL release the GIL
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            decoded = list(executor.map(decode, image_data_list))
+        
+        valid = []
+        for position, (image, error, digest, cached) in enumerate(decoded):
+            if error is not None:
+                results[position] = (False, "错误", f"图片分类失败: {str(error)}", "", [])
+                continue
             
-            # Find first classifiable result with sufficient confidence
-            for pred in detailed_results:
-                if pred['can_classify'] and pred['confidence'] / 100 >= confidence_threshold:
-                    garbage_type = pred['garbage_type']
-                    object_name = pred['object_name']
-                    confidence = pred['confidence']
-                    
-                    reason = f"图片识别结果：{object_name} (置信度: {confidence}%)"
-                    
-                    return True, garbage_type, reason, object_name, detailed_results
+            perceptual_hash = None
+            if cached is None and cache.similarity_enabled:
+                perceptual_hash = difference_hash(image)
+                cached = cache.get_similar(perceptual_hash, 5)
+                if cached is not None:
+                    cache.put(digest, cached)
             
-            # If no suitable classification found, return highest confidence result
-            if detailed_results:
-                best = detailed_results[0]
-                return False, "未知", f"识别到{best['object_name']}，但无法确定垃圾分类", best['object_name'], detailed_results
+            if cached is not None:
+                results[position] = self._interpret_predictions(cached, confidence_threshold)
             else:
-                return False, "未知", "未能识别图片内容", "", []
+                cache_keys[position] = (digest, perceptual_hash)
+                valid.append((position, image))
+        
+        chunk_size = max(1, chunk_size)
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            try:
+                predictions = self.predict_images([image for _, image in chunk], top_k=5)
+                for (position, _), image_predictions in zip(chunk, predictions):
+                    digest, perceptual_hash = cache_keys[position]
+                    if digest is not None:
+                        cache.put(digest, image_predictions, perceptual_hash)
+                    results[position] = self._interpret_predictions(image_predictions, confidence_threshold)
+            except Exception as e:
+                for position, _ in chunk:
+                    results[position] = (False, "错误", f"图片分类失败: {str(e)}", "", [])
+        
+        return results
+    
+    def _interpret_predictions(self, predictions: List[Tuple[str, float]],
+                               confidence_threshold: float) -> Tuple[bool, str, str, str, List[dict]]:
+        """
+        Turn raw top-k predictions into a classification result
+        
+        Args:
+            predictions: [(item_name, similarity), ...]
+            confidence_threshold: Confidence threshold
+            
+        Returns:
+            (success, garbage_type, reason, object_name, detailed_predictions)
+        """
+        # Format prediction results
+        detailed_results = []
+        for object_name, confidence in predictions:
+            garbage_type, reason = self.map_object_to_garbage_type(object_name)
+            detailed_results.append({
+                'object_name': object_name,
+                'confidence': round(confidence * 100, 2),
+                'garbage_type': garbage_type if garbage_type else '未知',
+                'can_classify': garbage_type is not None
+            })
+        
+        # Find first classifiable result with sufficient confidence
+        for pred in detailed_results:
+            if pred['can_classify'] and pred['confidence'] / 100 >= confidence_threshold:
+                garbage_type = pred['garbage_type']
+                object_name = pred['object_name']
+                confidence = pred['confidence']
                 
-        except Exception as e:
-            return False, "错误", f"图片分类失败: {str(e)}", "", []
+                reason = f"图片识别结果：{object_name} (置信度: {confidence}%)"
+                
+                return True, garbage_type, reason, object_name, detailed_results
+        
+        # If no suitable classification found, return highest confidence result
+        if detailed_results:
+            best = detailed_results[0]
+            return False, "未知", f"识别到{best['object_name']}，但无法确定垃圾分类", best['object_name'], detailed_results
+        else:
+            return False, "未知", "未能识别图片内容", "", []
     
     def get_disposal_suggestion(self, garbage_type: str) -> str:
         """
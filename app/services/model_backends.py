@@ -0,0 +1,227 @@
+"""
+垃圾分类系统 - 图像编码推理后端
+支持 FP32 PyTorch、动态 INT8 量化 PyTorch 和 ONNX Runtime
+"""
+
+import os
+import numpy as np
+
+# Selectable image encoder backends
+BACKENDS = ('torch', 'int8', 'onnx')
+
+
+def _build_image_tower(model):
+    """
+    Wrap the vision encoder and projection of a CLIP model as a standalone module
+
+    Args:
+        model: CLIPModel or ChineseCLIPModel
+
+    Returns:
+        torch.nn.Module mapping pixel_values to (unnormalized) image embeddings
+    """
+    import torch
+
+    class ImageTower(torch.nn.Module):
+        def __init__(self, vision_model, visual_projection):
+            super().__init__()
+            self.vision_model = vision_model
+            self.visual_projection = visual_projection
+
+        def forward(self, pixel_values):
+            pooled_output = self.vision_model(pixel_values=pixel_values)[1]
+            return self.visual_projection(pooled_output)
+
+    return ImageTower(model.vision_model, model.visual_projection).eval()
+
+
+def _fp32_image_tower(model_info: dict):
+    """
+    FP32 image tower of the shared model, failing if another backend already took it over
+
+    Args:
+        model_info: Loaded model info from _load_model
+
+    Returns:
+        torch.nn.Module from _build_image_tower
+    """
+    state = model_info.get('image_tower', 'fp32')
+    if state not in ('fp32', 'shared'):
+        raise RuntimeError(f"FP32 图像编码器已被 {state} 后端替换，无法再使用")
+    return _build_image_tower(model_info['model'])
+
+
+def release_image_tower(model_info: dict) -> bool:
+    """
+    Drop the FP32 vision tower of the shared model once a non-torch backend serves images
+
+    The text tower and logit scale stay loaded for label embeddings. The tower
+    is kept while an FP32 encoder (e.g. a verification reference) still uses it.
+
+    Args:
+        model_info: Loaded model info from _load_model
+
+    Returns:
+        Whether the tower was released
+    """
+    if model_info.get('image_tower', 'fp32') != 'fp32':
+        return False
+    model = model_info['model']
+    model.vision_model = None
+    model.visual_projection = None
+    model_info['image_tower'] = 'released'
+    return True
+
+
+def onnx_model_path(cache_dir: str, model_name: str) -> str:
+    """Exported ONNX image encoder path for a model"""
+    return os.path.join(cache_dir, f"image-{model_name.replace('/', '__')}.onnx")
+
+
+class TorchImageEncoder:
+    """FP32 PyTorch image encoder"""
+
+    name = 'torch'
+
+    def __init__(self, model_info: dict):
+        self.device = model_info['device']
+        self.tower = _fp32_image_tower(model_info)
+        model_info['image_tower'] = 'shared'
+
+    def __call__(self, pixel_values: np.ndarray):
+        """
+        Encode a pixel batch
+
+        Args:
+            pixel_values: Normalized NCHW float32 array
+
+        Returns:
+            torch.Tensor of image embeddings (num_images, embed_dim)
+        """
+        import torch
+
+        with torch.no_grad():
+            return self.tower(torch.from_numpy(pixel_values).to(self.device))
+
+
+class QuantizedTorchImageEncoder(TorchImageEncoder):
+    """Dynamic INT8 quantized PyTorch image encoder (CPU only)"""
+
+    name = 'int8'
+
+    def __init__(self, model_info: dict):
+        import copy
+        import torch
+
+        if model_info['device'] != 'cpu':
+            raise RuntimeError("INT8 动态量化仅支持 CPU")
+
+        self.device = 'cpu'
+
+        # Quantize the shared vision tower in place so only one copy stays resident;
+        # copy it only while an FP32 encoder (reference runs) still needs the original
+        state = model_info.get('image_tower', 'fp32')
+        if state == 'int8':
+            self.tower = _build_image_tower(model_info['model'])
+            return
+        tower = _fp32_image_tower(model_info)
+        if state == 'shared':
+            tower = copy.deepcopy(tower)
+        self.tower = torch.ao.quantization.quantize_dynamic(
+            tower, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        ).eval()
+        if state == 'fp32':
+            # Submodules were swapped in place; the projection is a direct child of the wrapper
+            model_info['model'].visual_projection = self.tower.visual_projection
+            model_info['image_tower'] = 'int8'
+
+
+class OnnxImageEncoder:
+    """ONNX Runtime image encoder"""
+
+    name = 'onnx'
+
+    def __init__(self, model_path: str, num_threads: int = 0):
+        """
+        Args:
+            model_path: Exported ONNX model path
+            num_threads: Intra-op thread count (0 lets ONNX Runtime decide)
+        """
+        import onnxruntime as ort
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"ONNX 模型不存在: {model_path}，请先运行 python export_model.py export"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, pixel_values: np.ndarray):
+        """Encode a pixel batch, returning torch.Tensor image embeddings"""
+        import torch
+
+        outputs = self.session.run(None, {self.input_name: pixel_values})
+        return torch.from_numpy(outputs[0])
+
+
+def create_image_encoder(backend: str, model_info: dict, cache_dir: str = None):
+    """
+    Create an image encoder for the configured backend
+
+    Args:
+        backend: One of BACKENDS
+        model_info: Loaded model info from _load_model
+        cache_dir: Directory holding exported ONNX models
+
+    Returns:
+        Callable mapping a pixel batch to image embeddings
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"未知的推理后端: {backend}，可选: {', '.join(BACKENDS)}")
+
+    if backend == 'int8':
+        return QuantizedTorchImageEncoder(model_info)
+    if backend == 'onnx':
+        if not cache_dir:
+            raise ValueError("ONNX 后端需要配置 MODEL_CACHE_DIR")
+        return OnnxImageEncoder(onnx_model_path(cache_dir, model_info['name']))
+    return TorchImageEncoder(model_info)
+
+
+def export_onnx(model_info: dict, output_path: str, image_size=(224, 224), opset_version: int = 14) -> str:
+    """
+    Export the FP32 image encoder to ONNX with a dynamic batch axis
+
+    Args:
+        model_info: Loaded model info from _load_model
+        output_path: Destination .onnx path
+        image_size: Model input (height, width)
+        opset_version: ONNX opset
+
+    Returns:
+        Output path
+    """
+    import torch
+
+    tower = _fp32_image_tower(model_info).to('cpu')
+    dummy = torch.zeros(1, 3, image_size[0], image_size[1], dtype=torch.float32)
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    tmp_path = f"{output_path}.tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            tower, (dummy,), tmp_path,
+            input_names=['pixel_values'],
+            output_names=['image_embeds'],
+            dynamic_axes={'pixel_values': {0: 'batch'}, 'image_embeds': {0: 'batch'}},
+            opset_version=opset_version
+        )
+    os.replace(tmp_path, output_path)
+    return output_path
@@ -0,0 +1,309 @@
+"""
+垃圾分类系统 - 请求采样剖析模块
+按比例、时间窗口或带密钥的请求头对线上请求做栈采样，按接口写出 collapsed stack 文件（可直接生成火焰图）
+"""
+
+import atexit
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+
+PROFILE_HEADER = 'X-Profile-Token'
+
+
+class SamplingProfiler:
+    """
+    Wall-clock sampling profiler for request threads
+
+    A single background thread wakes every interval while at least one request
+    is being profiled, reads that request thread's stack from
+    sys._current_frames() and counts it. Requests that are not profiled never
+    touch the sampler.
+    """
+
+    def __init__(self, output_dir: str, interval_ms: float = 5, sample_rate: float = 0.0,
+                 secret: Optional[str] = None, flush_interval: float = 1.0):
+        """
+        初始化剖析器
+
+        Args:
+            output_dir: collapsed stack 文件输出目录
+            interval_ms: 采样间隔（毫秒）
+            sample_rate: 常驻采样比例（0~1，0为只按请求头或时间窗口剖析）
+            secret: 请求头 X-Profile-Token 的密钥（None 为不接受请求头触发）
+            flush_interval: 同一接口两次写文件的最短间隔（秒）
+        """
+        self.output_dir = output_dir
+        self.interval = max(0.001, float(interval_ms) / 1000.0)
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        self.secret = secret or None
+        self.flush_interval = flush_interval
+
+        # Thread ident -> {collapsed stack: samples} of requests being profiled
+        self._active = {}
+        self._wake = threading.Event()
+        self._sampler = None
+        self._sampler_pid = None
+        self._start_lock = threading.Lock()
+
+        # Endpoint -> [requests, {collapsed stack: samples}, last flush time]
+        self._profiles = {}
+        self._profiles_lock = threading.Lock()
+        self._labels = {}
+
+        self._window_until = 0.0
+        self._window_rate = 0.0
+
+        atexit.register(self.flush)
+
+    def check_token(self, token: Optional[str]) -> bool:
+        """请求头携带的密钥是否正确"""
+        return bool(self.secret and token and hmac.compare_digest(token, self.secret))
+
+    def should_profile(self, token: Optional[str] = None) -> bool:
+        """
+        决定是否剖析当前请求
+
+        Args:
+            token: 请求头 X-Profile-Token 的值
+
+        Returns:
+            是否剖析
+        """
+        if token is not None and self.check_token(token):
+            return True
+        rate = self._window_rate if time.monotonic() < self._window_until else self.sample_rate
+        return rate > 0 and random.random() < rate
+
+    def start_window(self, duration: float, sample_rate: float = 1.0) -> None:
+        """
+        在接下来的一段时间内按给定比例剖析请求（仅当前进程）
+
+        Args:
+            duration: 时间窗口（秒）
+            sample_rate: 窗口内的采样比例（0~1）
+        """
+        self._window_rate = min(1.0, max(0.0, float(sample_rate)))
+        self._window_until = time.monotonic() + max(0.0, float(duration))
+
+    def stop_window(self) -> None:
+        """结束时间窗口并写出已采集的数据"""
+        self._window_until = 0.0
+        self.flush()
+
+    def begin(self) -> Tuple[int, Dict[str, int]]:
+        """
+        开始剖析当前线程的请求
+
+        Returns:
+            传给 end() 的令牌
+        """
+        ident = threading.get_ident()
+        samples = {}
+        self._active[ident] = samples
+        self._ensure_sampler()
+        self._wake.set()
+        return ident, samples
+
+    def end(self, handle: Tuple[int, Dict[str, int]], endpoint: str) -> None:
+        """
+        结束剖析并把样本合并到接口的累计数据
+
+        Args:
+            handle: begin() 返回的令牌
+            endpoint: 接口名（输出文件名）
+        """
+        ident, samples = handle
+        if self._active.get(ident) is samples:
+            del self._active[ident]
+        # The sampler may still hold a reference for one more tick; copy is atomic
+        samples = samples.copy()
+
+        with self._profiles_lock:
+            profile = self._profiles.get(endpoint)
+            if profile is None:
+                profile = [0, {}, 0.0]
+                self._profiles[endpoint] = profile
+            profile[0] += 1
+            stacks = profile[1]
+            for stack, count in samples.items():
+                stacks[stack] = stacks.get(stack, 0) + count
+            due = time.monotonic() - profile[2] >= self.flush_interval
+
+        if due:
+            self._write(endpoint)
+
+    def status(self) -> dict:
+        """剖析配置与各接口的累计请求数、样本数"""
+        remaining = self._window_until - time.monotonic()
+        with self._profiles_lock:
+            endpoints = {
+                endpoint: {'requests': requests, 'samples': sum(stacks.values())}
+                for endpoint, (requests, stacks, _) in self._profiles.items()
+            }
+        return {
+            'output_dir': self.output_dir,
+            'interval_ms': self.interval * 1000,
+            'sample_rate': self.sample_rate,
+            'window': {'sample_rate': self._window_rate, 'remaining_seconds': round(remaining, 1)}
+            if remaining > 0 else None,
+            'active_requests': len(self._active),
+            'endpoints': endpoints
+        }
+
+    def flush(self) -> None:
+        """把所有接口的累计数据写入文件"""
+        for endpoint in list(self._profiles):
+            self._write(endpoint)
+
+    def _write(self, endpoint: str) -> None:
+        """Rewrite one endpoint's collapsed stack file atomically"""
+        with self._profiles_lock:
+            profile = self._profiles.get(endpoint)
+            if profile is None:
+                return
+            profile[2] = time.monotonic()
+            lines = [f'{stack} {count}\n' for stack, count in sorted(profile[1].items())]
+
+        # One file per process so that several workers never clobber each other
+        path = os.path.join(self.output_dir, f'{endpoint}.{os.getpid()}.folded')
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            temp_path = f'{path}.{threading.get_ident()}.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                file.writelines(lines)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"❌ 写入剖析文件失败: {e}")
+
+    def _ensure_sampler(self) -> None:
+        """Start the sampler thread on first use (after any process fork)"""
+        if self._sampler_pid == os.getpid() and self._sampler.is_alive():
+            return
+        with self._start_lock:
+            if self._sampler_pid == os.getpid() and self._sampler.is_alive():
+                return
+            self._sampler = threading.Thread(target=self._sample_loop, name='request-profiler', daemon=True)
+            self._sampler_pid = os.getpid()
+            self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        """Sample active request threads until the process exits"""
+        while True:
+            delay = self.interval
+            if not self._active:
+                self._wake.clear()
+                # Re-check after clearing so a begin() racing with clear() is not missed
+                if not self._active:
+                    self._wake.wait()
+                    # Random phase for the first tick: a request shorter than the interval
+                    # is still sampled with probability proportional to its duration
+                    delay = random.random() * self.interval
+            time.sleep(delay)
+
+            frames = sys._current_frames()
+            for ident, samples in list(self._active.items()):
+                frame = frames.get(ident)
+                if frame is not None:
+                    stack = self._collapse(frame)
+                    samples[stack] = samples.get(stack, 0) + 1
+            del frames
+
+    def _collapse(self, frame) -> str:
+        """Render a stack root-first as 'frame;frame;...'"""
+        labels = []
+        cache = self._labels
+        while frame is not None:
+            code = frame.f_code
+            label = cache.get(code)
+            if label is None:
+                name = getattr(code, 'co_qualname', code.co_name)
+                # ';' separates frames in the folded format
+                label = f'{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'.replace(';', ':')
+                cache[code] = label
+            labels.append(label)
+            frame = frame.f_back
+        labels.reverse()
+        return ';'.join(labels)
+
+
+def endpoint_name(rule: str) -> str:
+    """URL 规则转换为文件名，如 /api/classify -> api_classify"""
+    return re.sub(r'[^0-9A-Za-z_.-]+', '_', rule.strip('/')).strip('_') or 'index'
+
+
+def init_profiler(app) -> Optional[SamplingProfiler]:
+    """
+    按配置为应用注册剖析钩子
+
+    PROFILE_SAMPLE_RATE 为 0 且未设置 PROFILE_SECRET 时不注册任何钩子，请求路径上没有额外开销。
+
+    Args:
+        app: Flask 应用
+
+    Returns:
+        剖析器（未启用时为 None）
+    """
+    sample_rate = app.config.get('PROFILE_SAMPLE_RATE', 0)
+    secret = app.config.get('PROFILE_SECRET')
+    if sample_rate <= 0 and not secret:
+        return None
+
+    from flask import g, jsonify, request
+
+    profiler = SamplingProfiler(
+        output_dir=app.config.get('PROFILE_DIR', 'profiles'),
+        interval_ms=app.config.get('PROFILE_INTERVAL_MS', 5),
+        sample_rate=sample_rate,
+        secret=secret
+    )
+
+    @app.before_request
+    def start_profiling():
+        if (request.url_rule is not None and request.endpoint != 'profiling_control'
+                and profiler.should_profile(request.headers.get(PROFILE_HEADER))):
+            g.profile_handle = profiler.begin()
+
+    # teardown_request runs after streamed responses finish, so their generators are covered too
+    @app.teardown_request
+    def stop_profiling(exc):
+        handle = g.pop('profile_handle', None)
+        if handle is not None:
+            profiler.end(handle, endpoint_name(request.url_rule.rule))
+
+    if secret:
+        @app.route('/api/profiling', methods=['GET', 'POST', 'DELETE'])
+        def profiling_control():
+            """
+            剖析控制（需请求头 X-Profile-Token）
+
+            GET 查看状态；POST {"duration": 秒, "sample_rate": 0~1} 开启时间窗口；DELETE 结束窗口并写出文件。
+            仅作用于处理该请求的进程。
+            """
+            if not profiler.check_token(request.headers.get(PROFILE_HEADER)):
+                return jsonify({'success': False, 'message': '剖析密钥无效'}), 403
+
+            if request.method == 'POST':
+                data = request.get_json(silent=True) or {}
+                try:
+                    duration = float(data.get('duration', 60))
+                    rate = float(data.get('sample_rate', 1.0))
+                except (TypeError, ValueError):
+                    return jsonify({'success': False, 'message': 'duration 和 sample_rate 必须是数字'}), 400
+                if duration <= 0 or not 0 < rate <= 1:
+                    return jsonify({'success': False, 'message': 'duration 必须大于0，sample_rate 必须在 (0, 1] 之间'}), 400
+                profiler.start_window(duration, rate)
+            elif request.method == 'DELETE':
+                profiler.stop_window()
+
+            return jsonify({'success': True, 'data': profiler.status()})
+
+    app.extensions['profiler'] = profiler
+    print(f"🔬 请求剖析已启用: 常驻采样比例 {sample_rate}，输出目录 {profiler.output_dir}")
+    return profiler
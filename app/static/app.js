@@ -6,6 +6,9 @@
 // 全局变量
 let classifyHistory = JSON.parse(localStorage.getItem('classifyHistory') || '[]');
 let allRules = [];
+let rulesCursor = null;
+let rulesTotal = 0;
+let filterTimer = null;
 let currentEditingRule = null;
 
 // API基础URL
@@ -380,17 +383,26 @@ function displayBatchResults(result) {
 }
 
 /**
- * 加载所有规则
+ * 加载规则（按当前筛选条件分页，append 为 true 时加载下一页）
  */
-async function loadRules() {
+async function loadRules(append = false) {
     const rulesContainer = document.getElementById('rulesContainer');
     
+    const params = new URLSearchParams({ limit: 50 });
+    const prefix = document.getElementById('searchInput').value.trim();
+    const typeFilter = document.getElementById('typeFilter').value;
+    if (prefix) params.set('prefix', prefix);
+    if (typeFilter) params.set('garbage_type', typeFilter);
+    if (append && rulesCursor) params.set('cursor', rulesCursor);
+    
     try {
-        const response = await fetch(`${API_BASE}/rules`);
+        const response = await fetch(`${API_BASE}/rules?${params}`);
         const result = await response.json();
         
         if (response.ok) {
-            allRules = result.rules;
+            allRules = append ? allRules.concat(result.rules) : result.rules;
+            rulesCursor = result.next_cursor;
+            rulesTotal = result.total;
             displayRules(allRules);
         } else {
             rulesContainer.innerHTML = `
@@ -463,25 +475,23 @@ function displayRules(rules) {
         `;
     }).join('');
     
-    rulesContainer.innerHTML = rulesHTML;
+    const moreHTML = rulesCursor ? `
+        <div class="text-center">
+            <button class="btn btn-outline-secondary" onclick="loadRules(true)">
+                <i class="fas fa-angle-down me-1"></i>加载更多（已显示 ${rules.length} / ${rulesTotal}）
+            </button>
+        </div>
+    ` : '';
+    
+    rulesContainer.innerHTML = rulesHTML + moreHTML;
 }
 
 /**
- * 筛选规则
+ * 筛选规则（服务端按名称前缀和类型筛选，输入停止后再请求）
  */
 function filterRules() {
-    const searchText = document.getElementById('searchInput').value.toLowerCase();
-    const typeFilter = document.getElementById('typeFilter').value;
-    
-    let filteredRules = allRules.filter(rule => {
-        const matchesSearch = rule.item_name.toLowerCase().includes(searchText) ||
-                           rule.reason.toLowerCase().includes(searchText);
-        const matchesType = !typeFilter || rule.garbage_type === typeFilter;
-        
-        return matchesSearch && matchesType;
-    });
-    
-    displayRules(filteredRules);
+    clearTimeout(filterTimer);
+    filterTimer = setTimeout(() => loadRules(), 300);
 }
 
 /**
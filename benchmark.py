@@ -0,0 +1,304 @@
+#!/usr/bin/env python3
+"""
+智能垃圾分类系统 - 文本分类性能基准
+生成合成规则表和查询集，测量分类、批量分类、相似物品搜索及 API 端到端的延迟分位数与吞吐量，结果写入 JSON 便于对比
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+
+GARBAGE_TYPES = ['可回收垃圾', '有害垃圾', '厨余垃圾', '其他垃圾']
+QUERY_KINDS = ['hit', 'fuzzy', 'keyword', 'miss']
+
+# Rule names are built only from these characters. Keyword characters and
+# Latin letters are excluded, so the query kinds below are disjoint by construction.
+NAME_CHARACTERS = '甲乙丙丁戊己庚辛壬癸子丑寅卯辰巳午未申酉戌亥东南西北春夏秋冬金木水土日月星云山川江河湖海'
+FILLER_CHARACTERS = 'qwxyzkj'
+
+
+def generate_rules(count, rng):
+    """
+    生成合成规则
+
+    Args:
+        count: 规则数量
+        rng: 随机数生成器
+
+    Returns:
+        [(物品名称, 垃圾类型, 分类依据), ...]
+    """
+    names = set()
+    while len(names) < count:
+        names.add(''.join(rng.choice(NAME_CHARACTERS) for _ in range(rng.randint(3, 6))))
+    return [(name, rng.choice(GARBAGE_TYPES), f'合成规则{index}')
+            for index, name in enumerate(sorted(names))]
+
+
+def generate_queries(rules, count, mix, rng):
+    """
+    生成查询集
+
+    Args:
+        rules: 合成规则
+        count: 查询数量
+        mix: 各类查询的比例，顺序同 QUERY_KINDS
+        rng: 随机数生成器
+
+    Returns:
+        [(查询类别, 查询文本), ...]
+    """
+    from app.models.classifier import DEFAULT_KEYWORD_TABLES
+
+    names = [name for name, _, _ in rules]
+    name_set = set(names)
+    keywords = [keyword for _, _, type_keywords in DEFAULT_KEYWORD_TABLES for keyword in type_keywords]
+
+    def filler(low, high):
+        return ''.join(rng.choice(FILLER_CHARACTERS) for _ in range(rng.randint(low, high)))
+
+    queries = []
+    for kind in rng.choices(QUERY_KINDS, weights=mix, k=count):
+        if kind == 'hit':
+            query = rng.choice(names)
+        elif kind == 'fuzzy':
+            # Stored name inside the query, or the query inside a stored name
+            name = rng.choice(names)
+            query = filler(1, 3) + name if rng.random() < 0.5 else name[1:]
+            if query in name_set:
+                query = filler(1, 3) + name
+        elif kind == 'keyword':
+            query = filler(1, 3) + rng.choice(keywords) + filler(0, 3)
+        else:
+            query = filler(4, 10)
+        queries.append((kind, query))
+    return queries
+
+
+def summarize(latencies, items=None):
+    """
+    计算延迟分位数和吞吐量
+
+    Args:
+        latencies: 每次操作的耗时（秒）
+        items: 处理的条目总数，默认等于操作次数
+
+    Returns:
+        统计字典（毫秒）
+    """
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(total / len(ordered) * 1000, 4),
+        'p50_ms': round(percentile(50), 4),
+        'p90_ms': round(percentile(90), 4),
+        'p99_ms': round(percentile(99), 4),
+        'max_ms': round(ordered[-1] * 1000, 4),
+        'throughput_per_s': round((items or len(ordered)) / total, 1) if total else None
+    }
+
+
+def measure(operation, inputs, warmup=20):
+    """对每个输入计时执行一次 operation"""
+    for value in inputs[:warmup]:
+        operation(value)
+
+    latencies = []
+    for value in inputs:
+        start = time.perf_counter()
+        operation(value)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def bench_size(size, args, rng, workdir):
+    """一个规则规模下的全部基准"""
+    from app.models import create_data_manager, GarbageClassifier
+
+    rules = generate_rules(size, rng)
+    queries = generate_queries(rules, args.queries, args.mix, rng)
+    texts = [query for _, query in queries]
+
+    csv_file = os.path.join(workdir, f'rules-{size}.csv')
+    with open(csv_file, 'w', encoding='utf-8', newline='') as file:
+        file.write('物品名称,垃圾类型,分类依据\n')
+        file.writelines(f'{name},{garbage_type},{reason}\n' for name, garbage_type, reason in rules)
+    db_file = os.path.join(workdir, f'rules-{size}.db')
+
+    results = {}
+
+    start = time.perf_counter()
+    data_manager = create_data_manager(args.storage, csv_file=csv_file, db_file=db_file)
+    results['load'] = {'seconds': round(time.perf_counter() - start, 4)}
+
+    start = time.perf_counter()
+    data_manager.find_similar('', 1)
+    results['similarity_index_build'] = {'seconds': round(time.perf_counter() - start, 4)}
+
+    # Uncached hot path, overall and per query kind
+    classifier = GarbageClassifier(data_manager, cache_size=0)
+    latencies = measure(classifier.classify, texts)
+    results['classify'] = summarize(latencies)
+    for kind in QUERY_KINDS:
+        kind_latencies = [latency for (query_kind, _), latency in zip(queries, latencies) if query_kind == kind]
+        if kind_latencies:
+            results[f'classify_{kind}'] = summarize(kind_latencies)
+
+    cached = GarbageClassifier(data_manager, cache_size=len(texts))
+    cached.batch_classify(texts)
+    results['classify_cached'] = summarize(measure(cached.classify, texts))
+
+    batches = [texts[start:start + args.batch_size] for start in range(0, len(texts), args.batch_size)]
+    latencies = measure(classifier.batch_classify, batches, warmup=1)
+    results['batch_classify'] = summarize(latencies, items=len(texts))
+
+    results['similar_items'] = summarize(measure(lambda text: classifier.rank_similar_items(text, 5), texts))
+
+    if not args.skip_e2e:
+        results.update(bench_e2e(data_manager, texts, batches, args))
+
+    outcomes = {kind: 0 for kind in QUERY_KINDS}
+    for (kind, _), (success, _, reason, _) in zip(queries, map(classifier.classify, texts)):
+        expected = {
+            'hit': success and not reason.startswith(('根据相似物品', '智能预测')),
+            'fuzzy': success and reason.startswith('根据相似物品'),
+            'keyword': success and reason.startswith('智能预测'),
+            'miss': not success
+        }[kind]
+        outcomes[kind] += expected
+    results['query_mix'] = {
+        kind: {'count': sum(1 for query_kind, _ in queries if query_kind == kind), 'as_expected': outcomes[kind]}
+        for kind in QUERY_KINDS
+    }
+    return results
+
+
+def bench_e2e(data_manager, texts, batches, args):
+    """通过 Flask 测试客户端的端到端基准"""
+    from app import create_app
+    from app.routes import api
+
+    app = create_app('testing' if args.quiet else 'default')
+    app.config['CLASSIFY_CACHE_SIZE'] = 0
+    app.config['BATCH_CLASSIFY_MAX_ITEMS'] = max(len(batch) for batch in batches)
+
+    # Route the API singletons to the synthetic rule set
+    api.data_manager = data_manager
+    api.classifier = None
+    client = app.test_client()
+
+    results = {
+        'e2e_classify': summarize(measure(
+            lambda text: client.post('/api/classify', json={'item_name': text}), texts
+        )),
+        'e2e_batch_classify': summarize(measure(
+            lambda batch: client.post('/api/batch-classify', json={'items': batch}), batches, warmup=1
+        ), items=len(texts)),
+        'e2e_similar_items': summarize(measure(
+            lambda text: client.get('/api/similar-items', query_string={'item_name': text}), texts
+        ))
+    }
+
+    api.data_manager = None
+    api.classifier = None
+    return results
+
+
+def compare(baseline, current):
+    """打印与基线结果的 p50 / 吞吐量对比"""
+    print(f"{'规模':>8} {'基准':<24} {'p50(ms) 基线 → 当前':>26} {'吞吐量变化':>10}")
+    for size, benches in current['results'].items():
+        for name, stats in benches.items():
+            old = baseline.get('results', {}).get(size, {}).get(name)
+            if not old or 'p50_ms' not in stats or 'p50_ms' not in old:
+                continue
+            change = ''
+            if old.get('throughput_per_s') and stats.get('throughput_per_s'):
+                change = f"{(stats['throughput_per_s'] / old['throughput_per_s'] - 1) * 100:+.1f}%"
+            print(f"{size:>8} {name:<24} {old['p50_ms']:>12.4f} → {stats['p50_ms']:<11.4f} {change:>10}")
+
+
+def git_revision():
+    """当前 git 提交（不可用时为 None）"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='文本分类性能基准')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='规则表规模')
+    parser.add_argument('--queries', type=int, default=2000, help='每个规模的查询数量')
+    parser.add_argument('--mix', type=float, nargs=4, default=[0.4, 0.3, 0.2, 0.1],
+                        metavar=('HIT', 'FUZZY', 'KEYWORD', 'MISS'), help='精确命中/模糊命中/关键词/未命中的比例')
+    parser.add_argument('--batch-size', type=int, default=500, help='批量分类每批物品数')
+    parser.add_argument('--storage', choices=['csv', 'sqlite'], default='csv', help='规则存储模式')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--skip-e2e', action='store_true', help='跳过 Flask 端到端基准')
+    parser.add_argument('--output', default=None, help='结果 JSON 路径（默认 benchmark_results/<时间>.json）')
+    parser.add_argument('--compare', help='与之对比的基线结果 JSON')
+    parser.add_argument('--quiet', action='store_true', help='不输出请求日志')
+    args = parser.parse_args()
+
+    if args.quiet:
+        import logging
+        logging.disable(logging.INFO)
+
+    rng = random.Random(args.seed)
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+            'args': vars(args)
+        },
+        'results': {}
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in args.sizes:
+            print(f"⏱  规则规模 {size} ...")
+            results = bench_size(size, args, rng, workdir)
+            report['results'][str(size)] = results
+            print(f"   classify p50 {results['classify']['p50_ms']:.4f} ms, "
+                  f"p99 {results['classify']['p99_ms']:.4f} ms; "
+                  f"batch_classify {results['batch_classify']['throughput_per_s']:.0f} 条/秒; "
+                  f"similar_items p50 {results['similar_items']['p50_ms']:.4f} ms")
+
+    output = args.output or os.path.join(
+        'benchmark_results', datetime.now().strftime('%Y%m%d-%H%M%S') + '.json'
+    )
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"✅ 结果已保存: {output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as file:
+            compare(json.load(file), report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -19,6 +19,65 @@ class Config:
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))
     DATA_FILE = os.path.join(BASE_DIR, 'garbage_rules.csv')
     
+    # 规则存储模式: csv (每次变更重写CSV) / journal (追加写变更日志，后台压缩进CSV) / sqlite (多进程共享)
+    RULES_STORAGE = os.environ.get('RULES_STORAGE', 'csv')
+    RULES_DB_FILE = os.environ.get('RULES_DB_FILE') or os.path.join(BASE_DIR, 'garbage_rules.db')
+    RULES_COMPACT_INTERVAL = float(os.environ.get('RULES_COMPACT_INTERVAL', 30))
+    RULES_COMPACT_THRESHOLD = int(os.environ.get('RULES_COMPACT_THRESHOLD', 1000))
+    RULES_RELOAD_INTERVAL = float(os.environ.get('RULES_RELOAD_INTERVAL', 2))
+    
+    # 规则列表分页：默认每页条数与单页上限
+    RULES_PAGE_SIZE = int(os.environ.get('RULES_PAGE_SIZE', 50))
+    RULES_PAGE_MAX = int(os.environ.get('RULES_PAGE_MAX', 500))
+    
+    # 关键词表路径（规则未命中时的关键词分析）
+    KEYWORD_FILE = os.environ.get('KEYWORD_FILE') or os.path.join(BASE_DIR, 'garbage_keywords.csv')
+    
+    # 查询与物品名称规范化时是否把繁体字转换为简体字（全角/半角、大小写、标点与空白始终统一）
+    QUERY_TRADITIONAL_TO_SIMPLIFIED = os.environ.get('QUERY_TRADITIONAL_TO_SIMPLIFIED', 'true').lower() in ('1', 'true', 'yes')
+    
+    # 文本分类结果缓存：最大条目数（0为关闭）与存活秒数（0为不过期），规则变更时自动失效
+    CLASSIFY_CACHE_SIZE = int(os.environ.get('CLASSIFY_CACHE_SIZE', 10000))
+    CLASSIFY_CACHE_TTL = float(os.environ.get('CLASSIFY_CACHE_TTL', 0))
+    
+    # 批量文本分类单次最多物品数
+    BATCH_CLASSIFY_MAX_ITEMS = int(os.environ.get('BATCH_CLASSIFY_MAX_ITEMS', 10000))
+    
+    # 批量文本分类进程池：进程数（0为关闭）与启用所需的待模糊匹配物品数
+    CLASSIFY_WORKERS = int(os.environ.get('CLASSIFY_WORKERS', 0))
+    CLASSIFY_PARALLEL_MIN_ITEMS = int(os.environ.get('CLASSIFY_PARALLEL_MIN_ITEMS', 5000))
+    
+    # 图片识别模型缓存目录（标签文本向量等）
+    MODEL_CACHE_DIR = os.environ.get('MODEL_CACHE_DIR') or os.path.join(BASE_DIR, 'model_cache')
+    
+    # 图片识别请求合并：最多合并的图片数（1为关闭）与最长等待时间（毫秒）
+    IMAGE_MAX_BATCH_SIZE = int(os.environ.get('IMAGE_MAX_BATCH_SIZE', 8))
+    IMAGE_BATCH_WINDOW_MS = float(os.environ.get('IMAGE_BATCH_WINDOW_MS', 5))
+    
+    # 图像编码推理后端: torch (FP32) / int8 (动态量化) / onnx (ONNX Runtime，需先导出)
+    IMAGE_BACKEND = os.environ.get('IMAGE_BACKEND', 'torch')
+    
+    # 应用启动时在后台线程加载并预热图片识别模型
+    IMAGE_PRELOAD = os.environ.get('IMAGE_PRELOAD', '').lower() in ('1', 'true', 'yes')
+    
+    # 图片识别结果缓存：最大条目数（0为关闭）、存活秒数（0为不过期）与近似重复判定的感知哈希汉明距离（负数为只做精确匹配）
+    IMAGE_CACHE_SIZE = int(os.environ.get('IMAGE_CACHE_SIZE', 1024))
+    IMAGE_CACHE_TTL = float(os.environ.get('IMAGE_CACHE_TTL', 0))
+    IMAGE_CACHE_HASH_DISTANCE = int(os.environ.get('IMAGE_CACHE_HASH_DISTANCE', -1))
+    
+    # 批量图片识别单次请求最多图片数
+    IMAGE_BATCH_MAX_FILES = int(os.environ.get('IMAGE_BATCH_MAX_FILES', 64))
+    
+    # 批量图片识别单次请求中 zip 压缩包解压后的总字节数上限（按实际解压字节计）
+    IMAGE_BATCH_MAX_UNZIPPED_BYTES = int(os.environ.get('IMAGE_BATCH_MAX_UNZIPPED_BYTES', 64 * 1024 * 1024))
+    
+    # 请求采样剖析：常驻采样比例（0~1）、请求头 X-Profile-Token 的密钥、采样间隔（毫秒）与输出目录
+    # 比例为0且未设置密钥时不注册任何钩子
+    PROFILE_SAMPLE_RATE = float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_SECRET = os.environ.get('PROFILE_SECRET') or None
+    PROFILE_INTERVAL_MS = float(os.environ.get('PROFILE_INTERVAL_MS', 5))
+    PROFILE_DIR = os.environ.get('PROFILE_DIR') or os.path.join(BASE_DIR, 'profiles')
+    
     # JSON配置
     JSON_AS_ASCII = False  # 支持中文JSON
     JSON_SORT_KEYS = False
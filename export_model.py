@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+智能垃圾分类系统 - 图片识别模型导出与精度校验
+一次性导出 ONNX 图像编码器，并将 INT8 / ONNX 后端的 top-k 结果与 FP32 对比
+"""
+
+import argparse
+import os
+import sys
+import time
+
+
+def export(args):
+    """导出 ONNX 图像编码器"""
+    from app.services.image_classifier import ImageGarbageClassifier
+    from app.services.model_backends import export_onnx, onnx_model_path
+
+    classifier = ImageGarbageClassifier(cache_dir=args.cache_dir)
+    classifier.load_model()
+
+    output_path = args.output or onnx_model_path(args.cache_dir, classifier.model_info['name'])
+    image_size = classifier.crop_size or classifier.resize_size
+    export_onnx(classifier.model_info, output_path, image_size=image_size, opset_version=args.opset)
+    print(f"✅ ONNX 模型已导出: {output_path}")
+    return 0
+
+
+def verify(args):
+    """对比候选后端与 FP32 的 top-k 结果"""
+    from app.services.image_classifier import ImageGarbageClassifier
+
+    image_extensions = {'.png', '.jpg', '.jpeg', '.gif', '.bmp'}
+    image_paths = sorted(
+        os.path.join(args.images, name) for name in os.listdir(args.images)
+        if os.path.splitext(name)[1].lower() in image_extensions
+    )
+    if not image_paths:
+        print(f"❌ 目录中没有图片: {args.images}")
+        return 1
+
+    reference = ImageGarbageClassifier(cache_dir=args.cache_dir, backend='torch')
+    candidate = ImageGarbageClassifier(cache_dir=args.cache_dir, backend=args.backend)
+    reference.load_model()
+    candidate.load_model()
+    if candidate.image_encoder.name != args.backend:
+        print(f"❌ 后端 {args.backend} 不可用")
+        return 1
+
+    top1_agree = 0
+    overlap_total = 0.0
+    reference_time = 0.0
+    candidate_time = 0.0
+
+    for path in image_paths:
+        with open(path, 'rb') as file:
+            image = reference.preprocess_image(file.read())
+
+        start = time.perf_counter()
+        expected = reference.predict_images([image], top_k=args.top_k)[0]
+        reference_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        actual = candidate.predict_images([image], top_k=args.top_k)[0]
+        candidate_time += time.perf_counter() - start
+
+        expected_labels = [label for label, _ in expected]
+        actual_labels = [label for label, _ in actual]
+        top1_agree += expected_labels[0] == actual_labels[0]
+        overlap_total += len(set(expected_labels) & set(actual_labels)) / len(expected_labels)
+
+        if args.verbose:
+            print(f"{os.path.basename(path)}: FP32={expected_labels[0]} {args.backend}={actual_labels[0]}")
+
+    count = len(image_paths)
+    agreement = top1_agree / count
+    print("=" * 60)
+    print(f"样本数量: {count}")
+    print(f"top-1 一致率: {agreement:.2%}")
+    print(f"top-{args.top_k} 平均重合率: {overlap_total / count:.2%}")
+    print(f"FP32 平均耗时: {reference_time / count * 1000:.1f} ms")
+    print(f"{args.backend} 平均耗时: {candidate_time / count * 1000:.1f} ms")
+    print("=" * 60)
+
+    if agreement < args.min_agreement:
+        print(f"❌ top-1 一致率低于阈值 {args.min_agreement:.2%}")
+        return 1
+    print("✅ 精度校验通过")
+    return 0
+
+
+def main():
+    """主函数"""
+    from config import Config
+
+    parser = argparse.ArgumentParser(description='图片识别模型导出与精度校验')
+    parser.add_argument('--cache-dir', default=Config.MODEL_CACHE_DIR, help='模型缓存目录')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='导出 ONNX 图像编码器')
+    export_parser.add_argument('--output', help='输出路径（默认保存到缓存目录）')
+    export_parser.add_argument('--opset', type=int, default=14, help='ONNX opset 版本')
+    export_parser.set_defaults(func=export)
+
+    verify_parser = subparsers.add_parser('verify', help='对比候选后端与 FP32 的 top-k 结果')
+    verify_parser.add_argument('--backend', choices=['int8', 'onnx'], required=True, help='候选后端')
+    verify_parser.add_argument('--images', required=True, help='样本图片目录')
+    verify_parser.add_argument('--top-k', type=int, default=5, help='对比的 top-k')
+    verify_parser.add_argument('--min-agreement', type=float, default=0.95, help='top-1 一致率阈值')
+    verify_parser.add_argument('--verbose', action='store_true', help='逐张输出结果')
+    verify_parser.set_defaults(func=verify)
+
+    args = parser.parse_args()
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
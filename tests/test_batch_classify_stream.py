@@ -0,0 +1,36 @@
+"""
+垃圾分类系统 - 批量分类流式输出测试
+中途出错时以 {"done": false, "error": ...} 结束响应体，而不是截断
+"""
+
+import json
+
+from flask import Flask
+
+from app.routes.api import BatchClassifyAPI
+
+
+class FailingClassifier:
+    """Yields one result, then fails like a rule reload error mid-batch would"""
+
+    def iter_batch_classify(self, items):
+        yield items[0], True, '有害垃圾', '含重金属', ''
+        raise RuntimeError('rules unavailable')
+
+    def get_type_color(self, garbage_type):
+        return '#F44336'
+
+    def get_type_icon(self, garbage_type):
+        return '☠️'
+
+
+def test_stream_ends_with_error_line_when_classification_fails():
+    app = Flask(__name__)
+    with app.test_request_context('/'):
+        response = BatchClassifyAPI()._stream(FailingClassifier(), ['电池', '报纸'])
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert lines[0]['item_name'] == '电池'
+    assert lines[-1]['done'] is False
+    assert 'rules unavailable' in lines[-1]['error']
+    assert (lines[-1]['processed'], lines[-1]['total'], lines[-1]['successful']) == (1, 2, 1)
@@ -0,0 +1,63 @@
+"""
+垃圾分类系统 - 批量图片上传测试
+zip 压缩包按实际解压字节数限制，不信任 ZipInfo.file_size
+"""
+
+import io
+import zipfile
+
+import pytest
+from flask import Flask
+
+from app.routes.api import BatchImageClassifyAPI
+
+
+def make_zip(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def forge_file_size(payload, size):
+    """Rewrite every declared uncompressed size, as a hostile archive would"""
+    payload = bytearray(payload)
+    for signature, offset in ((b'PK\x03\x04', 22), (b'PK\x01\x02', 24)):
+        start = payload.find(signature)
+        while start != -1:
+            payload[start + offset:start + offset + 4] = size.to_bytes(4, 'little')
+            start = payload.find(signature, start + 4)
+    return bytes(payload)
+
+
+def collect(payload, max_files=64, max_total_bytes=64 * 1024 * 1024):
+    app = Flask(__name__)
+    data = {'images': (io.BytesIO(payload), 'photos.zip')}
+    with app.test_request_context('/', method='POST', data=data, content_type='multipart/form-data'):
+        return BatchImageClassifyAPI()._collect_images(max_files, max_total_bytes)
+
+
+def test_members_within_budget_are_collected():
+    images, errors = collect(make_zip([('a.jpg', b'x' * 100), ('b.png', b'y' * 100), ('notes.txt', b'z')]))
+    assert [name for name, _ in images] == ['a.jpg', 'b.png']
+    assert errors == []
+
+
+def test_oversized_member_is_rejected():
+    images, errors = collect(make_zip([('big.jpg', bytes(17 * 1024 * 1024)), ('ok.jpg', b'x')]))
+    assert [name for name, _ in images] == ['ok.jpg']
+    assert [error['filename'] for error in errors] == ['big.jpg']
+
+
+def test_total_decompressed_bytes_are_budgeted():
+    members = [(f'{i}.jpg', bytes(4 * 1024 * 1024)) for i in range(4)]
+    with pytest.raises(OverflowError):
+        collect(make_zip(members), max_total_bytes=10 * 1024 * 1024)
+
+
+def test_forged_file_size_does_not_bypass_limits():
+    payload = forge_file_size(make_zip([('bomb.jpg', bytes(20 * 1024 * 1024))]), 10)
+    images, errors = collect(payload)
+    assert images == []
+    assert len(errors) == 1
@@ -0,0 +1,37 @@
+"""
+垃圾分类系统 - 分类提示信息测试
+归一化只用于匹配，返回给用户的提示引用原始输入
+"""
+
+from app.models.classifier import GarbageClassifier
+from app.models.data_manager import GarbageDataManager
+
+
+def make_classifier(tmp_path):
+    csv_file = tmp_path / 'rules.csv'
+    csv_file.write_text('物品名称,垃圾类型,分类依据\n电池,有害垃圾,含重金属\n', encoding='utf-8')
+    return GarbageClassifier(GarbageDataManager(str(csv_file)))
+
+
+def test_miss_message_quotes_the_original_input(tmp_path):
+    classifier = make_classifier(tmp_path)
+    raw = ' ＸＹＺ　Ｑ '
+    assert classifier.normalizer(raw) != raw
+
+    success, garbage_type, reason, _ = classifier.classify(raw)
+    assert not success and garbage_type == '未知'
+    assert reason == f"抱歉，未找到'{raw}'的分类规则"
+
+    # A second spelling with the same normalized key must not reuse the first message
+    other = 'xyz q'
+    assert classifier.normalizer(other) == classifier.normalizer(raw)
+    assert classifier.classify(other)[2] == f"抱歉，未找到'{other}'的分类规则"
+
+
+def test_batch_miss_message_quotes_the_original_input(tmp_path):
+    classifier = make_classifier(tmp_path)
+    results = classifier.batch_classify([' ＸＹＺ　Ｑ ', 'xyz q', '电池'])
+    assert [reason for _, _, _, reason, _ in results[:2]] == [
+        "抱歉，未找到' ＸＹＺ　Ｑ '的分类规则", "抱歉，未找到'xyz q'的分类规则"
+    ]
+    assert results[2][1:3] == (True, '有害垃圾')
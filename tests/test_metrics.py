@@ -0,0 +1,57 @@
+"""
+垃圾分类系统 - 运行指标测试
+每个请求一个线程时，分片数量保持固定且合并结果准确
+"""
+
+import threading
+
+from app.models.metrics import Counter, Histogram, WindowedCounter
+
+
+def run_in_threads(func, count):
+    """Run func once in each of count short-lived threads"""
+    for _ in range(count):
+        thread = threading.Thread(target=func)
+        thread.start()
+        thread.join()
+
+
+def test_windowed_counter_shards_stay_bounded():
+    counter = WindowedCounter()
+    run_in_threads(lambda: counter.incr('可回收垃圾'), 500)
+
+    assert len(counter._shards) == WindowedCounter.SHARDS
+    assert counter.totals() == {'可回收垃圾': 500}
+    assert counter.window(60) == {'可回收垃圾': 500}
+
+
+def test_windowed_counter_concurrent_writers():
+    counter = WindowedCounter()
+
+    def work():
+        for _ in range(1000):
+            counter.incr('a')
+
+    threads = [threading.Thread(target=work) for _ in range(32)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert counter.totals() == {'a': 32000}
+
+
+def test_counter_and_histogram_shards_stay_bounded():
+    counter = Counter('test_total', 'test', ('path',))
+    histogram = Histogram('test_seconds', 'test', ('stage',), buckets=(0.1, 1.0))
+
+    def work():
+        counter.inc(('exact',))
+        histogram.observe(0.5, ('lookup',))
+
+    run_in_threads(work, 500)
+
+    assert len(counter._shards) == Counter.SHARDS
+    assert len(histogram._shards) == Histogram.SHARDS
+    assert counter.collect() == {('exact',): 500}
+    assert histogram.collect() == {('lookup',): [0, 500, 0, 250.0]}
+    assert 'test_seconds_count{stage="lookup"} 500' in histogram.render()
@@ -0,0 +1,57 @@
+"""
+垃圾分类系统 - 多进程规则文件测试
+两个数据管理器实例共享同一组规则文件，模拟两个 worker 进程交替读写与压缩
+"""
+
+import pytest
+
+from app.models.data_manager import GarbageDataManager
+
+
+def make_pair(tmp_path, storage_mode):
+    csv_file = tmp_path / 'rules.csv'
+    csv_file.write_text('物品名称,垃圾类型,分类依据\n电池,有害垃圾,含重金属\n', encoding='utf-8')
+    # Large interval and threshold: compaction only runs when a test calls compact()
+    options = dict(storage_mode=storage_mode, compact_interval=3600, compact_threshold=10 ** 6)
+    return GarbageDataManager(str(csv_file), **options), GarbageDataManager(str(csv_file), **options)
+
+
+def test_reader_compaction_keeps_other_process_records(tmp_path):
+    writer, reader = make_pair(tmp_path, 'journal')
+
+    assert writer.add_rule('e0', '其他垃圾', '第一条')
+    assert reader.reload_if_changed()
+    assert writer.add_rule('r1', '其他垃圾', '读者重新加载之后写入')
+
+    # The reader's snapshot predates r1; compaction must still keep it
+    assert reader.compact()
+    assert reader.get_rule('r1') is not None
+
+    fresh = GarbageDataManager(writer.csv_file, storage_mode='journal')
+    assert fresh.get_rule('e0') is not None
+    assert fresh.get_rule('r1') is not None
+
+
+@pytest.mark.parametrize('storage_mode', ['csv', 'journal'])
+def test_interleaved_writers_do_not_overwrite_each_other(tmp_path, storage_mode):
+    first, second = make_pair(tmp_path, storage_mode)
+
+    assert first.add_rule('甲', '其他垃圾', '进程一')
+    assert second.add_rule('乙', '其他垃圾', '进程二')
+    assert first.delete_rule('电池')
+    assert second.import_rules([('丙', '厨余垃圾', '进程二批量')]) == 1
+
+    fresh = GarbageDataManager(first.csv_file, storage_mode=storage_mode)
+    assert sorted(fresh.rules_dict) == ['丙', '乙', '甲']
+
+
+def test_only_the_current_log_is_replayed(tmp_path):
+    csv_file = tmp_path / 'rules.csv'
+    csv_file.write_text('物品名称,垃圾类型,分类依据\n电池,有害垃圾,含重金属\n', encoding='utf-8')
+    # A stray file next to the log must never be replayed over the snapshot
+    (tmp_path / 'rules.csv.log.old').write_text(
+        '{"op": "delete", "item_name": "电池"}\n', encoding='utf-8'
+    )
+
+    manager = GarbageDataManager(str(csv_file), storage_mode='journal', compact_interval=3600)
+    assert manager.get_rule('电池') == {'type': '有害垃圾', 'reason': '含重金属'}
@@ -0,0 +1,65 @@
+"""
+垃圾分类系统 - 多进程批量分类测试
+其他线程持续写指标时 fork 工作进程不会死锁，结果与进程内分类一致
+"""
+
+import threading
+import time
+
+from app.models.classifier import GarbageClassifier
+from app.models.data_manager import GarbageDataManager
+from app.models.metrics import MATCH_TOTAL, STAGE_SECONDS
+
+
+def make_data_manager(tmp_path):
+    csv_file = tmp_path / 'rules.csv'
+    rows = ['物品名称,垃圾类型,分类依据'] + [f'物品{i},其他垃圾,测试{i}' for i in range(500)]
+    csv_file.write_text('\n'.join(rows) + '\n', encoding='utf-8')
+    return GarbageDataManager(str(csv_file))
+
+
+def test_parallel_batches_finish_while_threads_hammer_metrics(tmp_path):
+    data_manager = make_data_manager(tmp_path)
+    parallel = GarbageClassifier(data_manager, cache_size=0, workers=2, parallel_min_items=10)
+    serial = GarbageClassifier(data_manager, cache_size=0)
+    items = [f'旧物品{i}号' for i in range(300)] + [f'废电池{i}' for i in range(100)] + ['未知东西'] * 5
+
+    stop = threading.Event()
+
+    def hammer():
+        while not stop.is_set():
+            STAGE_SECONDS.observe(0.001, ('test',))
+            MATCH_TOTAL.inc(('test',))
+            parallel.classify('物品1')
+            # Be caught holding metric and cache locks when a worker is forked
+            with MATCH_TOTAL._shard()[0], STAGE_SECONDS._shard()[0], parallel._cache._lock:
+                time.sleep(0.0005)
+            time.sleep(0)
+
+    hammers = [threading.Thread(target=hammer, daemon=True) for _ in range(8)]
+    for thread in hammers:
+        thread.start()
+
+    outcomes = []
+
+    def run_batches():
+        for round_number in range(10):
+            if round_number % 3 == 2:
+                # A new rule version retires the current worker pool
+                data_manager.add_rule(f'新增{round_number}', '可回收垃圾', '测试')
+            outcomes.append((parallel.batch_classify(items), serial.batch_classify(items)))
+
+    try:
+        runner = threading.Thread(target=run_batches, daemon=True)
+        runner.start()
+        runner.join(timeout=60)
+        assert not runner.is_alive(), 'parallel batch classification hung'
+    finally:
+        stop.set()
+        for thread in hammers:
+            thread.join()
+
+    assert len(outcomes) == 10
+    for parallel_results, serial_results in outcomes:
+        assert parallel_results == serial_results
+    assert parallel._pool is not None and parallel._pool.users == 0
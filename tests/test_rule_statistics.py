@@ -0,0 +1,47 @@
+"""
+垃圾分类系统 - 分类统计回归测试
+规则新增、改变类型和删除后，两种存储后端的增量统计都与规则内容一致
+"""
+
+import pytest
+
+from app.models.data_manager import GarbageDataManager
+from app.models.sqlite_manager import SQLiteDataManager
+
+
+@pytest.fixture(params=['csv', 'journal', 'sqlite'])
+def data_manager(request, tmp_path):
+    csv_file = tmp_path / 'rules.csv'
+    csv_file.write_text('物品名称,垃圾类型,分类依据\n电池,有害垃圾,含重金属\n报纸,可回收垃圾,纸类\n', encoding='utf-8')
+    if request.param == 'sqlite':
+        return SQLiteDataManager(str(tmp_path / 'rules.db'), str(csv_file))
+    return GarbageDataManager(str(csv_file), storage_mode=request.param)
+
+
+def test_counts_follow_add_update_and_delete(data_manager):
+    assert data_manager.get_statistics() == {'有害垃圾': 1, '可回收垃圾': 1}
+
+    assert data_manager.add_rule('测试项', '可回收垃圾', '测试')
+    assert data_manager.get_statistics() == {'有害垃圾': 1, '可回收垃圾': 2}
+
+    assert data_manager.update_rule('测试项', '有害垃圾', '改为有害')
+    assert data_manager.get_statistics() == {'有害垃圾': 2, '可回收垃圾': 1}
+    assert data_manager.get_rule('测试项') == {'type': '有害垃圾', 'reason': '改为有害'}
+
+    assert data_manager.delete_rule('测试项')
+    assert data_manager.get_statistics() == {'有害垃圾': 1, '可回收垃圾': 1}
+
+
+def test_bulk_import_with_type_change(data_manager):
+    # Moving a rule into a type that already has rules is the case that used to abort on SQLite
+    written = data_manager.import_rules([('电池', '可回收垃圾', '改类型'), ('果皮', '厨余垃圾', '易腐')])
+    assert written == 2
+    assert data_manager.get_statistics() == {'可回收垃圾': 2, '厨余垃圾': 1}
+    assert data_manager.get_rule('电池')['type'] == '可回收垃圾'
+
+
+def test_bulk_import_counts_distinct_names(data_manager):
+    written = data_manager.import_rules([('果皮', '厨余垃圾', '易腐'), ('果皮', '其他垃圾', '后者覆盖')])
+    assert written == 1
+    assert data_manager.get_rule('果皮') == {'type': '其他垃圾', 'reason': '后者覆盖'}
+    assert data_manager.get_statistics() == {'有害垃圾': 1, '可回收垃圾': 1, '其他垃圾': 1}
@@ -0,0 +1,31 @@
+"""
+垃圾分类系统 - 规则批量导入解析测试
+非 UTF-8 的行单独记为错误，不影响其他行
+"""
+
+import io
+
+from app.routes.api import RulesBulkAPI
+
+
+def parse(payload, fmt):
+    return list(RulesBulkAPI()._iter_rows(io.BytesIO(payload), fmt))
+
+
+def test_csv_undecodable_line_is_reported_with_its_number():
+    payload = ('\ufeff物品名称,垃圾类型,分类依据\n电池,有害垃圾,含重金属\n'.encode('utf-8')
+               + '报纸,可回收垃圾,纸类\n'.encode('gbk')
+               + '果皮,厨余垃圾,易腐\n'.encode('utf-8'))
+    assert parse(payload, 'csv') == [
+        (2, ('电池', '有害垃圾', '含重金属'), None),
+        (3, None, '编码错误，文件须为 UTF-8'),
+        (4, ('果皮', '厨余垃圾', '易腐'), None),
+    ]
+
+
+def test_jsonl_undecodable_line_is_reported_with_its_number():
+    payload = ('{"item_name": "电池", "garbage_type": "有害垃圾", "reason": "含重金属"}\n'.encode('utf-8')
+               + '{"item_name": "报纸"}\n'.encode('gbk'))
+    rows = parse(payload, 'jsonl')
+    assert rows[0] == (1, ('电池', '有害垃圾', '含重金属'), None)
+    assert rows[1] == (2, None, '编码错误，文件须为 UTF-8')
@@ -0,0 +1,91 @@
+"""
+垃圾分类系统 - 相似物品排序测试
+按相似度降序、同分按存储顺序排列，并遵守 limit
+"""
+
+import math
+import random
+
+import pytest
+
+from app.models.data_manager import GarbageDataManager
+from app.models.sqlite_manager import SQLiteDataManager
+from app.models.text_index import SimilarityIndex
+
+
+def brute_force_top_k(index, query, limit):
+    """Score every name directly and sort by (score desc, ordinal asc)"""
+    query_features = index._features(query)
+    if not query_features or limit <= 0:
+        return []
+    query_norm = math.sqrt(sum(index._idf.get(gram, index._unseen_idf) ** 2 for gram in query_features))
+    scored = []
+    for ordinal, name in enumerate(index.names):
+        features = index._features(name)
+        dot = sum(index._idf[gram] ** 2 for gram in features & query_features)
+        if dot:
+            norm = math.sqrt(sum(index._idf[gram] ** 2 for gram in features))
+            scored.append((ordinal, min(1.0, dot / norm / query_norm)))
+    # Round so that float summation order does not split exact ties
+    scored.sort(key=lambda pair: (-round(pair[1], 6), pair[0]))
+    return scored[:limit]
+
+
+def test_top_k_ranks_by_score_then_storage_order():
+    index = SimilarityIndex(['电池', '充电电池', '纽扣电池', '电池', '报纸', '电'])
+    ranked = index.top_k('电池', 10)
+    ordinals = [ordinal for ordinal, _ in ranked]
+    # Both exact copies score 1.0 and keep storage order; unrelated names are left out
+    assert ordinals[:2] == [0, 3]
+    assert ranked[0][1] == pytest.approx(1.0)
+    assert 4 not in ordinals
+    scores = [score for _, score in ranked]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_top_k_limit_keeps_earliest_of_tied_names():
+    # Ten identical names tie; the cut must keep the first ones in storage order
+    index = SimilarityIndex(['报纸'] + ['塑料瓶'] * 10)
+    assert [ordinal for ordinal, _ in index.top_k('塑料瓶', 3)] == [1, 2, 3]
+    assert index.top_k('塑料瓶', 0) == []
+    assert index.top_k('塑料瓶', -1) == []
+    assert len(index.top_k('塑料瓶', 100)) == 10
+    assert index.top_k('', 5) == []
+    assert index.top_k('玻璃', 5) == []
+
+
+def test_top_k_matches_brute_force():
+    rng = random.Random(3)
+    alphabet = '电池纸盒塑料瓶ab'
+    for _ in range(200):
+        names = [''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 40))]
+        index = SimilarityIndex(names)
+        for _ in range(5):
+            query = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 4)))
+            limit = rng.randint(0, 8)
+            actual = index.top_k(query, limit)
+            expected = brute_force_top_k(index, query, limit)
+            assert [ordinal for ordinal, _ in actual] == [ordinal for ordinal, _ in expected], (names, query, limit)
+            assert [score for _, score in actual] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+
+@pytest.fixture(params=['csv', 'sqlite'])
+def data_manager(request, tmp_path):
+    csv_file = tmp_path / 'rules.csv'
+    rows = ['物品名称,垃圾类型,分类依据', '报纸,可回收垃圾,纸类', '纽扣电池,有害垃圾,含重金属',
+            '废电池,有害垃圾,含重金属', '电池,有害垃圾,含重金属', '旧电池,有害垃圾,含重金属']
+    csv_file.write_text('\n'.join(rows) + '\n', encoding='utf-8')
+    if request.param == 'sqlite':
+        return SQLiteDataManager(str(tmp_path / 'rules.db'), str(csv_file))
+    return GarbageDataManager(str(csv_file))
+
+
+def test_find_similar_ranks_by_score_not_file_order(data_manager):
+    ranked = data_manager.find_similar('电池', 5)
+    names = [name for name, _ in ranked]
+    assert names[0] == '电池'
+    # Equally similar names stay in file order
+    assert names[1:3] == ['废电池', '旧电池']
+    assert '报纸' not in names
+    assert [name for name, _ in data_manager.find_similar('电池', 2)] == names[:2]
+    assert data_manager.find_similar('电池', 0) == []
@@ -0,0 +1,43 @@
+"""
+垃圾分类系统 - 规则快照测试
+变更后发布的快照已建好索引，且增量扩展的索引与重新构建的结果一致
+"""
+
+import random
+
+from app.models.snapshot import RuleSnapshot
+from app.models.text_index import SubstringIndex
+
+
+def random_name(rng):
+    return ''.join(rng.choice('甲乙丙丁戊己庚辛ab') for _ in range(rng.randint(1, 5)))
+
+
+def test_applied_snapshots_match_a_full_rebuild():
+    rng = random.Random(7)
+    rules = {}
+    while len(rules) < 200:
+        rules[random_name(rng)] = ('其他垃圾', '测试')
+    snapshot = RuleSnapshot.build(rules, 0)
+    snapshot.prepare(similarity=True)
+
+    for _ in range(200):
+        changes = [(random_name(rng), None if rng.random() < 0.2 else ('其他垃圾', '测试'))
+                   for _ in range(rng.randint(1, 3))]
+        successor = snapshot.apply(changes)
+        successor.prepare(similarity=snapshot.has_similarity_index)
+        snapshot = successor
+
+        rebuilt = SubstringIndex(snapshot.keys)
+        assert snapshot.keys == [snapshot.normalize(name) for name in snapshot.names]
+        for query in [random_name(rng) for _ in range(5)]:
+            assert snapshot.index.find_first(query) == rebuilt.find_first(query)
+        assert len(snapshot.similarity_index) == len(snapshot.names)
+
+
+def test_prepare_builds_indexes_before_publishing():
+    snapshot = RuleSnapshot.build({'电池': ('有害垃圾', '含重金属')}, 0)
+    successor = snapshot.apply([('报纸', ('可回收垃圾', '纸类'))])
+    successor.prepare()
+    assert successor._lookup is not None and successor._index is not None
+    assert not successor.has_similarity_index
@@ -0,0 +1,68 @@
+"""
+垃圾分类系统 - 文本索引测试
+子串索引与关键词自动机的结果与按顺序逐条比较的结果一致
+"""
+
+import random
+
+from app.models.text_index import KeywordMatcher, SubstringIndex
+
+
+def first_match(names, query):
+    """Original linear scan: first name containing, or contained in, the query"""
+    for ordinal, name in enumerate(names):
+        if query in name or name in query:
+            return ordinal
+    return None
+
+
+def best_keyword(keywords, text):
+    """Original priority scan: first keyword (in priority order) found in the text"""
+    for ordinal, keyword in enumerate(keywords):
+        if keyword in text:
+            return ordinal
+    return None
+
+
+def random_text(rng, alphabet='电池纸盒塑料瓶ab', max_length=5):
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, max_length)))
+
+
+def test_find_first_keeps_first_match_order():
+    index = SubstringIndex(['塑料瓶', '瓶', '电池', '废旧电池', '纸'])
+    assert index.find_first('塑料瓶盖') == 0  # stored name contained in the query
+    assert index.find_first('瓶') == 0  # query contained in an earlier, longer name
+    assert index.find_first('旧电池') == 2  # earliest of both directions wins
+    assert index.find_first('电') == 2
+    assert index.find_first('玻璃') is None
+    assert index.find_first('') == 0
+    assert SubstringIndex([]).find_first('电池') is None
+
+
+def test_find_first_matches_linear_scan():
+    rng = random.Random(1)
+    for _ in range(300):
+        names = [random_text(rng) for _ in range(rng.randint(1, 30))]
+        index = SubstringIndex(names)
+        for _ in range(10):
+            query = random_text(rng, max_length=8)
+            assert index.find_first(query) == first_match(names, query), (names, query)
+
+
+def test_best_match_keeps_keyword_priority():
+    matcher = KeywordMatcher(['电池', '池', '塑料', '料瓶'])
+    assert matcher.best_match('废旧电池') == 0  # '池' also matches but has lower priority
+    assert matcher.best_match('储水池') == 1
+    assert matcher.best_match('塑料瓶') == 2  # priority, not position in the text
+    assert matcher.best_match('玻璃') is None
+    assert KeywordMatcher([]).best_match('电池') is None
+
+
+def test_best_match_matches_priority_scan():
+    rng = random.Random(2)
+    for _ in range(300):
+        keywords = [random_text(rng, max_length=3) for _ in range(rng.randint(1, 20))]
+        matcher = KeywordMatcher(keywords)
+        for _ in range(10):
+            text = random_text(rng, max_length=10)
+            assert matcher.best_match(text) == best_keyword(keywords, text), (keywords, text)